@@ -0,0 +1,10 @@
+import sys
+
+from src.servidor_api import ServidorAPI
+
+# --- Ponto de Entrada do Serviço HTTP ---
+# Uso: python api.py [porta]
+# Ex:  curl "http://127.0.0.1:8765/rating?ticker=PETR4&ano=2024"
+if __name__ == "__main__":
+    porta = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    ServidorAPI(porta=porta).iniciar()
@@ -0,0 +1,30 @@
+import sys
+
+from src.coleta_dados import ColetorDadosCVM
+from src.gestor_cadastro import GestorCadastro
+from src.calculo_indicadores import CalculadoraIndicadores
+from src.aquecimento import AquecedorDados
+from src.cache_disco import GestorCacheDisco
+from src.analise_setorial import AnalisadorSetorial
+from src.agregados_setoriais import AgregadosSetoriais
+from src.indice_cobertura import IndiceCobertura
+from src.pipeline_ingestao import PipelineIngestao
+
+# --- Aquecimento dos Dados (download + índices + parse, em pipeline) ---
+# Uso: python aquecer.py [ano ...]
+# Ex:  python aquecer.py 2023 2024   (sem anos: os últimos config.NUM_ANOS_AQUECIMENTO)
+if __name__ == "__main__":
+    anos = [int(ano) for ano in sys.argv[1:]]
+    cache_disco = GestorCacheDisco()
+    calculadora = CalculadoraIndicadores(ColetorDadosCVM(cache_disco))
+    gestor = GestorCadastro(cache_disco)
+    analisador = AnalisadorSetorial(calculadora, gestor)
+    agregados = AgregadosSetoriais(analisador)
+    cobertura = IndiceCobertura(analisador)
+    pipeline = PipelineIngestao(calculadora)
+    aquecedor = AquecedorDados(calculadora, gestor, anos=anos, agregados=agregados, cobertura=cobertura, pipeline=pipeline)
+    ok = aquecedor.executar()
+    estatisticas = cache_disco.estatisticas()
+    print(f"Cache em disco: {estatisticas['total_bytes'] / 1024 ** 2:.1f} MB de {estatisticas['limite_bytes'] / 1024 ** 2:.0f} MB "
+          f"({estatisticas['num_arquivos']} arquivos).")
+    sys.exit(0 if ok else 1)
\ No newline at end of file
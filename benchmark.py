@@ -0,0 +1,485 @@
+import sys
+import os
+import time
+import random
+import tempfile
+import zipfile
+import subprocess
+import functools
+import http.server
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.modelo_rating import ModeloRating
+from src.teste_estresse import SimuladorEstresse
+from src.resultado_indicadores import ResultadoIndicadores
+from src.registro_indicadores import criar_registro_padrao
+from src.gerador_relatorio import GeradorRelatorioPDF
+from src.coleta_dados import ColetorDadosCVM
+from src.calculo_indicadores import CalculadoraIndicadores
+from src.validacao_indicadores import ValidadorIndicadores
+from src.pipeline_ingestao import PipelineIngestao
+from src.triagem_painel import TriagemPainel
+from src.diagnosticos import Diagnosticos, coletar_diagnosticos, registar_diagnostico
+from src import config
+
+# ====================================================================
+# --- PAINEL DE CONTROLE (Tamanho dos benchmarks) ---
+# ====================================================================
+
+NUM_EMPRESAS = 300
+NUM_CENARIOS = 5000
+NUM_PARES_PDF = 40
+NUM_DOCUMENTOS_PDF = 5
+NUM_EMPRESAS_ZIP = 200
+NUM_THREADS_CONCORRENCIA = 16
+NUM_EMPRESAS_VALIDACAO = 20000
+NUM_REPETICOES_IMPORTACAO = 5
+SCRIPTS_IMPORTACAO = ['main', 'aquecer', 'exportar_painel', 'api']
+NUM_EMPRESAS_PIPELINE = 1500
+NUM_CONTAS_EXTRA_PIPELINE = 40
+ANOS_PIPELINE = (2021, 2022, 2023, 2024)
+LARGURA_BANDA_PIPELINE = 4 * 1024 ** 2 # (bytes/s do servidor HTTP local)
+NUM_EMPRESAS_TRIAGEM = 100000 # (muito acima do mercado: mostra como a triagem escala)
+NUM_REPETICOES_TRIAGEM = 20
+NUM_REGISTOS_DIAGNOSTICO = 20000 # (~ um aviso por conta em falta no mercado inteiro)
+
+# ====================================================================
+
+
+def gerar_contas_sinteticas(num_empresas, semente=0):
+    """
+    Gera contas brutas plausíveis (em R$) para empresas fictícias,
+    sem precisar de baixar nada da CVM.
+    """
+    rng = np.random.default_rng(semente)
+    ativo_total = rng.uniform(1e7, 1e10, num_empresas)
+    passivo_circulante = ativo_total * rng.uniform(0.05, 0.40, num_empresas)
+    passivo_nao_circulante = ativo_total * rng.uniform(0.10, 0.40, num_empresas)
+    patrimonio_liquido = ativo_total - passivo_circulante - passivo_nao_circulante
+    df_contas = pd.DataFrame({
+        'ativo_circulante': ativo_total * rng.uniform(0.10, 0.50, num_empresas),
+        'ativo_total': ativo_total,
+        'passivo_circulante': passivo_circulante,
+        'passivo_nao_circulante': passivo_nao_circulante,
+        'patrimonio_liquido': patrimonio_liquido,
+        'lucro_liquido': patrimonio_liquido * rng.normal(0.10, 0.10, num_empresas)
+    }, index=[f"EMP{i:04d}" for i in range(num_empresas)])
+    df_contas.index.name = 'empresa'
+    return df_contas
+
+
+def benchmark_teste_estresse(num_empresas, num_cenarios):
+    """
+    Mede o tempo da simulação de Monte Carlo (empresas x cenários).
+    """
+    df_contas = gerar_contas_sinteticas(num_empresas)
+    simulador = SimuladorEstresse(calculadora=None, gestor=None, modelo=ModeloRating())
+
+    inicio = time.perf_counter()
+    simulador.simular(df_contas, num_cenarios=num_cenarios)
+    duracao = time.perf_counter() - inicio
+
+    print(f"[BENCHMARK] Teste de Estresse: {num_empresas} empresas x {num_cenarios} cenários em {duracao:.3f}s")
+    return duracao
+
+
+def benchmark_relatorio_pdf(num_pares, num_documentos):
+    """
+    Mede o tempo de geração do PDF (em memória) com uma tabela de pares grande.
+    """
+    registro = criar_registro_padrao()
+    df_contas = gerar_contas_sinteticas(num_pares + 1)
+    resultado = ResultadoIndicadores(registro.nomes(), capacidade=len(df_contas), empresa_alvo=df_contas.index[0])
+    for empresa, contas in df_contas.to_dict(orient='index').items():
+        resultado.adicionar(empresa, registro.calcular(contas))
+    resultado.finalizar()
+
+    resultado_rating = ModeloRating().calcular_rating_empresa(resultado.linha_alvo().para_dict())
+    gerador = GeradorRelatorioPDF()
+
+    inicio = time.perf_counter()
+    for _ in range(num_documentos):
+        conteudo_pdf = gerador.gerar_relatorio_bytes(resultado.empresa_alvo, 2024, resultado_rating, [], resultado)
+    duracao = (time.perf_counter() - inicio) / num_documentos
+
+    print(f"[BENCHMARK] Relatório PDF: {num_pares} pares, {duracao * 1000:.1f} ms/documento ({len(conteudo_pdf) / 1024:.0f} KB)")
+    return duracao
+
+
+def gerar_zip_dfp_sintetico(caminho_zip, ano, num_empresas, semente=0, num_contas_extra=0):
+    """
+    Escreve um ZIP no formato da DFP da CVM (CSV ';' latin1, só os
+    demonstrativos e contas usados pelo sistema), com dados plausíveis.
+    'num_contas_extra' acrescenta contas que o sistema não lê (por
+    demonstrativo e empresa), para o parse ter o volume de um ZIP real.
+    Retorna a lista de CNPJs fictícios.
+    """
+    rng = np.random.default_rng(semente + ano)
+    df_contas = gerar_contas_sinteticas(num_empresas, semente=semente + ano)
+    cnpjs = [f"{i:02d}.{ano % 1000:03d}.000/0001-{i % 100:02d}" for i in range(num_empresas)]
+    
+    ativo_circulante = df_contas['ativo_circulante'].to_numpy()
+    passivo_circulante = df_contas['passivo_circulante'].to_numpy()
+    passivo_nao_circulante = df_contas['passivo_nao_circulante'].to_numpy()
+    receita = df_contas['ativo_total'].to_numpy() * rng.uniform(0.3, 1.0, num_empresas)
+    valores_por_conta = {
+        'ATIVO_TOTAL': df_contas['ativo_total'].to_numpy(),
+        'ATIVO_CIRCULANTE': ativo_circulante,
+        'CAIXA': ativo_circulante * 0.3,
+        'APLICACOES_FINANCEIRAS': ativo_circulante * 0.1,
+        'PASSIVO_CIRCULANTE': passivo_circulante,
+        'EMPRESTIMOS_CP': passivo_circulante * 0.4,
+        'PASSIVO_NAO_CIRCULANTE': passivo_nao_circulante,
+        'EMPRESTIMOS_LP': passivo_nao_circulante * 0.6,
+        'PATRIMONIO_LIQUIDO': df_contas['patrimonio_liquido'].to_numpy(),
+        'RECEITA_LIQUIDA': receita,
+        'EBIT': receita * rng.uniform(0.02, 0.25, num_empresas),
+        'LUCRO_LIQUIDO': df_contas['lucro_liquido'].to_numpy(),
+        'CAIXA_OPERACIONAL': receita * rng.uniform(0.0, 0.2, num_empresas),
+        'DEPRECIACAO_AMORTIZACAO': -receita * 0.05, # (Retenções: NEGATIVAS na DVA, como nos arquivos da CVM)
+    }
+    
+    linhas_por_demonstrativo = {}
+    for conta, (demonstrativo, cd_conta) in config.MAPA_CONTAS_CVM.items():
+        linhas_por_demonstrativo.setdefault(demonstrativo, []).append(pd.DataFrame({
+            'CNPJ_CIA': cnpjs, 'ORDEM_EXERC': 'ÚLTIMO', 'ESCALA_MOEDA': 'MIL',
+            'CD_CONTA': cd_conta, 'VL_CONTA': np.round(valores_por_conta[conta] / 1000, 2)
+        }))
+    for demonstrativo, partes in linhas_por_demonstrativo.items():
+        for i in range(num_contas_extra):
+            partes.append(pd.DataFrame({
+                'CNPJ_CIA': cnpjs, 'ORDEM_EXERC': 'ÚLTIMO', 'ESCALA_MOEDA': 'MIL',
+                'CD_CONTA': f"9.{i:02d}", 'VL_CONTA': np.round(rng.uniform(0, 1e6, num_empresas), 2)
+            }))
+    
+    with zipfile.ZipFile(caminho_zip, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for demonstrativo, partes in linhas_por_demonstrativo.items():
+            prefixo = config.ARQUIVOS_DEMONSTRATIVOS_CVM[demonstrativo][-1]
+            nome_membro = f"dfp_cia_aberta_{prefixo.upper()}_CON_{ano}.csv"
+            zf.writestr(nome_membro, pd.concat(partes).to_csv(sep=';', index=False).encode('latin1'))
+    return cnpjs
+
+
+def benchmark_concorrencia(num_empresas, num_threads, anos=(2022, 2023)):
+    """
+    Teste de "stress" da concorrência: muitas threads pedem indicadores de
+    empresas e anos diferentes à MESMA Calculadora (como as sessões do
+    dashboard, que partilham as fábricas), a partir de caches frios.
+    Compara com um cálculo sequencial; qualquer diferença é um erro.
+    """
+    with tempfile.TemporaryDirectory() as diretorio_temp:
+        cnpjs_por_ano = {
+            ano: gerar_zip_dfp_sintetico(os.path.join(diretorio_temp, f"dfp_cia_aberta_{ano}.zip"), ano, num_empresas)
+            for ano in anos
+        }
+        pedidos = [(cnpj, ano) for ano, cnpjs in cnpjs_por_ano.items() for cnpj in cnpjs]
+        
+        def criar_calculadora():
+            coletor = ColetorDadosCVM()
+            coletor.diretorio_saida_raw = diretorio_temp # (Os ZIPs sintéticos já "existem")
+            calculadora = CalculadoraIndicadores(coletor)
+            calculadora.indice_presenca.diretorio_derivados = diretorio_temp
+            return calculadora
+        
+        # 1. Referência (sequencial)
+        calculadora_ref = criar_calculadora()
+        esperado = {pedido: calculadora_ref.calcular_indicadores_empresa(*pedido) for pedido in pedidos}
+        
+        # (Convenção de sinal da DVA: o EBITDA soma o módulo da D&A)
+        contas, indicadores = calculadora_ref.calcular_contas_e_indicadores(*pedidos[0])
+        divida_liquida = contas['emprestimos_cp'] + contas['emprestimos_lp'] - contas['caixa'] - contas['aplicacoes_financeiras']
+        if contas['depreciacao_amortizacao'] >= 0 or not np.isclose(
+            indicadores['divida_liquida_ebitda'], divida_liquida / (contas['ebit'] - contas['depreciacao_amortizacao'])
+        ):
+            raise AssertionError("Dívida Líquida/EBITDA não soma o módulo da D&A (negativa na DVA).")
+        
+        # 2. Concorrente (caches frios, pedidos repetidos e baralhados)
+        calculadora = criar_calculadora()
+        pedidos_concorrentes = pedidos * 3
+        random.Random(0).shuffle(pedidos_concorrentes)
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            obtidos = list(executor.map(lambda pedido: calculadora.calcular_indicadores_empresa(*pedido), pedidos_concorrentes))
+        duracao = time.perf_counter() - inicio
+        
+        def iguais(obtido, referencia):
+            if obtido is None or referencia is None:
+                return obtido is referencia
+            nomes = sorted(referencia)
+            return sorted(obtido) == nomes and np.allclose(
+                [obtido[nome] for nome in nomes], [referencia[nome] for nome in nomes], equal_nan=True
+            )
+        
+        divergencias = sum(
+            1 for pedido, indicadores in zip(pedidos_concorrentes, obtidos)
+            if not iguais(indicadores, esperado[pedido])
+        )
+        calculadora.gerenciador_zip.fechar_todos()
+        calculadora_ref.gerenciador_zip.fechar_todos()
+    
+    print(f"[BENCHMARK] Concorrência: {len(pedidos_concorrentes)} pedidos, {num_threads} threads, "
+          f"{len(anos)} anos em {duracao:.3f}s -> {divergencias} divergências")
+    if divergencias:
+        raise AssertionError(f"{divergencias} resultados diferentes do cálculo sequencial.")
+    return duracao
+
+
+def benchmark_validacao(num_empresas):
+    """
+    Compara a validação vetorizada (máscaras sobre a matriz inteira)
+    com a validação empresa a empresa, e confere que os códigos batem.
+    """
+    registro = criar_registro_padrao()
+    df_contas = gerar_contas_sinteticas(num_empresas)
+    # (Algumas empresas inválidas: PL zero -> 'nan', prejuízo extremo -> ROE extremo)
+    df_contas.iloc[::50, df_contas.columns.get_loc('patrimonio_liquido')] = 0.0
+    df_contas.iloc[1::50, df_contas.columns.get_loc('lucro_liquido')] *= -100
+    lista_indicadores = [registro.calcular(contas) for contas in df_contas.to_dict(orient='index').values()]
+    nomes = registro.nomes()
+    matriz = np.array([[indicadores[nome] for nome in nomes] for indicadores in lista_indicadores])
+    validador = ValidadorIndicadores(registro)
+
+    inicio = time.perf_counter()
+    codigos_por_empresa = [validador.validar(indicadores) for indicadores in lista_indicadores]
+    duracao_por_empresa = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    codigos = validador.validar_matriz(matriz, nomes)
+    duracao = time.perf_counter() - inicio
+
+    if list(codigos) != codigos_por_empresa:
+        raise AssertionError("A validação vetorizada diverge da validação por empresa.")
+    excluidas = pd.Series(codigos[codigos != validador.OK]).value_counts().to_dict()
+    print(f"[BENCHMARK] Validação: {num_empresas} empresas em {duracao * 1000:.1f} ms "
+          f"(por empresa: {duracao_por_empresa * 1000:.0f} ms) -> excluídas {excluidas}")
+    return duracao
+
+
+class ServidorCVMLocal(http.server.SimpleHTTPRequestHandler):
+    """
+    "Dublê" do servidor da CVM para testes offline: serve uma pasta
+    local ({DFP}/DADOS/dfp_cia_aberta_{ano}.zip) por HTTP, com a
+    largura de banda limitada (para o download pesar como na rede).
+    """
+    bytes_por_segundo = None
+
+    def copyfile(self, origem, destino):
+        while pedaco := origem.read(64 * 1024):
+            destino.write(pedaco)
+            if self.bytes_por_segundo:
+                time.sleep(len(pedaco) / self.bytes_por_segundo)
+
+    def log_message(self, *args):
+        pass
+
+
+def benchmark_pipeline(num_empresas, num_contas_extra, anos, largura_banda):
+    """
+    Primeira ingestão de vários anos (ZIPs servidos por um servidor HTTP
+    local): sequencial (pre_carregar_ano, ano a ano) contra o
+    PipelineIngestao. Os demonstrativos e os índices de presença têm
+    de ser iguais nos dois.
+    """
+    with tempfile.TemporaryDirectory() as diretorio_temp:
+        pasta_servidor = os.path.join(diretorio_temp, "servidor", "DFP", "DADOS")
+        os.makedirs(pasta_servidor)
+        for ano in anos:
+            gerar_zip_dfp_sintetico(os.path.join(pasta_servidor, f"dfp_cia_aberta_{ano}.zip"), ano, num_empresas,
+                                    num_contas_extra=num_contas_extra)
+
+        manipulador = functools.partial(ServidorCVMLocal, directory=os.path.join(diretorio_temp, "servidor"))
+        ServidorCVMLocal.bytes_por_segundo = largura_banda
+        servidor = http.server.ThreadingHTTPServer(('127.0.0.1', 0), manipulador)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        url_base = f"http://127.0.0.1:{servidor.server_address[1]}/"
+
+        def criar_calculadora(nome):
+            diretorio = os.path.join(diretorio_temp, nome)
+            os.makedirs(diretorio)
+            coletor = ColetorDadosCVM(url_base=url_base)
+            coletor.diretorio_saida_raw = diretorio # (Vazio: tudo é baixado)
+            calculadora = CalculadoraIndicadores(coletor)
+            calculadora.indice_presenca.diretorio_derivados = diretorio
+            return calculadora
+
+        try:
+            # 1. Sequencial (download -> leitura -> parse, ano a ano)
+            calculadora_ref = criar_calculadora("sequencial")
+            inicio = time.perf_counter()
+            prontos_ref = {ano: calculadora_ref.pre_carregar_ano(ano) for ano in anos}
+            duracao_sequencial = time.perf_counter() - inicio
+
+            # 2. Pipeline (etapas sobrepostas entre os anos)
+            calculadora = criar_calculadora("pipeline")
+            pipeline = PipelineIngestao(calculadora)
+            inicio = time.perf_counter()
+            prontos = pipeline.executar(anos)
+            duracao_pipeline = time.perf_counter() - inicio
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+
+        # 3. Os dois caminhos têm de deixar os mesmos dados nos caches
+        divergencias = 0 if prontos == prontos_ref else 1
+        for ano in anos:
+            with calculadora_ref._usar_zip_ano(ano, "DFP") as zip_ref, calculadora._usar_zip_ano(ano, "DFP") as zip_pipeline:
+                tabelas = [c.indice_presenca.obter_tabela(z, ano) for c, z in ((calculadora_ref, zip_ref), (calculadora, zip_pipeline))]
+                divergencias += not tabelas[0].equals(tabelas[1])
+                for tipo_dados in ["CONSOLIDADO", "INDIVIDUAL"]:
+                    esperado = calculadora_ref._carregar_demonstrativos_ano(zip_ref, ano, "DFP", tipo_dados)
+                    obtido = calculadora._carregar_demonstrativos_ano(zip_pipeline, ano, "DFP", tipo_dados)
+                    divergencias += sum(not obtido[d].equals(df) for d, df in esperado.items())
+        calculadora.gerenciador_zip.fechar_todos()
+        calculadora_ref.gerenciador_zip.fechar_todos()
+
+    print(f"[BENCHMARK] Pipeline de ingestão: {len(anos)} anos x {num_empresas} empresas, "
+          f"sequencial {duracao_sequencial:.2f}s vs pipeline {duracao_pipeline:.2f}s "
+          f"({duracao_sequencial / duracao_pipeline:.1f}x) -> {divergencias} divergências")
+    if divergencias:
+        raise AssertionError(f"{divergencias} demonstrativos/índices diferentes da ingestão sequencial.")
+    return pipeline.estatisticas()
+
+
+def benchmark_importacao(scripts, repeticoes):
+    """
+    Mede o arranque a frio (importar o script num processo Python novo)
+    e confere que nenhuma dependência pesada é carregada só por importar
+    (nem o cProfile/tracemalloc: o modo de perfil desligado não custa nada).
+    """
+    pesadas = ('pandas', 'numpy', 'fpdf', 'requests', 'pyarrow', 'cProfile', 'tracemalloc')
+    codigo = ("import sys, time; inicio = time.perf_counter(); import {script}; "
+              "print(time.perf_counter() - inicio); "
+              f"print(','.join(m for m in {pesadas!r} if m in sys.modules))")
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    resultados = {}
+    for script in scripts:
+        duracoes = []
+        for _ in range(repeticoes):
+            saida = subprocess.run([sys.executable, '-c', codigo.format(script=script)],
+                                   cwd=raiz, capture_output=True, text=True, check=True).stdout.splitlines()
+            duracoes.append(float(saida[0]))
+        carregadas = saida[1] if len(saida) > 1 else ''
+        resultados[script] = min(duracoes)
+        print(f"[BENCHMARK] Importação a frio de {script}.py: {min(duracoes) * 1000:.1f} ms "
+              f"(pesadas carregadas: {carregadas or 'nenhuma'})")
+        if carregadas:
+            raise AssertionError(f"{script}.py carrega {carregadas} ao ser importado.")
+    return resultados
+
+
+def benchmark_triagem(num_empresas, repeticoes):
+    """
+    Compara a TriagemPainel (índices ordenados por coluna) com a mesma
+    consulta em pandas (máscaras + sort_values) sobre um painel
+    sintético, e confere que as empresas devolvidas batem.
+    """
+    df_contas = gerar_contas_sinteticas(num_empresas)
+    rng = np.random.default_rng(1)
+    passivo = df_contas['passivo_circulante'] + df_contas['passivo_nao_circulante']
+    df_painel = pd.DataFrame({
+        'cnpj': [f"{i:08d}/0001-00" for i in range(num_empresas)],
+        'setor': rng.choice(['Energia Elétrica', 'Petróleo e Gás', 'Saneamento', 'Bancos', 'Varejo'], num_empresas),
+        'ativa': rng.random(num_empresas) < 0.8,
+        'liq_corrente': (df_contas['ativo_circulante'] / df_contas['passivo_circulante']).to_numpy(),
+        'divida_pl': (passivo / df_contas['patrimonio_liquido']).to_numpy(),
+        'roe': (df_contas['lucro_liquido'] / df_contas['patrimonio_liquido']).to_numpy(),
+        'score_final': rng.uniform(0, 100, num_empresas),
+    })
+    df_painel['rating'] = pd.cut(df_painel['score_final'], [0, 25, 50, 75, 100], labels=['B', 'BB', 'BBB', 'A']).astype(str)
+    df_painel.loc[::97, 'roe'] = np.nan # (Alguns valores em falta)
+
+    # (filtros, ordenar_por, decrescente, limite, consulta equivalente em pandas)
+    consultas = [
+        ([('ativa', '==', True), ('liq_corrente', '<', 1), ('roe', '<', 0)], 'divida_pl', True, 50,
+         lambda df: df[df['ativa'] & (df['liq_corrente'] < 1) & (df['roe'] < 0)]),
+        ([('setor', '==', 'Saneamento'), ('roe', 'entre', (0.05, 0.15))], 'score_final', False, 20,
+         lambda df: df[(df['setor'] == 'Saneamento') & df['roe'].between(0.05, 0.15)]),
+        ([('rating', 'em', ('B', 'BB')), ('divida_pl', '>', 2)], None, False, 100,
+         lambda df: df[df['rating'].isin(['B', 'BB']) & (df['divida_pl'] > 2)]),
+        ([], 'roe', True, 10, lambda df: df),
+    ]
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.makedirs(os.path.join(diretorio, "ano=2023"))
+        df_painel.to_parquet(os.path.join(diretorio, "ano=2023", "painel.parquet"), index=False)
+        triagem = TriagemPainel(diretorio)
+        inicio = time.perf_counter()
+        triagem.obter_tabela(2023)
+        duracao_carga = time.perf_counter() - inicio
+
+        duracao_pandas = duracao_triagem = 0.0
+        for filtros, ordenar_por, decrescente, limite, consulta_pandas in consultas:
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                df_esperado = consulta_pandas(df_painel)
+                if ordenar_por:
+                    df_esperado = df_esperado.sort_values(ordenar_por, ascending=not decrescente, kind='stable')
+                df_esperado = df_esperado.head(limite)
+            duracao_pandas += time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                df_resultado = triagem.consultar(2023, filtros, ordenar_por, decrescente, limite)
+            duracao_triagem += time.perf_counter() - inicio
+
+            if list(df_resultado['cnpj']) != list(df_esperado['cnpj']):
+                raise AssertionError(f"A triagem diverge do pandas na consulta {filtros} (ordenar por {ordenar_por}).")
+
+    num_consultas = len(consultas) * repeticoes
+    print(f"[BENCHMARK] Triagem: {num_empresas} empresas, {len(consultas)} consultas x {repeticoes}: "
+          f"{duracao_triagem / num_consultas * 1000:.2f} ms/consulta (pandas: {duracao_pandas / num_consultas * 1000:.2f} ms), "
+          f"carga + índices {duracao_carga:.2f}s")
+    return duracao_triagem / num_consultas
+
+
+def benchmark_diagnosticos(num_registos):
+    """
+    Compara um print() por aviso com o registar_diagnostico dentro de
+    uma execução (que guarda os registos e imprime só o resumo): volume
+    escrito no terminal e custo por registo. O terminal aqui é um
+    arquivo temporário, o caso mais barato para o print().
+    """
+    mensagens = [f"AVISO (Conta Faltante): CNPJ {i:08d}/0001-00 não possui 'Lucro Líquido' (3.11) para o ano 2023." for i in range(num_registos)]
+
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as terminal:
+        stdout_original, sys.stdout = sys.stdout, terminal
+        try:
+            inicio = time.perf_counter()
+            for mensagem in mensagens:
+                print(mensagem)
+            terminal.flush()
+            duracao_print = time.perf_counter() - inicio
+            bytes_print = terminal.tell()
+
+            inicio = time.perf_counter()
+            with coletar_diagnosticos("benchmark") as diagnosticos:
+                for i, mensagem in enumerate(mensagens):
+                    registar_diagnostico(Diagnosticos.AVISO, 'CONTA_FALTANTE', mensagem, empresa=i, etapa='extracao', ano=2023)
+            print(diagnosticos.resumo())
+            terminal.flush()
+            duracao_diagnosticos = time.perf_counter() - inicio
+            bytes_diagnosticos = terminal.tell() - bytes_print
+        finally:
+            sys.stdout = stdout_original
+
+    if diagnosticos.contagens()[('AVISO', 'CONTA_FALTANTE')] != num_registos:
+        raise AssertionError("O coletor de diagnósticos perdeu registos.")
+    print(f"[BENCHMARK] Diagnósticos: {num_registos} avisos: print() {duracao_print * 1000:.1f} ms e "
+          f"{bytes_print / 1024:.0f} KB no terminal; registar_diagnostico {duracao_diagnosticos * 1000:.1f} ms e "
+          f"{bytes_diagnosticos} bytes ({len(diagnosticos.registos())} guardados, {diagnosticos.descartados} só contados)")
+    return duracao_diagnosticos
+
+
+if __name__ == "__main__":
+    benchmark_teste_estresse(NUM_EMPRESAS, NUM_CENARIOS)
+    benchmark_relatorio_pdf(NUM_PARES_PDF, NUM_DOCUMENTOS_PDF)
+    benchmark_concorrencia(NUM_EMPRESAS_ZIP, NUM_THREADS_CONCORRENCIA)
+    benchmark_validacao(NUM_EMPRESAS_VALIDACAO)
+    benchmark_importacao(SCRIPTS_IMPORTACAO, NUM_REPETICOES_IMPORTACAO)
+    benchmark_pipeline(NUM_EMPRESAS_PIPELINE, NUM_CONTAS_EXTRA_PIPELINE, ANOS_PIPELINE, LARGURA_BANDA_PIPELINE)
+    benchmark_triagem(NUM_EMPRESAS_TRIAGEM, NUM_REPETICOES_TRIAGEM)
+    benchmark_diagnosticos(NUM_REGISTOS_DIAGNOSTICO)
\ No newline at end of file
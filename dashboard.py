@@ -1,23 +1,28 @@
 # dashboard.py (Versão Final com Injeção de Dependência)
 import streamlit as st
-import sys
-import os
-import pandas as pd
+import time
 from datetime import datetime
 
-# --- Configuração de Caminho ---
-diretorio_src = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
-sys.path.append(diretorio_src)
-
-# --- Importar as "fábricas" ---
+# --- Importar as "fábricas" (pacote src/; pandas, fpdf e requests só carregam no 1º uso) ---
 try:
-    from coleta_dados import ColetorDadosCVM 
-    from gestor_cadastro import GestorCadastro
-    from calculo_indicadores import CalculadoraIndicadores
-    from analise_setorial import AnalisadorSetorial
-    from modelo_rating import ModeloRating
-    from alerta_flags import GeradorAlertas
-    import config
+    from src.coleta_dados import ColetorDadosCVM 
+    from src.gestor_cadastro import GestorCadastro
+    from src.calculo_indicadores import CalculadoraIndicadores
+    from src.analise_setorial import AnalisadorSetorial
+    from src.modelo_rating import ModeloRating
+    from src.alerta_flags import GeradorAlertas
+    from src.gerador_relatorio import GeradorRelatorioPDF
+    from src.formatacao import formatar_resultado, formatar_tabela_indicadores
+    from src.indice_busca import IndiceBusca
+    from src.aquecimento import AquecedorDados
+    from src.cache_disco import GestorCacheDisco
+    from src.agregados_setoriais import AgregadosSetoriais
+    from src.pares_automaticos import BuscadorPares
+    from src.indice_cobertura import IndiceCobertura
+    from src.triagem_painel import TriagemPainel
+    from src.perfil_execucao import PerfiladorExecucao
+    from src.diagnosticos import coletar_diagnosticos
+    from src import config
     
 except ImportError as e:
     st.error(f"ERRO CRÍTICO: Não foi possível importar as 'fábricas' da pasta /src/.")
@@ -28,15 +33,21 @@ except ImportError as e:
 
 # --- OTIMIZAÇÃO DE CACHE (COM INJEÇÃO DE DEPENDÊNCIA) ---
 
+@st.cache_resource
+# Limita o espaço de data/raw/ (a quota de disco na nuvem é pequena)
+def carregar_cache_disco():
+    print("Iniciando GestorCacheDisco (cache)...")
+    return GestorCacheDisco()
+
 @st.cache_resource
 def carregar_coletor_dados():
     print("Iniciando ColetorDadosCVM (cache)...")
-    return ColetorDadosCVM()
+    return ColetorDadosCVM(carregar_cache_disco())
 
 @st.cache_resource
 def carregar_gestor_cadastro():
     print("Iniciando GestorCadastro (cache)...")
-    return GestorCadastro()
+    return GestorCadastro(carregar_cache_disco())
 
 @st.cache_resource
 # Esta calculadora agora PRECISA de um coletor
@@ -64,17 +75,60 @@ def carregar_gerador_alertas():
 def carregar_modelo_rating():
     print("Iniciando ModeloRating (cache)...")
     return ModeloRating()
-# --- FIM DO CACHE ---
 
+@st.cache_resource
+# Partilhado entre sessões: o cache de PDFs (em memória) também
+def carregar_gerador_relatorio():
+    print("Iniciando GeradorRelatorioPDF (cache)...")
+    return GeradorRelatorioPDF()
+
+@st.cache_resource
+# Agregados pré-calculados por (setor CVM, ano): comparação com o setor inteiro
+def carregar_agregados_setoriais():
+    print("Iniciando AgregadosSetoriais (cache)...")
+    return AgregadosSetoriais(carregar_analisador_setorial())
+
+@st.cache_resource
+# Pares automáticos (k vizinhos mais próximos), partilhando os agregados
+def carregar_buscador_pares():
+    print("Iniciando BuscadorPares (cache)...")
+    buscador = BuscadorPares(carregar_agregados_setoriais(), carregar_gestor_cadastro())
+    # (Injetado depois: o analisador é criado antes dos agregados, que dependem dele)
+    carregar_analisador_setorial().buscador_pares = buscador
+    return buscador
+
+@st.cache_resource
+# Cobertura dos dados (quem tem dados utilizáveis em cada ano), construída na ingestão
+def carregar_indice_cobertura():
+    print("Iniciando IndiceCobertura (cache)...")
+    return IndiceCobertura(carregar_analisador_setorial())
+
+@st.cache_resource
+# Aquecimento em segundo plano, com as MESMAS instâncias (caches partilhados)
+def carregar_aquecedor_dados():
+    print("Iniciando AquecedorDados (cache)...")
+    aquecedor = AquecedorDados(
+        carregar_calculadora_indicadores(), carregar_gestor_cadastro(),
+        agregados=carregar_agregados_setoriais(), cobertura=carregar_indice_cobertura(),
+        buscador_pares=carregar_buscador_pares()
+    )
+    return aquecedor.iniciar_em_segundo_plano()
 
-# --- Funções "Helper" de Formatação (Sem alteração) ---
-def formatar_para_percentagem(valor):
-    if pd.isna(valor): return "N/A"
-    return f"{valor * 100:.2f}%"
+@st.cache_resource
+# Índice de busca (trie de tickers/nomes + Setor -> Tickers), construído UMA vez
+def carregar_indice_busca():
+    print("Iniciando IndiceBusca (cache)...")
+    indice = IndiceBusca(carregar_gestor_cadastro())
+    if not indice.construir():
+        raise Exception("Falha ao carregar o arquivo 'mapa_ticker_cnpj.csv'")
+    return indice
 
-def formatar_para_decimal(valor):
-    if pd.isna(valor): return "N/A"
-    return f"{valor:.2f}"
+@st.cache_resource
+# Triagem do mercado sobre o painel exportado (índices por coluna, em memória)
+def carregar_triagem_painel():
+    print("Iniciando TriagemPainel (cache)...")
+    return TriagemPainel()
+# --- FIM DO CACHE ---
 
 
 # --- FUNÇÃO PRINCIPAL (ATUALIZADA) ---
@@ -83,34 +137,48 @@ def rodar_analise_dashboard(ticker_alvo, lista_pares, ano):
     Função principal que executa todo o backend e
     exibe os resultados na interface do Streamlit.
     """
+    import pandas as pd # (Só na primeira análise: o arranque não carrega o pandas)
     # 1. Carregar as "fábricas" (a partir do cache)
     try:
         # A Etapa 1 (Coleta) foi removida daqui,
         # pois agora ela é chamada DE DENTRO do analisador.
         analisador = carregar_analisador_setorial()
+        carregar_buscador_pares()
         modelo = carregar_modelo_rating()
         alertas = carregar_gerador_alertas()
+        gerador_pdf = carregar_gerador_relatorio()
     except Exception as e:
         st.error(f"Erro ao iniciar as 'fábricas': {e}")
         return
 
     # --- ETAPA 1 (Antiga 2): ANÁLISE SETORIAL ---
-    df_completo_t, df_comparativo, dados_alvo_brutos = None, None, None
+    resultado = None
     with st.spinner(f"[Etapa 1/3] Verificando dados CVM e calculando indicadores..."):
         # Esta função agora faz TUDO (Coleta, Cache, Cálculo, Fallback)
-        resultados = analisador.analisar_pares(ticker_alvo, lista_pares, ano)
+        with coletar_diagnosticos("dashboard") as diagnosticos:
+            resultado = analisador.analisar_pares(ticker_alvo, lista_pares, ano)
         
-        if resultados[0] is None:
-            st.error(f"Falha na Etapa 1 (Análise Setorial). Verifique o terminal para mais detalhes (ex: dados faltantes da CVM).")
+        if resultado is None:
+            motivos = [registo.mensagem for registo in diagnosticos.registos('AVISO')]
+            st.error("Falha na Etapa 1 (Análise Setorial)." + "".join(f"\n- {motivo}" for motivo in motivos))
             st.stop()
             
-        df_completo_t, df_comparativo, dados_alvo_brutos = resultados
         st.success("Etapa 1 concluída!")
 
+    # Pares excluídos (e porquê), a partir dos diagnósticos da análise
+    pares_excluidos = resultado.diagnosticos.empresas_excluidas()
+    if pares_excluidos:
+        st.warning("Pares excluídos da análise:" + "".join(
+            f"\n- **{empresa}** ({registo.codigo}): {registo.mensagem}" for empresa, registo in pares_excluidos.items()
+        ))
+    with st.expander("Ver Diagnósticos da Análise"):
+        st.caption(resultado.diagnosticos.resumo())
+        st.dataframe(resultado.diagnosticos.tabela(), hide_index=True)
+
     # --- ETAPA 2 (Antiga 3): ANÁLISE QUALITATIVA (Red Flags) ---
     lista_alertas_resultado = None
     with st.spinner("[Etapa 2/3] Gerando Alertas (vs. Média do Setor)..."):
-        lista_alertas_resultado = alertas.gerar_alertas_setor(ticker_alvo, df_comparativo)
+        lista_alertas_resultado = alertas.gerar_alertas_setor(ticker_alvo, resultado)
         if lista_alertas_resultado is None:
             st.error("Falha na Etapa 2 (Geração de Alertas).")
             st.stop()
@@ -119,7 +187,7 @@ def rodar_analise_dashboard(ticker_alvo, lista_pares, ano):
     # --- ETAPA 3 (Antiga 4): ANÁLISE QUANTITATIVA (Rating) ---
     resultado_rating = None
     with st.spinner("[Etapa 3/4] Calculando Rating de Crédito Absoluto..."):
-        resultado_rating = modelo.calcular_rating_empresa(dados_alvo_brutos)
+        resultado_rating = modelo.calcular_rating_empresa(resultado.linha_alvo())
         if resultado_rating is None:
             st.error("Falha na Etapa 3 (Cálculo do Rating).")
             st.stop()
@@ -148,16 +216,9 @@ def rodar_analise_dashboard(ticker_alvo, lista_pares, ano):
             
     st.header("Análise Quantitativa Detalhada")
     
-    TRADUCAO = config.TRADUCAO_INDICADORES
-    PERC_TRADUZIDOS = [TRADUCAO.get(p) for p in config.INDICADORES_PERCENTUAIS]
-
-    df_comp_renomeado = df_comparativo.rename(index=TRADUCAO)
-    df_comp_formatado = df_comp_renomeado.copy()
-    for idx in df_comp_renomeado.index:
-        if idx in PERC_TRADUZIDOS:
-            df_comp_formatado.loc[idx] = df_comp_renomeado.loc[idx].apply(formatar_para_percentagem)
-        else:
-            df_comp_formatado.loc[idx] = df_comp_renomeado.loc[idx].apply(formatar_para_decimal)
+    # (Camada de apresentação: formatação em cache por resultado,
+    # para os "reruns" do Streamlit não a refazerem)
+    df_comp_formatado, df_completo_t_formatado = formatar_resultado(resultado)
     st.subheader(f"Comparativo: {ticker_alvo.upper()} vs. Média do Setor")
     # Substituímos o st.dataframe(df_comp_formatado) por isto:
     st.dataframe(
@@ -167,13 +228,6 @@ def rodar_analise_dashboard(ticker_alvo, lista_pares, ano):
         )
     ) 
 
-    df_completo_t_renomeado = df_completo_t.rename(index=TRADUCAO)
-    df_completo_t_formatado = df_completo_t_renomeado.copy()
-    for idx in df_completo_t_renomeado.index:
-        if idx in PERC_TRADUZIDOS:
-            df_completo_t_formatado.loc[idx] = df_completo_t_renomeado.loc[idx].apply(formatar_para_percentagem)
-        else:
-            df_completo_t_formatado.loc[idx] = df_completo_t_renomeado.loc[idx].apply(formatar_para_decimal)
     with st.expander("Ver Indicadores Detalhados (Todos os Pares)"):
         # Substituímos o st.dataframe(df_completo_t_formatado) por isto:
         st.dataframe(
@@ -183,6 +237,120 @@ def rodar_analise_dashboard(ticker_alvo, lista_pares, ano):
             )
         )
 
+    # --- Comparação com o setor CVM inteiro (agregados pré-calculados) ---
+    try:
+        setor = carregar_indice_busca().setor_do_ticker(ticker_alvo)
+        agregados = carregar_agregados_setoriais()
+        # (Só consulta: os agregados do ano são construídos no aquecimento, nunca neste pedido)
+        df_setor = agregados.estatisticas(setor, ano) if setor else None
+        if setor and df_setor is None and agregados.consultar_tabela(ano) is None:
+            st.caption(f"Comparação com o setor inteiro indisponível: os agregados de {ano} ainda não foram calculados (aquecimento).")
+        if df_setor is not None:
+            st.header(f"Comparação com o Setor Inteiro (CVM): {setor}")
+            st.caption(f"{int(df_setor['contagem'].max())} empresas ativas do setor com dados válidos em {ano}.")
+            df_setor_tabela = pd.DataFrame({
+                f"Empresa Alvo ({ticker_alvo.upper()})": resultado.df_comparativo().iloc[:, 0],
+                **{rotulo: df_setor[coluna] for coluna, rotulo in
+                   [('p25', 'Setor P25'), ('mediana', 'Setor Mediana'), ('media', 'Setor Média'), ('p75', 'Setor P75')]}
+            })
+            st.dataframe(formatar_tabela_indicadores(df_setor_tabela))
+            for alerta in alertas.gerar_alertas_setor(ticker_alvo, resultado, media_setor=agregados.linha_media(setor, ano)):
+                if "[RED FLAG]" in alerta:
+                    st.error(alerta)
+                elif "[GREEN FLAG]" in alerta:
+                    st.success(alerta)
+    except Exception as e:
+        st.warning(f"Agregados do setor indisponíveis: {e}")
+
+    # --- Relatório PDF (gerado em memória, sem passar pelo disco) ---
+    st.header("Relatório PDF")
+    try:
+        chave_pdf, conteudo_pdf = gerador_pdf.obter_relatorio_bytes(
+            ticker_alvo, ano, resultado_rating, lista_alertas_resultado, resultado
+        )
+        st.download_button(
+            "Baixar Relatório PDF",
+            data=conteudo_pdf,
+            file_name=f"Relatorio_Analise_{ticker_alvo.upper()}_{ano}.pdf",
+            mime="application/pdf",
+            key=f"pdf_{chave_pdf[:16]}",
+            on_click="ignore" # (Não re-executa a análise ao baixar)
+        )
+    except Exception as e:
+        st.error(f"Falha ao gerar o relatório PDF: {e}")
+
+
+# --- MODO DE PERFIL (opt-in: ?perfil=1 no URL) ---
+def rodar_analise_perfilada(ticker_alvo, lista_pares, ano):
+    """
+    Corre a análise dentro do perfilador (cProfile + tracemalloc) e
+    oferece o perfil e o relatório para download.
+    """
+    with PerfiladorExecucao().perfilar(ticker_alvo, lista_pares, ano) as perfil:
+        rodar_analise_dashboard(ticker_alvo, lista_pares, ano)
+
+    st.header("Perfil da Execução")
+    st.caption(f"{perfil.duracao_s:.2f}s, pico de memória {perfil.pico_memoria_bytes / 1024 ** 2:.1f} MB "
+               f"(ticker {ticker_alvo.upper()}, pares {lista_pares}, ano {ano}).")
+    col1, col2 = st.columns(2)
+    col1.download_button(
+        "Baixar Perfil (.prof)", data=perfil.perfil_bytes, file_name=perfil.nome_arquivo_perfil,
+        mime="application/octet-stream", key=f"perfil_{perfil.rotulo}", on_click="ignore"
+    )
+    col2.download_button(
+        "Baixar Relatório do Perfil (.txt)", data=perfil.relatorio, file_name=perfil.nome_arquivo_relatorio,
+        mime="text/plain", key=f"relatorio_{perfil.rotulo}", on_click="ignore"
+    )
+    with st.expander("Ver Relatório do Perfil"):
+        st.code(perfil.relatorio, language=None)
+
+
+# --- PÁGINA DE TRIAGEM DO MERCADO ---
+def rodar_pagina_triagem():
+    """
+    Filtros, ordenação e top-k sobre o painel de mercado já exportado
+    (sem recalcular demonstrativos: cada consulta leva milissegundos).
+    """
+    triagem = carregar_triagem_painel()
+    anos = triagem.anos_disponiveis()
+    if not anos:
+        st.warning("Nenhum painel exportado. Corra primeiro: python exportar_painel.py 2020 2024")
+        return
+
+    st.sidebar.header("Parâmetros da Triagem")
+    ano = st.sidebar.selectbox("Ano do Painel", options=anos)
+    tabela = triagem.obter_tabela(ano)
+    if tabela is None:
+        st.error(f"Falha ao ler o painel de {ano}. Verifique o terminal para mais detalhes.")
+        return
+
+    filtros_padrao = (["ativa == sim"] if 'ativa' in tabela.indices else []) + ["liq_corrente < 1", "roe < 0"]
+    texto_filtros = st.sidebar.text_area(
+        "Filtros (um por linha)", value="\n".join(filtros_padrao),
+        help="Operadores: < <= > >= == != e 'em' (ex: rating em BB|BB-|B+). Valores em falta nunca passam."
+    )
+    opcoes_ordem = [None] + tabela.colunas_numericas
+    ordenar_por = st.sidebar.selectbox(
+        "Ordenar por", options=opcoes_ordem,
+        index=opcoes_ordem.index('divida_pl') if 'divida_pl' in opcoes_ordem else 0,
+        format_func=lambda coluna: coluna or "(ordem do painel)"
+    )
+    decrescente = st.sidebar.checkbox("Ordem decrescente", value=True)
+    limite = st.sidebar.number_input("Máximo de empresas (0 = todas)", min_value=0, value=config.LIMITE_TRIAGEM_PADRAO)
+
+    try:
+        inicio = time.perf_counter()
+        df_resultado = triagem.consultar(ano, triagem.interpretar_filtros(texto_filtros), ordenar_por, decrescente, int(limite))
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+    except ValueError as e:
+        st.error(f"Triagem inválida: {e}")
+        return
+
+    st.header(f"Triagem do Mercado ({ano})")
+    st.caption(f"{df_resultado.attrs['total']} de {tabela.num_linhas} empresas passam nos filtros "
+               f"(mostradas: {len(df_resultado)}), em {duracao_ms:.1f} ms.")
+    st.dataframe(df_resultado, hide_index=True)
+
 
 # ====================================================================
 # --- INTERFACE DO USUÁRIO (O "Painel") ---
@@ -191,51 +359,111 @@ def rodar_analise_dashboard(ticker_alvo, lista_pares, ano):
 st.set_page_config(layout="wide")
 st.title("Sistema Automatizado de Análise de Crédito Corporativo")
 
+# (A triagem só lê o painel exportado: não precisa do aquecimento nem da busca)
+pagina = st.sidebar.radio("Página", ["Análise de Empresa", "Triagem do Mercado"], horizontal=True)
+if pagina == "Triagem do Mercado":
+    rodar_pagina_triagem()
+    st.stop()
+
 st.sidebar.header("Parâmetros da Análise")
 
+# --- Prontidão dos dados (o aquecimento não bloqueia a interface) ---
+estado_aquecimento = carregar_aquecedor_dados().estado()
+if estado_aquecimento['em_curso']:
+    st.sidebar.info("Dados a aquecer (download e leitura dos anos recentes). A primeira análise pode demorar mais.")
+elif not estado_aquecimento['pronto']:
+    etapas_falhadas = [etapa for etapa, estado in estado_aquecimento['etapas'].items() if estado == AquecedorDados.FALHOU]
+    st.sidebar.warning(f"Aquecimento incompleto (falhou: {', '.join(etapas_falhadas)}).")
+
+# (Modo de perfil: só com ?perfil=1 no URL; desligado, a análise corre sem nenhum custo extra)
+perfil_ativo = st.query_params.get("perfil", "").lower() in ("1", "true", "sim")
+if perfil_ativo:
+    st.sidebar.caption("Modo de perfil ativo: a análise é perfilada (cProfile + tracemalloc) e o perfil fica disponível para download.")
+
+# (O ano vem primeiro: as listas de empresas mostram só quem tem dados nesse ano)
+ano_atual = datetime.now().year
+ano_input = st.sidebar.number_input("Ano de Análise", min_value=2010, max_value=ano_atual, value=ano_atual - 1)
+cobertura = carregar_indice_cobertura()
+if not cobertura.ano_coberto(ano_input) and not estado_aquecimento['em_curso']:
+    st.sidebar.caption(f"Cobertura de {ano_input} desconhecida (ano não aquecido): a análise pode falhar por falta de dados.")
+
 # --- LÓGICA DA BARRA LATERAL (Simplificada) ---
 try:
-    gestor_global = carregar_gestor_cadastro()
-    if not gestor_global._carregar_mapa_ticker():
-        raise Exception("Falha ao carregar o arquivo 'mapa_ticker_cnpj.csv'")
+    indice_busca = carregar_indice_busca()
     
-    lista_tickers = gestor_global.df_mapa_ticker['TICKER'].unique()
-    lista_tickers.sort()
+    # Busca por ticker ou nome (O(prefixo), sem varrer o mapa a cada "rerun")
+    texto_busca = st.sidebar.text_input("Buscar Empresa (ticker ou nome)", value="")
+    lista_tickers = indice_busca.buscar_nome(texto_busca) if texto_busca.strip() else indice_busca.tickers
+    lista_tickers = cobertura.tickers_cobertos(ano_input, lista_tickers)
+    if not lista_tickers:
+        st.sidebar.warning(f"Nenhuma empresa com dados em {ano_input} encontrada para '{texto_busca}'.")
+        lista_tickers = cobertura.tickers_cobertos(ano_input, indice_busca.tickers) or indice_busca.tickers
     
+    # (Mantém a empresa escolhida quando a lista muda, ex: outro ano ou outra busca)
+    ticker_anterior = st.session_state.get('ticker_alvo_anterior', "PETR4")
     try:
-        default_index = list(lista_tickers).index("PETR4")
+        default_index = list(lista_tickers).index(ticker_anterior if ticker_anterior in lista_tickers else "PETR4")
     except ValueError:
         default_index = 0 
     
     ticker_alvo = st.sidebar.selectbox(
         "Ticker Alvo",
         options=lista_tickers,
-        index=default_index
+        index=default_index,
+        format_func=lambda ticker: f"{ticker} - {indice_busca.nomes.get(ticker, '')}"
+    )
+    st.session_state['ticker_alvo_anterior'] = ticker_alvo
+    
+    # Sugestões de pares (mesmo setor no cadastro CVM)
+    pares_sugeridos = st.sidebar.multiselect(
+        f"Pares Sugeridos ({indice_busca.setor_do_ticker(ticker_alvo) or 'setor desconhecido'})",
+        options=cobertura.tickers_cobertos(ano_input, indice_busca.sugerir_pares(ticker_alvo))
     )
     
     pares_input = st.sidebar.text_area(
         "Pares Concorrentes (separados por vírgula)", 
         value="PRIO3, RECV3, BRAV3" 
     )
+    pares_automaticos = st.sidebar.checkbox(
+        "Escolher pares automaticamente (mais parecidos)",
+        help="Ignora a lista acima e escolhe os pares por semelhança (tamanho, setor e indicadores)."
+    )
+    if pares_automaticos:
+        pares_input = "auto"
+    elif pares_sugeridos:
+        pares_input = ", ".join([pares_input] + pares_sugeridos)
 
 except Exception as e:
     st.sidebar.error(f"Erro ao carregar mapa de tickers: {e}")
     ticker_alvo = st.sidebar.text_input("Ticker Alvo", value="PETR4")
     pares_input = st.sidebar.text_area("Pares Concorrentes (separados por vírgula)", value="PRIO3, RECV3, BRAV3")
 
-ano_atual = datetime.now().year
-ano_input = st.sidebar.number_input("Ano de Análise", min_value=2010, max_value=ano_atual, value=ano_atual - 1)
-
 
 # --- Botão de Execução ---
 if st.sidebar.button("Gerar Análise", type="primary"):
     
-    lista_pares = [ticker.strip().upper() for ticker in pares_input.split(',') if ticker.strip()]
+    if AnalisadorSetorial.pares_automaticos_pedidos(pares_input):
+        lista_pares = "auto"
+    else:
+        lista_pares = [ticker.strip().upper() for ticker in pares_input.split(',') if ticker.strip()]
+        lista_pares = list(dict.fromkeys(p for p in lista_pares if p != ticker_alvo.strip().upper())) # (Sem repetidos nem o alvo)
+    
+    # Cobertura: pedidos condenados são rejeitados antes de baixar/ler o ZIP
+    mensagem_alvo = cobertura.mensagem(ticker_alvo, ano_input) if ticker_alvo.strip() else None
+    if lista_pares != "auto":
+        pares_sem_dados = [p for p in lista_pares if cobertura.coberto(p, ano_input) is False]
+        if pares_sem_dados:
+            st.warning(f"Pares sem dados utilizáveis em {ano_input} (ignorados): {', '.join(pares_sem_dados)}")
+            lista_pares = [p for p in lista_pares if p not in pares_sem_dados]
     
     if not ticker_alvo.strip():
         st.error("Por favor, insira um Ticker Alvo.")
+    elif mensagem_alvo:
+        st.error(f"Sem dados utilizáveis: {mensagem_alvo}")
     elif not lista_pares:
         st.error("Por favor, insira pelo menos um Ticker na caixa 'Pares Concorrentes'.")
+    elif perfil_ativo:
+        rodar_analise_perfilada(ticker_alvo, lista_pares, ano_input)
     else:
         rodar_analise_dashboard(ticker_alvo, lista_pares, ano_input)
 
@@ -0,0 +1,33 @@
+import sys
+
+from src.execucao_distribuida import ExecutorDistribuido, iniciar_trabalhadores
+
+# --- Re-rating distribuído do mercado (fila de trabalho SQLite, sem serviços externos) ---
+# Uso:
+#   python distribuir.py planear ANO_INICIO ANO_FIM [setor|faixa]   (uma vez)
+#   python distribuir.py trabalhar [num_processos]                  (em cada máquina)
+#   python distribuir.py estado
+#   python distribuir.py juntar [pasta_destino]
+# (Várias máquinas: corram todas a partir da mesma pasta partilhada)
+if __name__ == "__main__":
+    comando = sys.argv[1] if len(sys.argv) > 1 else None
+
+    if comando == "planear" and len(sys.argv) >= 4:
+        anos = range(int(sys.argv[2]), int(sys.argv[3]) + 1)
+        por = sys.argv[4] if len(sys.argv) > 4 else None
+        ExecutorDistribuido.criar().planear(anos, por)
+    elif comando == "trabalhar":
+        num_processos = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+        if num_processos == 1:
+            ExecutorDistribuido.criar().trabalhar()
+        else:
+            iniciar_trabalhadores(num_processos)
+    elif comando == "estado":
+        print(ExecutorDistribuido.criar().fila.resumo())
+    elif comando == "juntar":
+        destino = sys.argv[2] if len(sys.argv) > 2 else None
+        resumo = ExecutorDistribuido.criar().juntar(destino)
+        sys.exit(0 if resumo else 1)
+    else:
+        print("Uso: python distribuir.py planear ANO_INICIO ANO_FIM [setor|faixa] | trabalhar [num_processos] | estado | juntar [pasta_destino]")
+        sys.exit(2)
\ No newline at end of file
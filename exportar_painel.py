@@ -0,0 +1,27 @@
+import sys
+
+from src.coleta_dados import ColetorDadosCVM
+from src.gestor_cadastro import GestorCadastro
+from src.calculo_indicadores import CalculadoraIndicadores
+from src.modelo_rating import ModeloRating
+from src.exportacao_painel import ExportadorPainel
+from src.pipeline_ingestao import PipelineIngestao
+from src.cache_disco import GestorCacheDisco
+
+# --- Exportação do Painel de Mercado (todas as empresas x anos, Parquet) ---
+# Uso: python exportar_painel.py ANO_INICIO ANO_FIM [pasta_destino]
+# Ex:  python exportar_painel.py 2020 2024
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Uso: python exportar_painel.py ANO_INICIO ANO_FIM [pasta_destino]")
+        sys.exit(2)
+    ano_inicio, ano_fim = int(sys.argv[1]), int(sys.argv[2])
+    destino = sys.argv[3] if len(sys.argv) > 3 else None
+    
+    # (Como no aquecer.py: os ZIPs de vários anos respeitam o limite do disco)
+    cache_disco = GestorCacheDisco()
+    calculadora = CalculadoraIndicadores(ColetorDadosCVM(cache_disco))
+    # (O pipeline baixa e lê os anos seguintes enquanto cada ano é exportado)
+    exportador = ExportadorPainel(calculadora, GestorCadastro(cache_disco), ModeloRating(), pipeline=PipelineIngestao(calculadora))
+    resumo = exportador.exportar(ano_inicio, ano_fim, destino)
+    sys.exit(0 if resumo else 1)
\ No newline at end of file
@@ -1,40 +1,36 @@
 import sys
-import os
 from datetime import datetime # Importado para validar o ano
 
-# --- Adicionar a pasta 'src' ao 'caminho' do Python ---
-diretorio_src = os.path.join(os.path.dirname(__file__), 'src')
-sys.path.append(diretorio_src)
-
-# --- Importar as nossas "fábricas" ---
-try:
-    from analise_setorial import AnalisadorSetorial
-    from gerador_relatorio import GeradorRelatorioPDF
-    from alerta_flags import GeradorAlertas
-    from modelo_rating import ModeloRating
-    import config # Importamos o config para usar os caminhos no log
-except ImportError as e:
-    print(f"ERRO: Falha ao importar as classes das 'fábricas' da pasta /src/.")
-    print(f"Detalhe: {e}")
-    sys.exit(1)
-except Exception as e:
-    print(f"Um erro inesperado ocorreu durante a importação: {e}")
-    sys.exit(1)
+# --- Importar as nossas "fábricas" (pacote src/; as dependências pesadas só carregam no 1º uso) ---
+from src.coleta_dados import ColetorDadosCVM
+from src.gestor_cadastro import GestorCadastro
+from src.calculo_indicadores import CalculadoraIndicadores
+from src.analise_setorial import AnalisadorSetorial
+from src.gerador_relatorio import GeradorRelatorioPDF
+from src.alerta_flags import GeradorAlertas
+from src.modelo_rating import ModeloRating
+from src.indice_cobertura import IndiceCobertura
+from src.perfil_execucao import PerfiladorExecucao
+from src import config # Importamos o config para usar os caminhos no log
 
 # ====================================================================
 # --- PAINEL DE CONTROLE (Defina os seus parâmetros aqui) ---
 # ====================================================================
 
 TICKER_ALVO = "CSMG3"
-LISTA_PARES = ["SAPR11", "SBSP3"]
+LISTA_PARES = ["SAPR11", "SBSP3"] # (Ou "auto": pares escolhidos por semelhança)
 ANO_DE_ANALISE = 2024
+# Modo de perfil (ou: python main.py --perfil): grava o perfil da análise em output/perfis/
+PERFILAR_ANALISE = False
 
 # ====================================================================
 
-def validar_inputs(ticker, pares, ano):
+def validar_inputs(ticker, pares, ano, cobertura=None):
     """
     Valida os inputs do "Painel de Controlo" antes de executar.
     Levanta ValueError ou TypeError se algo estiver errado.
+    Com um IndiceCobertura, rejeita logo um alvo sem dados utilizáveis
+    no ano (sem baixar nem ler o ZIP).
     """
     print("Validando inputs...")
     
@@ -48,20 +44,42 @@ def validar_inputs(ticker, pares, ano):
         raise ValueError("TICKER_ALVO não pode ser vazio.")
         
     # 3. Validar Lista de Pares
-    if not isinstance(pares, list):
-        raise TypeError("LISTA_PARES deve ser uma lista (ex: ['PRIO3', 'RECV3']).")
-        
-    if len(pares) < 1:
-        raise ValueError("LISTA_PARES deve conter pelo menos um concorrente.")
+    pares_automaticos = AnalisadorSetorial.pares_automaticos_pedidos(pares)
+    if not pares_automaticos:
+        if not isinstance(pares, list):
+            raise TypeError("LISTA_PARES deve ser uma lista (ex: ['PRIO3', 'RECV3']).")
+            
+        if len(pares) < 1:
+            raise ValueError("LISTA_PARES deve conter pelo menos um concorrente.")
+
+    # 4. Validar Cobertura dos Dados (se o índice do ano já existe)
+    if cobertura is not None:
+        mensagem = cobertura.mensagem(ticker, ano)
+        if mensagem:
+            raise ValueError(f"Sem dados utilizáveis: {mensagem}")
+        for par in ([] if pares_automaticos else pares):
+            mensagem = cobertura.mensagem(par, ano)
+            if mensagem:
+                print(f"AVISO: {mensagem} Será ignorado.")
         
-    print("Inputs validados com sucesso.")
+    print(f"Inputs validados com sucesso{' (pares automáticos)' if pares_automaticos else ''}.")
     return True
 # --- FIM DA NOVA FUNÇÃO ---
 
 
-def rodar_analise_completa(ticker, pares, ano):
+def criar_analisador():
+    """
+    Monta as "fábricas" (coletor, calculadora, gestor) num AnalisadorSetorial.
+    """
+    calculadora = CalculadoraIndicadores(ColetorDadosCVM())
+    return AnalisadorSetorial(calculadora, GestorCadastro())
+
+
+def rodar_analise_completa(ticker, pares, ano, analisador=None):
     """
     Orquestra a execução completa do sistema.
+    'analisador': um AnalisadorSetorial já montado (ex: o mesmo usado
+    na validação dos inputs); sem ele, as fábricas são criadas aqui.
     """
     print(f"--- [MAIN] INICIANDO SISTEMA DE ANÁLISE DE CRÉDITO ---")
     print(f"--- [MAIN] Alvo: {ticker} | Ano: {ano} ---")
@@ -69,32 +87,33 @@ def rodar_analise_completa(ticker, pares, ano):
     try:
         # --- ETAPA 1: ANÁLISE SETORIAL (Calcular Indicadores) ---
         print("\n--- [MAIN] Iniciando Etapa 1: Análise Setorial (em memória) ---")
-        analisador = AnalisadorSetorial()
+        # (Injeção de dependência, como no dashboard.py)
+        if analisador is None:
+            analisador = criar_analisador()
         
-        # 'analisar_pares' agora retorna os 3 resultados que precisamos
-        # (df_completo_t, df_comparativo, dados_alvo_brutos)
-        resultados_analise = analisador.analisar_pares(ticker, pares, ano)
+        # 'analisar_pares' agora retorna um ResultadoIndicadores (colunar)
+        resultado = analisador.analisar_pares(ticker, pares, ano)
         
-        if resultados_analise[0] is None:
+        if resultado is None:
             print("--- [MAIN] ERRO na Etapa 1 (Análise Setorial). A análise foi cancelada. ---")
             return
             
-        # Desempacotar os resultados
-        df_completo_t, df_comparativo, dados_alvo_brutos = resultados_analise
-            
         print("--- [MAIN] Etapa 1 concluída com sucesso (Dados em memória). ---")
 
         # --- ETAPA 2: ANÁLISE QUALITATIVA (Red Flags) ---
         print("\n--- [MAIN] Iniciando Etapa 2: Geração de Alertas ---")
         gerador_alertas = GeradorAlertas()
-        # Passamos o DataFrame (em memória), não o nome do arquivo
-        lista_alertas = gerador_alertas.gerar_alertas_setor(ticker, df_comparativo)
+        # Passamos o resultado (em memória), não o nome do arquivo
+        lista_alertas = gerador_alertas.gerar_alertas_setor(ticker, resultado)
+        print("\n--- Conclusões da Análise (Sinais de Alerta) ---")
+        for alerta in lista_alertas or ["Nenhum alerta gerado."]:
+            print(f"- {alerta}")
 
         # --- ETAPA 3: ANÁLISE QUANTITATIVA (Rating) ---
         print("\n--- [MAIN] Iniciando Etapa 3: Cálculo do Rating ---")
         modelo = ModeloRating()
-        # Passamos os dados brutos do alvo (em memória)
-        resultado_rating = modelo.calcular_rating_empresa(dados_alvo_brutos)
+        # Passamos a linha do alvo (uma vista sobre o resultado)
+        resultado_rating = modelo.calcular_rating_empresa(resultado.linha_alvo())
 
         # --- ETAPA 4: GERAÇÃO DO PDF (Consolidar tudo) ---
         print("\n--- [MAIN] Iniciando Etapa 4: Geração do Relatório PDF ---")
@@ -106,8 +125,7 @@ def rodar_analise_completa(ticker, pares, ano):
             ano = ano,
             resultado_rating = resultado_rating,
             lista_alertas = lista_alertas,
-            df_comparativo = df_comparativo,
-            df_completo_t = df_completo_t
+            resultado = resultado
         )
         
         print("--- [MAIN] Etapa 4 concluída com sucesso (PDF gerado). ---")
@@ -122,10 +140,21 @@ if __name__ == "__main__":
     
     try:
         # 1. Validar os inputs primeiro
-        validar_inputs(TICKER_ALVO, LISTA_PARES, ANO_DE_ANALISE)
+        # (As mesmas fábricas servem a validação e a análise; o índice
+        # de cobertura só é lido do disco: não baixa nada)
+        analisador = criar_analisador()
+        cobertura = IndiceCobertura(analisador)
+        validar_inputs(TICKER_ALVO, LISTA_PARES, ANO_DE_ANALISE, cobertura)
         
         # 2. Se a validação passar, executar o sistema
-        rodar_analise_completa(TICKER_ALVO, LISTA_PARES, ANO_DE_ANALISE)
+        if PERFILAR_ANALISE or '--perfil' in sys.argv[1:]:
+            perfilador = PerfiladorExecucao()
+            with perfilador.perfilar(TICKER_ALVO, LISTA_PARES, ANO_DE_ANALISE) as perfil:
+                rodar_analise_completa(TICKER_ALVO, LISTA_PARES, ANO_DE_ANALISE, analisador)
+            caminho_perfil, caminho_relatorio = perfilador.gravar(perfil)
+            print(f"--- [MAIN] Perfil gravado: {caminho_perfil} (python -m pstats) e {caminho_relatorio} ---")
+        else:
+            rodar_analise_completa(TICKER_ALVO, LISTA_PARES, ANO_DE_ANALISE, analisador)
         
     except (ValueError, TypeError) as e:
         # Apanha erros de validação
@@ -0,0 +1,60 @@
+"""
+As "fábricas" do Sistema de Análise de Crédito.
+
+Importar o pacote (ou uma fábrica) não tem efeitos colaterais: nada
+é baixado, nenhuma pasta é criada e as dependências pesadas (pandas,
+numpy, fpdf, requests, pyarrow) só são importadas no primeiro uso.
+
+    from src.calculo_indicadores import CalculadoraIndicadores
+    from src import CalculadoraIndicadores   # (equivalente, carregado só aqui)
+"""
+import importlib
+
+# Classe/função -> módulo que a define (importado só quando pedido)
+_EXPORTACOES = {
+    'ColetorDadosCVM': 'coleta_dados',
+    'GestorCadastro': 'gestor_cadastro',
+    'CalculadoraIndicadores': 'calculo_indicadores',
+    'AnalisadorSetorial': 'analise_setorial',
+    'ModeloRating': 'modelo_rating',
+    'GeradorAlertas': 'alerta_flags',
+    'GeradorRelatorioPDF': 'gerador_relatorio',
+    'SimuladorEstresse': 'teste_estresse',
+    'ResultadoIndicadores': 'resultado_indicadores',
+    'RegistroIndicadores': 'registro_indicadores',
+    'criar_registro_padrao': 'registro_indicadores',
+    'ValidadorIndicadores': 'validacao_indicadores',
+    'HierarquiaContas': 'hierarquia_contas',
+    'IndicePresenca': 'indice_presenca',
+    'IndiceBusca': 'indice_busca',
+    'IndiceCobertura': 'indice_cobertura',
+    'AgregadosSetoriais': 'agregados_setoriais',
+    'BuscadorPares': 'pares_automaticos',
+    'AquecedorDados': 'aquecimento',
+    'PipelineIngestao': 'pipeline_ingestao',
+    'GestorCacheDisco': 'cache_disco',
+    'ExportadorPainel': 'exportacao_painel',
+    'FilaTrabalho': 'fila_trabalho',
+    'ExecutorDistribuido': 'execucao_distribuida',
+    'TriagemPainel': 'triagem_painel',
+    'PerfiladorExecucao': 'perfil_execucao',
+    'Diagnosticos': 'diagnosticos',
+    'coletar_diagnosticos': 'diagnosticos',
+    'ServidorAPI': 'servidor_api',
+    'formatar_resultado': 'formatacao',
+    'formatar_tabela_indicadores': 'formatacao',
+}
+
+__all__ = sorted(_EXPORTACOES)
+
+
+def __getattr__(nome):
+    if nome not in _EXPORTACOES:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    valor = getattr(importlib.import_module(f".{_EXPORTACOES[nome]}", __name__), nome)
+    globals()[nome] = valor # (Os acessos seguintes não passam por aqui)
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTACOES))
\ No newline at end of file
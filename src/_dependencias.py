@@ -0,0 +1,50 @@
+import importlib
+import importlib.util
+
+
+class ModuloTardio:
+    """
+    Importação TARDIA de uma dependência pesada (pandas, numpy, fpdf,
+    requests): o módulo só é importado no primeiro acesso a um atributo
+    (ex: pd.DataFrame), não quando o nosso módulo é importado.
+
+    Depois da primeira importação, os atributos do módulo são copiados
+    para o próprio objeto, por isso os acessos seguintes são tão rápidos
+    como os de um módulo normal.
+    """
+
+    def __init__(self, nome, pacote=None):
+        self.__dict__['_nome'] = nome
+        self.__dict__['_pacote'] = pacote or nome
+
+    def __getattr__(self, atributo):
+        try:
+            modulo = importlib.import_module(self._nome)
+        except ImportError as e:
+            raise ImportError(f"Biblioteca '{self._pacote}' não encontrada (pip install -r requirements.txt). Detalhe: {e}") from e
+        self.__dict__.update(vars(modulo))
+        return getattr(modulo, atributo)
+
+    def __repr__(self):
+        return f"<ModuloTardio '{self._nome}'>"
+
+
+def disponivel(nome):
+    """
+    True se a dependência (opcional) está instalada, SEM a importar.
+    """
+    try:
+        return importlib.util.find_spec(nome) is not None
+    except ImportError:
+        return False
+
+
+# (Os nossos módulos fazem: from ._dependencias import pd, np)
+pd = ModuloTardio('pandas')
+np = ModuloTardio('numpy')
+requests = ModuloTardio('requests')
+fpdf = ModuloTardio('fpdf', 'fpdf2')
+fpdf_enums = ModuloTardio('fpdf.enums', 'fpdf2')
+fpdf_fonts = ModuloTardio('fpdf.fonts', 'fpdf2')
+pa = ModuloTardio('pyarrow')
+pq = ModuloTardio('pyarrow.parquet', 'pyarrow')
\ No newline at end of file
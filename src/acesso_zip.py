@@ -0,0 +1,188 @@
+import os
+import mmap
+import zipfile
+import threading
+from contextlib import contextmanager
+
+
+class _LeitorMmap:
+    """
+    Adaptador mínimo de "arquivo" sobre um mmap (o zipfile precisa de
+    seekable(), que o mmap só ganhou no Python 3.13). A leitura devolve
+    fatias do mapeamento, sem copiar o ZIP inteiro para a RAM.
+    """
+
+    def __init__(self, mapa):
+        self._mapa = mapa
+
+    def read(self, n=-1):
+        return self._mapa.read(n)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        self._mapa.seek(offset, whence)
+        return self._mapa.tell()
+
+    def tell(self):
+        return self._mapa.tell()
+
+    def seekable(self):
+        return True
+
+
+class ArquivoZipCVM:
+    """
+    Um ZIP da CVM aberto UMA vez e mantido aberto.
+
+    - O arquivo é mapeado em memória (mmap): o sistema operativo
+      carrega só as páginas lidas, sem copiar o ZIP para a RAM.
+    - O diretório central (lista de membros e os seus offsets) é lido
+      uma única vez na abertura.
+    - Os membros são lidos em streaming (descompressão sob demanda),
+      nada é extraído para o disco.
+    - Os sufixos procurados (ex: 'dre_con_2024.csv') ficam em cache,
+      ignorando maiúsculas/minúsculas.
+    """
+
+    def __init__(self, caminho_zip):
+        self.caminho_zip = caminho_zip
+        self._arquivo = open(caminho_zip, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+            self._zf = zipfile.ZipFile(_LeitorMmap(self._mmap))
+        except Exception:
+            self._arquivo.close()
+            raise
+        estado = os.fstat(self._arquivo.fileno())
+        self.assinatura = (estado.st_size, estado.st_mtime_ns)
+
+        # nome em minúsculas -> ZipInfo (com o offset do membro)
+        self._membros = {info.filename.lower(): info for info in self._zf.infolist()}
+        # sufixo em minúsculas -> ZipInfo (ou None, se não existe)
+        self._cache_sufixos = {}
+        self._lock = threading.Lock()
+        # Leitores em curso (GerenciadorZip.reservar) e se já saiu do gerenciador
+        self._leitores = 0
+        self._retirado = False
+        self._fechado = False
+        self._lock_leitores = threading.Lock()
+
+    def encontrar_membro(self, sufixo_arquivo_lower):
+        """
+        Encontra um membro ignorando o "case" (maiúsculas/minúsculas).
+        Ex: sufixo_arquivo_lower = 'dre_con_2024.csv'
+        Encontra: 'dfp_cia_aberta_DRE_CON_2024.CSV'
+        A varredura só acontece na primeira vez de cada sufixo.
+        """
+        try:
+            info = self._cache_sufixos[sufixo_arquivo_lower]
+        except KeyError:
+            info = None
+            for nome_lower, info_membro in self._membros.items():
+                if nome_lower.endswith(sufixo_arquivo_lower):
+                    info = info_membro
+                    break
+            with self._lock:
+                self._cache_sufixos[sufixo_arquivo_lower] = info
+
+        if info is None:
+            raise FileNotFoundError(f"Arquivo terminando em '{sufixo_arquivo_lower}' não encontrado no ZIP.")
+        return info
+
+    def abrir(self, sufixo_arquivo_lower):
+        """
+        Abre um membro para leitura em streaming.
+        (O zipfile partilha o mmap entre threads com um lock interno,
+        por isso vários membros podem ser lidos em paralelo.)
+        """
+        return self._zf.open(self.encontrar_membro(sufixo_arquivo_lower))
+
+    def _reservar(self):
+        with self._lock_leitores:
+            self._leitores += 1
+
+    def _libertar(self):
+        with self._lock_leitores:
+            self._leitores -= 1
+            fechar = self._retirado and not self._leitores
+        if fechar:
+            self.fechar()
+
+    def _retirar(self):
+        """
+        Já não é servido pelo GerenciadorZip: fecha agora, ou quando o
+        último leitor em curso terminar.
+        """
+        with self._lock_leitores:
+            self._retirado = True
+            fechar = not self._leitores
+        if fechar:
+            self.fechar()
+
+    def fechar(self):
+        with self._lock_leitores:
+            if self._fechado:
+                return
+            self._fechado = True
+        self._zf.close()
+        self._mmap.close()
+        self._arquivo.close()
+
+
+class GerenciadorZip:
+    """
+    Mantém um ArquivoZipCVM aberto por caminho (ou seja, por ano/tipo_doc),
+    partilhado entre threads. Pedidos repetidos ao mesmo ano não pagam
+    nenhum custo de abertura; se o arquivo mudar no disco, é reaberto.
+
+    Quem lê RESERVA o arquivo (reservar/libertar, ou o 'with usar'): um
+    arquivo substituído (o ZIP mudou no disco) ou fechado (fechar, ex:
+    antes de o cache em disco o apagar) é fechado logo que o último
+    leitor terminar, sem esperar pelo garbage collector (no Linux, o
+    espaço de um arquivo apagado só é libertado quando ninguém o tem aberto).
+    """
+
+    def __init__(self):
+        self._abertos = {}
+        self._lock = threading.Lock()
+
+    def reservar(self, caminho_zip):
+        """
+        O ArquivoZipCVM do caminho (aberto, ou reaberto se o arquivo
+        mudou), reservado até libertar(). Levanta exceção se não abrir.
+        """
+        caminho_zip = os.path.normpath(caminho_zip)
+        estado = os.stat(caminho_zip)
+        assinatura = (estado.st_size, estado.st_mtime_ns)
+
+        with self._lock:
+            arquivo = self._abertos.get(caminho_zip)
+            if arquivo is None or arquivo.assinatura != assinatura:
+                novo = ArquivoZipCVM(caminho_zip)
+                if arquivo is not None:
+                    arquivo._retirar() # (Fecha quando os leitores em curso terminarem)
+                arquivo = self._abertos[caminho_zip] = novo
+            arquivo._reservar()
+            return arquivo
+
+    def libertar(self, arquivo):
+        arquivo._libertar()
+
+    @contextmanager
+    def usar(self, caminho_zip):
+        arquivo = self.reservar(caminho_zip)
+        try:
+            yield arquivo
+        finally:
+            self.libertar(arquivo)
+
+    def fechar(self, caminho_zip):
+        with self._lock:
+            arquivo = self._abertos.pop(os.path.normpath(caminho_zip), None)
+        if arquivo is not None:
+            arquivo._retirar()
+
+    def fechar_todos(self):
+        with self._lock:
+            abertos, self._abertos = self._abertos, {}
+        for arquivo in abertos.values():
+            arquivo._retirar()
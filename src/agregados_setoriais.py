@@ -0,0 +1,262 @@
+import os
+import threading
+from ._dependencias import np
+from ._dependencias import pd
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+from .resultado_indicadores import LinhaIndicadores
+from .diagnosticos import coletar_diagnosticos
+
+
+class AgregadosSetoriais:
+    """
+    Tabela PRÉ-CALCULADA de agregados por (SETOR_ATIV da CVM, ano):
+    contagem, média, mediana e quantis de cada indicador, sobre TODAS as
+    empresas ativas do setor com dados válidos na DFP.
+
+    - Construída na ingestão (ex: pelo AquecedorDados) e guardada em
+      data/raw/derivados/, junto com a tabela por empresa que lhe deu origem.
+    - Atualização incremental: se o ZIP do ano mudar (novas entregas,
+      ex: ColetorDadosCVM.atualizar_demonstrativos no AquecedorDados),
+      as entregas são comparadas empresa a empresa pela impressão digital
+      das suas linhas no ZIP (CalculadoraIndicadores.impressoes_empresas):
+      só as empresas cuja entrega mudou são recalculadas, e só os
+      setores afetados são reagregados.
+    - Comparar uma empresa com o setor inteiro passa a ser uma consulta
+      (linha_media / estatisticas), sem extrair todos os membros do setor:
+      as consultas só usam tabelas já construídas (consultar_tabela).
+    """
+
+    QUANTIS = {'p10': 0.10, 'p25': 0.25, 'mediana': 0.50, 'p75': 0.75, 'p90': 0.90}
+    # Colunas da tabela por empresa que não são indicadores
+    COLUNAS_EMPRESA = ['CNPJ_CIA', 'SETOR_ATIV', 'ASSINATURA', 'ATIVO_TOTAL', 'CONTAS_DERIVADAS']
+
+    def __init__(self, analisador, tipo_doc="DFP"):
+        # (O analisador dá a calculadora, o gestor e a MESMA validação dos pares)
+        self.analisador = analisador
+        self.calculadora = analisador.calculadora
+        self.gestor = analisador.gestor
+        self.tipo_doc = tipo_doc
+        self.diretorio_derivados = config.CAMINHO_DADOS_DERIVADOS
+        os.makedirs(self.diretorio_derivados, exist_ok=True)
+
+        self._tabelas = {}  # ano -> (df_empresas, df_agregados)
+        self._locks = {}
+        self._lock_global = threading.Lock()
+
+    def _caminhos(self, ano):
+        prefixo = os.path.join(self.diretorio_derivados, f"{self.tipo_doc.lower()}_{ano}")
+        return f"{prefixo}_indicadores_empresas.csv", f"{prefixo}_agregados_setor.csv"
+
+    # --- CONSTRUÇÃO ---
+
+    def _calcular_empresas(self, ano, df_anterior):
+        """
+        Uma linha por empresa ativa (CNPJ, setor, impressão digital da
+        entrega no ZIP, indicadores). Empresas com a mesma impressão que
+        em df_anterior reaproveitam a linha guardada, sem extrair as
+        contas; as que não têm contas ficam com os indicadores 'nan'
+        (e não são extraídas de novo enquanto a entrega não mudar).
+        Retorna (df_empresas, setores_alterados).
+        """
+        impressoes = self.calculadora.impressoes_empresas(ano, self.tipo_doc)
+        if impressoes is None or not self.gestor._carregar_cadastro_cvm():
+            return None, set()
+
+        setor_por_cnpj = self.gestor.df_cadastro_cvm.drop_duplicates('CNPJ_CIA').set_index('CNPJ_CIA')['SETOR_ATIV'].dropna().to_dict()
+        nomes_indicadores = self.calculadora.registro.nomes()
+        anteriores = {}
+        if df_anterior is not None:
+            anteriores = df_anterior.set_index('CNPJ_CIA').to_dict(orient='index')
+
+        linhas, setores_alterados, reaproveitadas, sem_contas = [], set(), 0, 0
+        # (Uma linha de resumo no fim, em vez de uma por empresa)
+        with coletar_diagnosticos(f"agregados {ano}") as diagnosticos:
+            for cnpj in sorted(impressoes):
+                setor = setor_por_cnpj.get(cnpj)
+                if setor is None:
+                    continue # (Empresa não ativa no cadastro)
+                assinatura = impressoes[cnpj]
+
+                anterior = anteriores.pop(cnpj, None)
+                if anterior is not None and anterior['ASSINATURA'] == assinatura:
+                    if anterior['SETOR_ATIV'] != setor:
+                        setores_alterados.update((setor, anterior['SETOR_ATIV']))
+                    linhas.append({**anterior, 'CNPJ_CIA': cnpj, 'SETOR_ATIV': setor})
+                    reaproveitadas += 1
+                    continue
+
+                contas, indicadores = self.calculadora.calcular_contas_e_indicadores(cnpj, ano, self.tipo_doc)
+                if anterior is not None:
+                    setores_alterados.add(anterior['SETOR_ATIV'])
+                if contas is None:
+                    linhas.append({'CNPJ_CIA': cnpj, 'SETOR_ATIV': setor, 'ASSINATURA': assinatura,
+                                   'ATIVO_TOTAL': np.nan, 'CONTAS_DERIVADAS': ''})
+                    sem_contas += 1
+                    continue
+                setores_alterados.add(setor)
+                linhas.append({'CNPJ_CIA': cnpj, 'SETOR_ATIV': setor, 'ASSINATURA': assinatura,
+                               'ATIVO_TOTAL': contas['ativo_total'],
+                               'CONTAS_DERIVADAS': ','.join(self.calculadora.contas_derivadas(cnpj, ano, self.tipo_doc)), **indicadores})
+        print(diagnosticos.resumo())
+
+        # Empresas que saíram (ex: deixaram de estar ativas)
+        setores_alterados.update(anterior['SETOR_ATIV'] for anterior in anteriores.values())
+        df_empresas = pd.DataFrame(linhas, columns=self.COLUNAS_EMPRESA + nomes_indicadores)
+
+        # Validação de todas as empresas de uma vez: as inválidas ficam
+        # registadas, mas com indicadores 'nan' (fora dos agregados)
+        validador = self.analisador.validador
+        codigos = validador.validar_matriz(df_empresas[nomes_indicadores].to_numpy(dtype=np.float64), nomes_indicadores)
+        df_empresas.loc[codigos != validador.OK, nomes_indicadores] = np.nan
+        invalidas = (codigos != validador.OK) & df_empresas['ATIVO_TOTAL'].notna().to_numpy()
+        excluidas = pd.Series(codigos[invalidas]).value_counts().to_dict()
+        print(f"INFO: Agregados {ano}: {len(linhas)} empresas ({reaproveitadas} sem alterações, {sem_contas} sem contas; "
+              f"excluídas: {excluidas or 'nenhuma'}).")
+        return df_empresas, setores_alterados
+
+    def _agregar(self, df_empresas):
+        """
+        (SETOR_ATIV, indicador) -> contagem, media, p10, p25, mediana, p75, p90.
+        """
+        nomes_indicadores = [c for c in df_empresas.columns if c not in self.COLUNAS_EMPRESA]
+        # (As empresas sem contas não contam: um setor só com elas fica de fora)
+        grupos = df_empresas[df_empresas['ATIVO_TOTAL'].notna()].groupby('SETOR_ATIV')[nomes_indicadores]
+        df_agregados = pd.concat({
+            'contagem': grupos.count().stack(),
+            'media': grupos.mean().stack(),
+            **{nome: grupos.quantile(q).stack() for nome, q in self.QUANTIS.items()}
+        }, axis=1)
+        df_agregados.index.names = ['SETOR_ATIV', 'indicador']
+        df_agregados['contagem'] = df_agregados['contagem'].astype(int)
+        return df_agregados
+
+    def _ler_do_disco(self, ano):
+        """
+        (df_empresas, df_agregados) guardados do ano. df_empresas é None
+        se não existir (ou o esquema mudou); df_agregados é None se não
+        existir ou estiver desatualizado face ao ZIP. (Sem o ZIP em disco,
+        ex: despejado do cache, a tabela guardada continua a valer.)
+        """
+        caminho_empresas, caminho_agregados = self._caminhos(ano)
+        caminho_zip = self.calculadora.coletor.caminho_zip(ano, self.tipo_doc)
+        nomes_indicadores = self.calculadora.registro.nomes()
+
+        df_empresas = None
+        if os.path.exists(caminho_empresas):
+            df_empresas = pd.read_csv(caminho_empresas, sep=';', dtype={'CNPJ_CIA': str, 'ASSINATURA': str, 'CONTAS_DERIVADAS': str})
+            if not set(self.COLUNAS_EMPRESA + nomes_indicadores).issubset(df_empresas.columns):
+                df_empresas = None # (Registro de indicadores ou esquema mudou: reconstruir tudo)
+
+        atualizado = (
+            df_empresas is not None and os.path.exists(caminho_agregados)
+            and (not os.path.exists(caminho_zip) or os.path.getmtime(caminho_agregados) >= os.path.getmtime(caminho_zip))
+        )
+        if not atualizado:
+            return df_empresas, None
+        return df_empresas, pd.read_csv(caminho_agregados, sep=';', index_col=['SETOR_ATIV', 'indicador'])
+
+    def _lock_ano(self, ano):
+        with self._lock_global:
+            return self._locks.setdefault(ano, threading.Lock())
+
+    def obter_tabela(self, ano):
+        """
+        (Ingestão) Devolve o DataFrame de agregados do ano (memória ->
+        disco -> construção/atualização incremental), ou None se
+        indisponível. Pode extrair o ano inteiro: nas consultas, usar
+        consultar_tabela.
+        """
+        if ano in self._tabelas:
+            return self._tabelas[ano][1]
+
+        with self._lock_ano(ano):
+            if ano in self._tabelas:
+                return self._tabelas[ano][1]
+
+            try:
+                df_empresas, df_agregados = self._ler_do_disco(ano)
+                if df_agregados is None:
+                    print(f"INFO: Construindo agregados setoriais para {self.tipo_doc} {ano}...")
+                    df_anterior = df_empresas
+                    df_empresas, setores_alterados = self._calcular_empresas(ano, df_anterior)
+                    if df_empresas is None:
+                        return None
+                    df_agregados = self._agregar(df_empresas)
+                    caminho_empresas, caminho_agregados = self._caminhos(ano)
+                    df_empresas.to_csv(caminho_empresas, sep=';', index=False)
+                    df_agregados.to_csv(caminho_agregados, sep=';')
+                    if df_anterior is not None:
+                        print(f"INFO: Setores reagregados em {ano}: {sorted(setores_alterados) or 'nenhum'}.")
+            except Exception as e:
+                print(f"ERRO ao construir os agregados setoriais de {ano}: {e}")
+                return None
+
+            self._tabelas[ano] = (df_empresas, df_agregados)
+            return df_agregados
+
+    def consultar_tabela(self, ano):
+        """
+        O DataFrame de agregados do ano, só se já estiver em memória ou
+        no disco (e atualizado); None caso contrário. Nunca constrói nem
+        lê o ZIP (a construção é da ingestão: aquecer.py / AquecedorDados),
+        nem espera por uma construção em curso.
+        """
+        if ano in self._tabelas:
+            return self._tabelas[ano][1]
+
+        lock = self._lock_ano(ano)
+        if not lock.acquire(blocking=False):
+            return None # (Em construção: a tabela ainda não está pronta)
+        try:
+            if ano not in self._tabelas:
+                try:
+                    df_empresas, df_agregados = self._ler_do_disco(ano)
+                except Exception as e:
+                    print(f"ERRO ao ler os agregados setoriais de {ano}: {e}")
+                    return None
+                if df_agregados is None:
+                    return None
+                self._tabelas[ano] = (df_empresas, df_agregados)
+            return self._tabelas[ano][1]
+        finally:
+            lock.release()
+
+    def tabela_empresas(self, ano):
+        """
+        A tabela por empresa do ano (CNPJ, setor, ativo total, indicadores;
+        'nan' nas empresas que falharam a validação), ou None.
+        """
+        if self.obter_tabela(ano) is None:
+            return None
+        return self._tabelas[ano][0]
+
+    def invalidar(self, ano):
+        """
+        Esquece a tabela em memória (a próxima consulta revalida com o ZIP).
+        """
+        with self._lock_global:
+            self._tabelas.pop(ano, None)
+
+    # --- CONSULTAS (nunca constroem os agregados: ver consultar_tabela) ---
+
+    def estatisticas(self, setor, ano):
+        """
+        DataFrame indicador x (contagem, media, p10, p25, mediana, p75, p90)
+        do setor, ou None (também se os agregados do ano ainda não existem).
+        """
+        df_agregados = self.consultar_tabela(ano)
+        if df_agregados is None or setor not in df_agregados.index.get_level_values('SETOR_ATIV'):
+            return None
+        return df_agregados.loc[setor]
+
+    def linha_media(self, setor, ano, estatistica='media'):
+        """
+        A média (ou 'mediana', 'p25', ...) do setor como LinhaIndicadores,
+        para ser usada no lugar de resultado.media_setor().
+        """
+        df_setor = self.estatisticas(setor, ano)
+        if df_setor is None:
+            return None
+        nomes = self.calculadora.registro.nomes()
+        valores = df_setor[estatistica].reindex(nomes).to_numpy(dtype=np.float64)
+        return LinhaIndicadores(f"Setor: {setor}", valores, {nome: i for i, nome in enumerate(nomes)})
@@ -1,7 +1,8 @@
-import pandas as pd
+from ._dependencias import pd
 import os
 import sys
-import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+from .diagnosticos import Diagnosticos, registar_diagnostico
 
 class GeradorAlertas:
     
@@ -9,34 +10,31 @@ class GeradorAlertas:
         print("GeradorAlertas iniciado.")
 
     # --- MÉTODO ATUALIZADO ---
-    def gerar_alertas_setor(self, ticker_alvo, df_comparativo):
+    def gerar_alertas_setor(self, ticker_alvo, resultado, media_setor=None):
         """
-        Lê um DataFrame comparativo (em memória) e gera alertas.
+        Lê o resultado da análise de pares (em memória) e gera alertas.
         Não lê mais arquivos CSV.
         
         Args:
             ticker_alvo (str): O ticker da empresa alvo (ex: "PETR4").
-            df_comparativo (pd.DataFrame): O DF com as colunas "Empresa Alvo" e "Média do Setor".
+            resultado (ResultadoIndicadores): O contentor devolvido por analisar_pares.
+            media_setor (LinhaIndicadores, opcional): Referência a usar no lugar da
+                média dos pares (ex: AgregadosSetoriais.linha_media, o setor CVM inteiro).
         """
         
-        print(f"\n--- Gerando Alertas para Ticker: {ticker_alvo} ---")
-        
-        # 2. Ler o DataFrame (já está na memória)
-        try:
-            coluna_alvo = f"Empresa Alvo ({ticker_alvo.upper()})"
-            coluna_media = "Média do Setor" 
-            
-            empresa_alvo = df_comparativo[coluna_alvo]
-            media_setor = df_comparativo[coluna_media]
-        except KeyError as e:
-            print(f"ERRO: O DataFrame comparativo não contém a coluna esperada: {e}.")
+        # 2. Ler as linhas (vistas sobre o contentor, sem DataFrames)
+        if ticker_alvo.upper() not in resultado:
+            registar_diagnostico(Diagnosticos.ERRO, 'ALVO_AUSENTE', f"ERRO: O resultado não contém a empresa alvo: {ticker_alvo.upper()}.",
+                                 empresa=ticker_alvo.upper(), etapa='alertas')
             return None
+        empresa_alvo = resultado.linha(ticker_alvo.upper())
+        if media_setor is None:
+            media_setor = resultado.media_setor()
             
         # 3. Aplicar as Regras de Negócio
-        print("Analisando regras...")
         alertas = [] 
 
-        # Usamos os nomes de índice do DataFrame (que vêm do calculo_indicadores.py)
+        # Usamos os nomes dos indicadores (que vêm do registro_indicadores.py)
         if empresa_alvo['liq_corrente'] < 1.0:
             alertas.append(f"[RED FLAG] Liquidez Corrente ({empresa_alvo['liq_corrente']:.2f}) está abaixo de 1.0. Indica potencial risco de curto prazo.")
         else:
@@ -61,12 +59,12 @@ class GeradorAlertas:
         else:
             alertas.append(f"[GREEN FLAG] Rentabilidade (ROE) ({empresa_alvo['roe']:.2%}) está acima da média do setor ({media_setor['roe']:.2%}).")
 
-        # 4. Imprimir os alertas
-        print("\n--- Conclusões da Análise (Sinais de Alerta) ---")
-        if not alertas:
-            print("Nenhum alerta gerado.")
-        else:
-            for alerta in alertas:
-                print(f"- {alerta}")
+        # 4. Registar os alertas (a lista volta para quem pediu; no registo, um resumo)
+        for alerta in alertas:
+            registar_diagnostico(Diagnosticos.DEBUG, 'ALERTA', f"- {alerta}", empresa=ticker_alvo.upper(), etapa='alertas')
+        num_red_flags = sum("[RED FLAG]" in alerta for alerta in alertas)
+        registar_diagnostico(Diagnosticos.INFO, 'ALERTAS',
+                             f"Alertas para {ticker_alvo.upper()}: {num_red_flags} red flags, {len(alertas) - num_red_flags} green flags.",
+                             empresa=ticker_alvo.upper(), etapa='alertas')
                 
         return alertas
\ No newline at end of file
@@ -1,121 +1,157 @@
-import pandas as pd
-import sys
+from ._dependencias import pd
 import pprint
 import os 
-import numpy as np
-import config 
+from ._dependencias import np
+from . import config 
 
-try:
-    # Ele ainda precisa das definições das classes
-    from calculo_indicadores import CalculadoraIndicadores
-    from gestor_cadastro import GestorCadastro
-except ImportError:
-    print("ERRO: Não foi possível encontrar as classes 'CalculadoraIndicadores' ou 'GestorCadastro'.")
-    sys.exit(1)
+# (Ele ainda precisa das definições das classes)
+from .calculo_indicadores import CalculadoraIndicadores
+from .gestor_cadastro import GestorCadastro
+from .resultado_indicadores import ResultadoIndicadores
+from .agregados_setoriais import AgregadosSetoriais
+from .pares_automaticos import BuscadorPares
+from .validacao_indicadores import ValidadorIndicadores
+from .diagnosticos import Diagnosticos, coletar_diagnosticos, registar_diagnostico
 
 
 class AnalisadorSetorial:
     
     # --- __INIT__ ATUALIZADO (Injeção de Dependência) ---
-    def __init__(self, calculadora: CalculadoraIndicadores, gestor: GestorCadastro):
+    def __init__(self, calculadora: CalculadoraIndicadores, gestor: GestorCadastro, buscador_pares: BuscadorPares = None):
         """
         Construtor. Recebe as instâncias das "fábricas"
         de que precisa (injeção de dependência).
+        O buscador_pares (pares "auto") é opcional: se faltar, é
+        criado na primeira análise com pares automáticos.
         """
         self.calculadora = calculadora # Recebe a calculadora
         self.gestor = gestor       # Recebe o gestor
+        self.buscador_pares = buscador_pares
+        # Validação vetorizada (a MESMA nos pares, agregados e cobertura)
+        self.validador = ValidadorIndicadores(calculadora.registro)
         print(f"AnalisadorSetorial iniciado.")
     # --- FIM DA ATUALIZAÇÃO ---
         
-    def _validar_indicadores(self, indicadores, ticker):
+    @staticmethod
+    def pares_automaticos_pedidos(lista_pares):
         """
-        Verifica se os indicadores calculados são 'nan' (inválidos)
-        ou se estão fora de um range aceitável (outliers).
-        (Esta função está correta)
+        True se a lista de pares é "auto" (texto ou lista ['AUTO']).
         """
-        for nome, valor in indicadores.items():
-            if np.isnan(valor):
-                raise ValueError(f"Indicador '{nome}' é 'nan' (divisão por zero?).")
-        if indicadores['liq_corrente'] < 0:
-            raise ValueError(f"Indicador 'liq_corrente' é negativo ({indicadores['liq_corrente']:.2f}).")
-        if abs(indicadores['roe']) > 5.0: 
-            raise ValueError(f"Indicador 'roe' é extremo ({indicadores['roe']:.2%}).")
-        if indicadores['endividamento_geral'] > 10.0:
-            raise ValueError(f"Indicador 'endividamento_geral' é extremo ({indicadores['endividamento_geral']:.2%}).")
-        return True
-        
+        if isinstance(lista_pares, str):
+            return lista_pares.strip().upper() == 'AUTO'
+        return [p.strip().upper() for p in lista_pares] == ['AUTO']
+
+    def _escolher_pares_automaticos(self, ticker_alvo, ano):
+        """
+        Os pares mais parecidos com a empresa alvo (BuscadorPares), ou None.
+        """
+        if self.buscador_pares is None:
+            self.buscador_pares = BuscadorPares(AgregadosSetoriais(self), self.gestor)
+        cnpj_alvo = self.gestor.encontrar_cnpj_por_ticker(ticker_alvo)
+        if not cnpj_alvo:
+            return None
+        pares = self.buscador_pares.encontrar_pares(cnpj_alvo, ano)
+        if not pares:
+            registar_diagnostico(Diagnosticos.ERRO, 'SEM_PARES_AUTOMATICOS',
+                                 f"ERRO: Não foi possível escolher pares automáticos para {ticker_alvo} em {ano}.",
+                                 empresa=ticker_alvo.upper(), etapa='pares', ano=ano)
+            return None
+        registar_diagnostico(Diagnosticos.INFO, 'PARES_AUTOMATICOS',
+                             f"Pares automáticos (mais parecidos): {[(ticker, round(distancia, 2)) for ticker, _, distancia in pares]}",
+                             etapa='pares', ano=ano)
+        return [ticker for ticker, _, _ in pares]
+
     def analisar_pares(self, ticker_alvo, lista_pares, ano):
         """
         Executa a análise de pares completa.
-        (Esta função está correta e não muda)
+        lista_pares pode ser "auto": os pares são escolhidos por semelhança.
+        Retorna um ResultadoIndicadores (colunar) ou None se falhar.
+
+        Os diagnósticos da análise (ex: pares excluídos e porquê) voltam
+        em resultado.diagnosticos; no terminal, só os erros e um resumo.
         """
+        with coletar_diagnosticos(f"pares {ticker_alvo.upper()} {ano}") as diagnosticos:
+            resultado = self._analisar_pares(ticker_alvo, lista_pares, ano)
+        print(diagnosticos.resumo())
+        if resultado is not None:
+            resultado.diagnosticos = diagnosticos
+        return resultado
+
+    def _fase(self, mensagem, ano):
+        registar_diagnostico(Diagnosticos.DEBUG, 'FASE', mensagem, etapa='pares', ano=ano)
+
+    def _analisar_pares(self, ticker_alvo, lista_pares, ano):
+        self._fase(f"--- Iniciando Análise de Pares para Ticker: {ticker_alvo} | Ano: {ano} ---", ano)
         
-        print(f"\n--- Iniciando Análise de Pares para Ticker: {ticker_alvo} | Ano: {ano} ---")
-        
-        print(f"[Fase 1/4] Identificando empresas...")
+        self._fase(f"[Fase 1/4] Identificando empresas...", ano)
+        if self.pares_automaticos_pedidos(lista_pares):
+            lista_pares = self._escolher_pares_automaticos(ticker_alvo, ano)
+            if lista_pares is None:
+                return None
         ticker_alvo_upper = ticker_alvo.upper()
         lista_pares_upper = [p.upper() for p in lista_pares]
         tickers_para_analisar = sorted(list(set([ticker_alvo_upper] + lista_pares_upper))) 
-        print(f"Empresa Alvo: {ticker_alvo_upper}")
-        print(f"Pares Relevantes: {lista_pares_upper}")
+        self._fase(f"Empresa Alvo: {ticker_alvo_upper} | Pares Relevantes: {lista_pares_upper}", ano)
 
-        print(f"[Fase 2/4] Traduzindo Tickers para CNPJs...")
+        self._fase(f"[Fase 2/4] Traduzindo Tickers para CNPJs...", ano)
         empresas_para_analisar = {} 
         cnpj_alvo = None
         for ticker in tickers_para_analisar:
             cnpj = self.gestor.encontrar_cnpj_por_ticker(ticker)
             if not cnpj:
-                print(f"AVISO: Ticker {ticker} não encontrado no 'mapa_ticker_cnpj.csv'. Será ignorado.")
+                registar_diagnostico(Diagnosticos.AVISO, 'TICKER_DESCONHECIDO',
+                                     f"AVISO: Ticker {ticker} não encontrado no 'mapa_ticker_cnpj.csv'. Será ignorado.",
+                                     empresa=ticker, etapa='pares', ano=ano)
                 continue
             if ticker == ticker_alvo_upper:
                 cnpj_alvo = cnpj
             empresas_para_analisar[ticker] = cnpj
         if not cnpj_alvo:
-            print(f"ERRO: O CNPJ da empresa alvo ({ticker_alvo}) não foi encontrado.")
-            return None, None, None
-        print(f"Total de {len(empresas_para_analisar)} CNPJs encontrados para calcular.")
+            registar_diagnostico(Diagnosticos.ERRO, 'TICKER_DESCONHECIDO', f"ERRO: O CNPJ da empresa alvo ({ticker_alvo}) não foi encontrado.",
+                                 empresa=ticker_alvo_upper, etapa='pares', ano=ano)
+            return None
+        self._fase(f"Total de {len(empresas_para_analisar)} CNPJs encontrados para calcular.", ano)
 
-        print(f"[Fase 3/4] Calculando e validando indicadores...")
-        resultados_setor = [] 
-        dados_alvo_brutos = None 
+        self._fase(f"[Fase 3/4] Calculando e validando indicadores...", ano)
+        # Contentor colunar (esquema fixo = indicadores do registro)
+        candidatos = ResultadoIndicadores(
+            self.calculadora.registro.nomes(),
+            capacidade=len(empresas_para_analisar),
+            empresa_alvo=ticker_alvo_upper
+        )
         
         for ticker, cnpj in empresas_para_analisar.items():
             indicadores = self.calculadora.calcular_indicadores_empresa(cnpj, ano)
             
             if indicadores is None:
+                # (O motivo vem da calculadora, também quando o resultado veio do cache)
+                codigo, motivo = self.calculadora.motivo_falha(cnpj, ano) or ('SEM_INDICADORES', "Indicadores indisponíveis.")
+                registar_diagnostico(Diagnosticos.AVISO, codigo, f"AVISO: Empresa {ticker} ignorada. Motivo: {motivo}",
+                                     empresa=ticker, etapa='pares', ano=ano)
                 continue 
-            
-            try:
-                self._validar_indicadores(indicadores, ticker)
-                indicadores['empresa'] = ticker
-                resultados_setor.append(indicadores)
-                if ticker == ticker_alvo_upper:
-                    dados_alvo_brutos = indicadores
-            except ValueError as e:
-                print(f"AVISO (Indicador Inválido): Empresa {ticker} ignorada. Motivo: {e}")
+            candidatos.adicionar(ticker, indicadores)
 
-        if not resultados_setor:
-            print(f"ERRO: Não foi possível calcular ou validar indicadores para nenhuma empresa.")
-            return None, None, None
-        if dados_alvo_brutos is None:
-            print(f"ERRO: A empresa alvo ({ticker_alvo_upper}) foi filtrada ou falhou nos cálculos.")
-            return None, None, None
+        # Validação de TODAS as empresas de uma vez (máscaras, sem exceções)
+        codigos = self.validador.validar_matriz(candidatos.matriz(), candidatos.indicadores)
+        df_exclusoes = self.validador.tabela_exclusoes(candidatos.empresas, candidatos.matriz(), candidatos.indicadores, codigos)
+        for linha in df_exclusoes.itertuples(index=False):
+            registar_diagnostico(Diagnosticos.AVISO, linha.motivo,
+                                 f"AVISO (Indicador Inválido): Empresa {linha.empresa} ignorada. Motivo: {linha.detalhe}",
+                                 empresa=linha.empresa, etapa='pares', ano=ano)
+        resultado = candidatos.filtrar(codigos == self.validador.OK)
 
-        print(f"[Fase 4/4] Processando relatórios...")
-        df_completo = pd.DataFrame(resultados_setor)
-        df_completo = df_completo.set_index('empresa')
+        if len(resultado) == 0:
+            registar_diagnostico(Diagnosticos.ERRO, 'SEM_EMPRESAS_VALIDAS',
+                                 f"ERRO: Não foi possível calcular ou validar indicadores para nenhuma empresa.", etapa='pares', ano=ano)
+            return None
+        if ticker_alvo_upper not in resultado:
+            registar_diagnostico(Diagnosticos.ERRO, 'ALVO_EXCLUIDO',
+                                 f"ERRO: A empresa alvo ({ticker_alvo_upper}) foi filtrada ou falhou nos cálculos.",
+                                 empresa=ticker_alvo_upper, etapa='pares', ano=ano)
+            return None
 
-        dados_alvo_df = df_completo.loc[ticker_alvo_upper]
-        media_setor = df_completo.mean(numeric_only=True)
-
-        print("\n--- Análise de Pares Concluída ---")
-        df_completo_t = df_completo.T
-        
-        df_comparativo = pd.DataFrame({
-            f"Empresa Alvo ({ticker_alvo_upper})": dados_alvo_df, 
-            "Média do Setor": media_setor
-        })
-        
-        print("Análise setorial concluída. Retornando DataFrames para o main.py.")
+        self._fase(f"[Fase 4/4] Análise de pares concluída: {len(resultado)} empresas.", ano)
         
-        return df_completo_t, df_comparativo, dados_alvo_brutos
\ No newline at end of file
+        # (Os DataFrames só são criados na apresentação:
+        # resultado.df_completo_t() e resultado.df_comparativo())
+        return resultado.finalizar()
\ No newline at end of file
@@ -0,0 +1,186 @@
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+
+
+class AquecedorDados:
+    """
+    Aquecimento ("warm-up") dos dados antes do primeiro pedido:
+
+    1. Carrega o mapa Ticker <-> CNPJ e o cadastro CVM (GestorCadastro).
+    2. Para cada ano recente (config.NUM_ANOS_AQUECIMENTO), baixa o ZIP
+       da DFP, constrói o Índice de Presença e faz o parse dos
+       demonstrativos para o cache "quente" da Calculadora.
+    3. (Opcional) Constrói/atualiza o Índice de Cobertura do ano.
+    4. (Opcional) Constrói/atualiza os Agregados Setoriais do ano (e
+       esquece o índice dos pares automáticos do ano, que é feito deles).
+
+    Com um PipelineIngestao, o passo 2 de todos os anos corre em
+    pipeline (o ano seguinte é baixado enquanto o atual é lido) e os
+    passos 3 e 4 de cada ano começam assim que o ano fica pronto.
+
+    Pode correr de forma síncrona (executar), numa thread em segundo
+    plano (iniciar_em_segundo_plano) e, opcionalmente, a cada
+    config.INTERVALO_AQUECIMENTO_SEGUNDOS, perguntar à CVM (GET
+    condicional) se o ZIP de algum ano mudou e reaquecer só esses anos.
+    O estado ("prontidão") pode ser consultado a qualquer momento, para
+    o dashboard mostrar "dados a aquecer" em vez de bloquear.
+    """
+
+    # Estados possíveis de cada etapa
+    PENDENTE = 'pendente'
+    EM_CURSO = 'em curso'
+    PRONTO = 'pronto'
+    FALHOU = 'falhou'
+
+    def __init__(self, calculadora, gestor, anos=None, tipo_doc="DFP", agregados=None, cobertura=None, pipeline=None,
+                 buscador_pares=None):
+        self.calculadora = calculadora
+        self.gestor = gestor
+        # (Opcional) AgregadosSetoriais: também construídos na ingestão
+        self.agregados = agregados
+        # (Opcional) BuscadorPares: o seu índice do ano é refeito dos agregados novos
+        self.buscador_pares = buscador_pares
+        # (Opcional) IndiceCobertura: quem tem dados utilizáveis em cada ano
+        self.cobertura = cobertura
+        # (Opcional) PipelineIngestao: download/descompressão/parse em paralelo
+        self.pipeline = pipeline
+        self.tipo_doc = tipo_doc
+        self.anos = list(anos) if anos else self.anos_recentes()
+        self.intervalo_segundos = config.INTERVALO_AQUECIMENTO_SEGUNDOS
+
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        self._estado = {'cadastro': self.PENDENTE, **{ano: self.PENDENTE for ano in self.anos}}
+        self._ultima_execucao = None
+        self._duracao = None
+
+    @staticmethod
+    def anos_recentes():
+        """
+        Os últimos anos "fechados" (a DFP do ano corrente ainda não existe).
+        """
+        ano_atual = datetime.now().year
+        return [ano_atual - i for i in range(1, config.NUM_ANOS_AQUECIMENTO + 1)]
+
+    def _marcar(self, etapa, estado):
+        with self._lock:
+            self._estado[etapa] = estado
+
+    # --- AQUECIMENTO ---
+
+    def _aquecer_cadastro(self):
+        self._marcar('cadastro', self.EM_CURSO)
+        ok = self.gestor._carregar_mapa_ticker() and self.gestor._carregar_cadastro_cvm()
+        self._marcar('cadastro', self.PRONTO if ok else self.FALHOU)
+
+    def _aquecer_ano(self, ano):
+        self._marcar(ano, self.EM_CURSO)
+        try:
+            ok = self.calculadora.pre_carregar_ano(ano, self.tipo_doc)
+            if ok and self.cobertura is not None:
+                self.cobertura.invalidar(ano) # (Revalida com o ZIP)
+                ok = self.cobertura.construir(ano)
+            if ok and self.agregados is not None:
+                self.agregados.invalidar(ano) # (Revalida com o ZIP, atualizando se mudou)
+                if self.buscador_pares is not None:
+                    self.buscador_pares.invalidar(ano)
+                ok = self.agregados.obter_tabela(ano) is not None
+        except Exception as e:
+            print(f"ERRO no aquecimento do ano {ano}: {e}")
+            ok = False
+        self._marcar(ano, self.PRONTO if ok else self.FALHOU)
+
+    def executar(self, anos=None):
+        """
+        Executa UMA ronda de aquecimento (síncrona) dos anos pedidos
+        (por padrão, todos). Retorna True se tudo ficou pronto.
+        """
+        anos = self.anos if anos is None else anos
+        inicio = time.perf_counter()
+        print(f"Aquecimento iniciado (anos: {anos})...")
+        self._aquecer_cadastro()
+        # (Com o pipeline, cada ano chega aqui já baixado e lido: o
+        # pre_carregar_ano só encontra os caches prontos)
+        anos_prontos = self.pipeline.iterar(anos) if self.pipeline is not None else ((ano, None) for ano in anos)
+        with closing(anos_prontos):
+            for ano, _ in anos_prontos:
+                if self._parar.is_set():
+                    break
+                self._aquecer_ano(ano)
+
+        with self._lock:
+            self._ultima_execucao = datetime.now()
+            self._duracao = time.perf_counter() - inicio
+        print(f"Aquecimento concluído em {self._duracao:.1f}s: {self.estado()['etapas']}")
+        return self.pronto()
+
+    def _atualizar_zips(self):
+        """
+        GET condicional à CVM por cada ano: se o ZIP mudou (entregas ou
+        reapresentações novas), é baixado de novo e o ano sai da memória
+        da Calculadora. (A cobertura e os agregados revalidam-se pelo
+        mtime do ZIP ao reaquecer.) Retorna os anos cujo ZIP mudou.
+        """
+        anos_alterados = []
+        for ano in self.anos:
+            if self._parar.is_set():
+                break
+            _, mudou = self.calculadora.coletor.atualizar_demonstrativos(ano, self.tipo_doc)
+            if mudou:
+                self.calculadora.descartar_ano(ano, self.tipo_doc)
+                anos_alterados.append(ano)
+        print(f"Verificação de atualizações na CVM: ZIPs alterados: {anos_alterados or 'nenhum'}.")
+        return anos_alterados
+
+    def _ciclo(self):
+        self.executar()
+        # Reaquecimento periódico: só os anos cujo ZIP a CVM atualizou
+        while self.intervalo_segundos and not self._parar.wait(self.intervalo_segundos):
+            anos_alterados = self._atualizar_zips()
+            if anos_alterados:
+                self.executar(anos_alterados)
+
+    def iniciar_em_segundo_plano(self):
+        """
+        Corre o aquecimento numa thread "daemon" (não bloqueia quem chama).
+        Chamadas repetidas não criam threads novas.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._parar.clear()
+                self._thread = threading.Thread(target=self._ciclo, name="aquecimento", daemon=True)
+                self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+
+    # --- PRONTIDÃO ---
+
+    def pronto(self):
+        with self._lock:
+            return all(estado == self.PRONTO for estado in self._estado.values())
+
+    def em_curso(self):
+        with self._lock:
+            return any(estado in (self.PENDENTE, self.EM_CURSO) for estado in self._estado.values())
+
+    def estado(self):
+        """
+        Resumo para o dashboard/terminal:
+        {'pronto': bool, 'em_curso': bool, 'etapas': {...}, 'ultima_execucao': ..., 'duracao_s': ...}
+        """
+        with self._lock:
+            etapas = {str(etapa): estado for etapa, estado in self._estado.items()}
+            ultima_execucao, duracao = self._ultima_execucao, self._duracao
+        return {
+            'pronto': all(estado == self.PRONTO for estado in etapas.values()),
+            'em_curso': any(estado in (self.PENDENTE, self.EM_CURSO) for estado in etapas.values()),
+            'etapas': etapas,
+            'ultima_execucao': ultima_execucao,
+            'duracao_s': duracao
+        }
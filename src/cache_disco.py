@@ -0,0 +1,170 @@
+import os
+import time
+import threading
+import weakref
+from contextlib import contextmanager
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+
+
+class GestorCacheDisco:
+    """
+    Limita o espaço ocupado por data/raw/ (ZIPs da CVM, cadastro e
+    artefactos derivados), para caber na quota de disco da nuvem.
+
+    - Tamanho e último acesso vêm do próprio sistema de arquivos: cada
+      uso regista o acesso no 'atime' do arquivo (sem mexer no 'mtime',
+      que os índices derivados usam para se validar).
+    - Quando o total passa de config.LIMITE_CACHE_DISCO_BYTES, apaga os
+      arquivos menos usados (LRU), por categoria: primeiro os ZIPs brutos
+      (grandes, podem ser baixados de novo), depois o cadastro e, só no
+      fim, os derivados (pequenos e caros de reconstruir).
+    - Arquivos "em uso" (em_uso / proteger) nunca são apagados.
+    - Antes de apagar um ZIP, fecha-o nos GerenciadorZip registados
+      (registar_gerenciador_zip): um arquivo apagado mas ainda aberto
+      (mmap) não liberta espaço nenhum até ser fechado.
+    """
+
+    # Ordem de despejo: categorias com número menor saem primeiro
+    PRIORIDADE_DESPEJO = {'zip_bruto': 0, 'cadastro': 1, 'derivado': 2}
+
+    def __init__(self, limite_bytes=None, diretorio_raiz=None):
+        self.limite_bytes = limite_bytes if limite_bytes is not None else config.LIMITE_CACHE_DISCO_BYTES
+        self.diretorio_raiz = os.path.normpath(diretorio_raiz or config.CAMINHO_DADOS_RAW)
+        self.diretorio_derivados = os.path.normpath(config.CAMINHO_DADOS_DERIVADOS)
+        self.diretorio_cadastro = os.path.normpath(config.CAMINHO_RAW_CADASTRO_CVM)
+
+        self._em_uso = {} # caminho -> contagem de utilizadores
+        self._gerenciadores_zip = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._despejos = 0
+        self._bytes_despejados = 0
+        print(f"GestorCacheDisco iniciado (limite: {self.limite_bytes / 1024 ** 2:.0f} MB em {self.diretorio_raiz}).")
+
+    # --- CONTABILIDADE ---
+
+    def _categoria(self, caminho):
+        if caminho.startswith(self.diretorio_derivados + os.sep):
+            return 'derivado'
+        if caminho.startswith(self.diretorio_cadastro + os.sep):
+            return 'cadastro'
+        return 'zip_bruto'
+
+    def _listar_arquivos(self):
+        """
+        [(caminho, categoria, tamanho, ultimo_acesso)] de tudo o que está em data/raw/.
+        """
+        arquivos = []
+        for pasta, _, nomes in os.walk(self.diretorio_raiz):
+            for nome in nomes:
+                caminho = os.path.normpath(os.path.join(pasta, nome))
+                try:
+                    estado = os.stat(caminho)
+                except OSError:
+                    continue # (Apagado entretanto)
+                ultimo_acesso = max(estado.st_atime, estado.st_mtime)
+                arquivos.append((caminho, self._categoria(caminho), estado.st_size, ultimo_acesso))
+        return arquivos
+
+    def registar_acesso(self, caminho):
+        """
+        Marca o arquivo como usado agora (atualiza só o 'atime').
+        """
+        try:
+            estado = os.stat(caminho)
+            os.utime(caminho, ns=(time.time_ns(), estado.st_mtime_ns))
+        except OSError:
+            pass
+
+    @contextmanager
+    def em_uso(self, caminho):
+        """
+        Protege o arquivo contra despejo enquanto o bloco 'with' corre.
+        """
+        caminho = os.path.normpath(caminho)
+        with self._lock:
+            self._em_uso[caminho] = self._em_uso.get(caminho, 0) + 1
+        try:
+            yield caminho
+        finally:
+            with self._lock:
+                self._em_uso[caminho] -= 1
+                if not self._em_uso[caminho]:
+                    del self._em_uso[caminho]
+            self.registar_acesso(caminho)
+
+    def registar_gerenciador_zip(self, gerenciador):
+        """
+        O GerenciadorZip passa a fechar os ZIPs que o cache apagar
+        (no Linux, o espaço de um arquivo apagado só é libertado quando
+        ninguém o tem aberto).
+        """
+        with self._lock:
+            self._gerenciadores_zip.add(gerenciador)
+
+    # --- DESPEJO ---
+
+    def impor_limite(self, proteger=()):
+        """
+        Apaga arquivos (LRU, por categoria) até o total caber no limite.
+        'proteger': caminhos extra a nunca apagar (ex: o ZIP acabado de baixar).
+        Retorna a lista de caminhos apagados.
+        """
+        protegidos = {os.path.normpath(caminho) for caminho in proteger}
+        with self._lock:
+            protegidos.update(self._em_uso)
+            arquivos = self._listar_arquivos()
+            total = sum(tamanho for _, _, tamanho, _ in arquivos)
+            if total <= self.limite_bytes:
+                return []
+
+            candidatos = sorted(
+                # (Downloads em curso, '.parcial', também nunca são apagados)
+                (a for a in arquivos if a[0] not in protegidos and not a[0].endswith('.parcial')),
+                key=lambda a: (self.PRIORIDADE_DESPEJO[a[1]], a[3])
+            )
+            apagados = []
+            for caminho, categoria, tamanho, _ in candidatos:
+                if total <= self.limite_bytes:
+                    break
+                if categoria == 'zip_bruto':
+                    # (Nunca está em uso aqui: o handle fecha logo)
+                    for gerenciador in list(self._gerenciadores_zip):
+                        gerenciador.fechar(caminho)
+                try:
+                    os.remove(caminho)
+                except OSError as e:
+                    print(f"AVISO: Não foi possível apagar {caminho} do cache: {e}")
+                    continue
+                total -= tamanho
+                apagados.append(caminho)
+                self._despejos += 1
+                self._bytes_despejados += tamanho
+                print(f"INFO: Cache em disco cheio. Apagado {caminho} ({categoria}, {tamanho / 1024 ** 2:.1f} MB).")
+
+        if total > self.limite_bytes:
+            print(f"AVISO: Cache em disco acima do limite ({total / 1024 ** 2:.1f} MB), só restam arquivos em uso.")
+        return apagados
+
+    # --- ESTATÍSTICAS ---
+
+    def estatisticas(self):
+        with self._lock:
+            arquivos = self._listar_arquivos()
+            em_uso = sorted(self._em_uso)
+            despejos, bytes_despejados = self._despejos, self._bytes_despejados
+
+        por_categoria = {categoria: {'arquivos': 0, 'bytes': 0} for categoria in self.PRIORIDADE_DESPEJO}
+        for _, categoria, tamanho, _ in arquivos:
+            por_categoria[categoria]['arquivos'] += 1
+            por_categoria[categoria]['bytes'] += tamanho
+        total = sum(c['bytes'] for c in por_categoria.values())
+        return {
+            'total_bytes': total,
+            'limite_bytes': self.limite_bytes,
+            'uso_percentual': total / self.limite_bytes if self.limite_bytes else float('nan'),
+            'num_arquivos': len(arquivos),
+            'por_categoria': por_categoria,
+            'em_uso': em_uso,
+            'despejos': despejos,
+            'bytes_despejados': bytes_despejados
+        }
@@ -1,10 +1,17 @@
-import pandas as pd
+from ._dependencias import pd
 import os
 import sys
-import config
-import numpy as np
-import zipfile 
-from coleta_dados import ColetorDadosCVM
+from . import config
+from ._dependencias import np
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from .coleta_dados import ColetorDadosCVM
+from .acesso_zip import GerenciadorZip
+from .indice_presenca import IndicePresenca
+from .diagnosticos import Diagnosticos, registar_diagnostico
+from .hierarquia_contas import HierarquiaContas
+from .registro_indicadores import RegistroIndicadores, criar_registro_padrao
 
 class CalculadoraIndicadores:
     """
@@ -12,12 +19,40 @@ class CalculadoraIndicadores:
     Lê dados de dentro do ZIP (para poupar espaço) e
     IGNORA MAIÚSCULAS/MINÚSCULAS nos nomes dos arquivos
     (para funcionar no Linux/Streamlit Cloud).
+    Os ZIPs ficam abertos (via GerenciadorZip) entre chamadas.
     """
     
-    def __init__(self, coletor: ColetorDadosCVM):
+    # Apenas estas colunas são lidas de cada CSV (poupa RAM e tempo)
+    COLUNAS_LIDAS = ['CNPJ_CIA', 'ORDEM_EXERC', 'ESCALA_MOEDA', 'CD_CONTA', 'VL_CONTA']
+    # Falhas que podem passar sozinhas (ex: erro de rede): não ficam em cache
+    FALHAS_TEMPORARIAS = ('ZIP_INDISPONIVEL',)
+    
+    def __init__(self, coletor: ColetorDadosCVM, registro: RegistroIndicadores = None):
         self.diretorio_dados_raw = config.CAMINHO_RAW_BALANCOS_CVM
         self.MAPA_CONTAS = config.MAPA_CONTAS_CVM
+        self.ARQUIVOS_DEMONSTRATIVOS = config.ARQUIVOS_DEMONSTRATIVOS_CVM
+        self.PROFUNDIDADE_HIERARQUIA = config.PROFUNDIDADE_HIERARQUIA_CONTAS
+        self.MAX_RESULTADOS_EM_CACHE = config.MAX_RESULTADOS_EM_CACHE
         self.coletor = coletor
+        # Registro "plugável" de indicadores (padrão: os do sistema)
+        self.registro = registro if registro is not None else criar_registro_padrao()
+        # Um ZIP aberto por ano, partilhado entre chamadas (e threads)
+        self.gerenciador_zip = GerenciadorZip()
+        if coletor.cache_disco is not None:
+            # (O cache em disco fecha os ZIPs abertos antes de os apagar)
+            coletor.cache_disco.registar_gerenciador_zip(self.gerenciador_zip)
+        # Quais CNPJs têm dados CON/IND em cada ano (evita o parse duplo)
+        self.indice_presenca = IndicePresenca()
+        
+        # Caches "quentes" (os demonstrativos: um por ano e versão do ZIP;
+        # os resultados: no máximo MAX_RESULTADOS_EM_CACHE empresas/ano, LRU)
+        self._cache_demonstrativos = {}          # (tipo_doc, ano, CON/IND, ...) -> {demonstrativo: df_ano}
+        self._cache_resultados = OrderedDict()   # (cnpj, ano, tipo_doc) -> (assinatura do ZIP, contas, indicadores)
+        self._contas_derivadas = OrderedDict()   # (cnpj, ano, tipo_doc) -> [contas somadas das filhas]
+        self._motivos_falha = OrderedDict()      # (cnpj, ano, tipo_doc) -> (código, mensagem) da última falha
+        self._locks_demonstrativos = {}
+        self._locks_resultados = {}              # (Só dos cálculos em curso)
+        self._lock_cache = threading.Lock()
         
         print(f"CalculadoraIndicadores iniciada (Modo Baixa Memória, Case-Insensitive).")
         
@@ -33,109 +68,306 @@ class CalculadoraIndicadores:
         except Exception as e:
             raise RuntimeError(f"Erro inesperado ao buscar conta {cd_conta}: {e}")
 
-    # --- NOVO MÉTODO HELPER (PARA IGNORAR O CASE) ---
-    def _encontrar_nome_arquivo_no_zip(self, zf, sufixo_arquivo_lower):
+    # --- MÉTODO _ler_dados_do_zip (ATUALIZADO) ---
+    @classmethod
+    def ler_csv_demonstrativo(cls, membro):
         """
-        Encontra um arquivo no ZIP ignorando o "case" (maiúsculas/minúsculas).
-        Ex: sufixo_arquivo_lower = 'dre_con_2024.csv'
-        Encontra: 'dfp_cia_aberta_DRE_CON_2024.CSV'
+        Lê UM arquivo de demonstrativo (membro do ZIP, ou os seus bytes
+        já descompactados), só com as colunas necessárias.
         """
-        nomes_no_zip = zf.namelist()
-        
-        for nome_real_no_zip in nomes_no_zip:
-            # Compara ambos os nomes em minúsculas
-            if nome_real_no_zip.lower().endswith(sufixo_arquivo_lower):
-                return nome_real_no_zip # Encontrou! Retorna o nome com o case correto
-        
-        # Se não encontrou
-        raise FileNotFoundError(f"Arquivo terminando em '{sufixo_arquivo_lower}' não encontrado no ZIP.")
-    # --- FIM DO NOVO MÉTODO ---
+        return pd.read_csv(
+            membro, sep=';', encoding='latin1',
+            usecols=cls.COLUNAS_LIDAS, dtype={'CNPJ_CIA': str, 'CD_CONTA': str}
+        )
+
+    @staticmethod
+    def filtrar_demonstrativo(df, hierarquia):
+        """
+        Filtra o exercício 'ÚLTIMO' e os CD_CONTA pedidos pelo registro
+        (e as suas filhas, para a HierarquiaContas), para TODAS as
+        empresas de uma vez.
+        """
+        # (A árvore é montada sobre os CD_CONTA únicos do arquivo, não por linha)
+        codigos = hierarquia.codigos_a_ler(df['CD_CONTA'].unique())
+        filtro = (df['ORDEM_EXERC'] == 'ÚLTIMO') & (df['CD_CONTA'].isin(codigos))
+        return df[filtro]
+
+    def _ler_demonstrativo(self, membro, hierarquia):
+        return self.filtrar_demonstrativo(self.ler_csv_demonstrativo(membro), hierarquia)
+
+    def montar_demonstrativo(self, partes, hierarquia):
+        """
+        Junta as partes lidas de um demonstrativo (ex: DFC_MD + DFC_MI),
+        calcula as contas-pai em falta (soma das filhas, todas as
+        empresas de uma vez) e indexa por CNPJ.
+        """
+        df_ano = pd.concat(partes) if partes else pd.DataFrame(columns=self.COLUNAS_LIDAS)
+        df_ano = hierarquia.completar(df_ano)
+        return df_ano.set_index('CNPJ_CIA', drop=False).sort_index()
+
+    def hierarquias_por_demonstrativo(self):
+        """
+        {demonstrativo: HierarquiaContas} com os CD_CONTA pedidos pelo registro.
+        """
+        return {
+            demonstrativo: HierarquiaContas(codigos, self.PROFUNDIDADE_HIERARQUIA)
+            for demonstrativo, codigos in self.registro.codigos_por_demonstrativo().items()
+        }
+
+    def _chave_demonstrativos(self, arquivo_zip, ano, tipo_doc, tipo_dados):
+        assinatura_codigos = frozenset(
+            (demonstrativo, cd_conta)
+            for demonstrativo, codigos in self.registro.codigos_por_demonstrativo().items()
+            for cd_conta in codigos
+        )
+        return (tipo_doc.upper(), ano, tipo_dados, arquivo_zip.assinatura, assinatura_codigos)
+
+    def _carregar_demonstrativos_ano(self, arquivo_zip, ano, tipo_doc, tipo_dados):
+        """
+        Cache "quente" dos demonstrativos de um ano (CON ou IND):
+        cada arquivo do ZIP é lido UMA vez por processo e fica em memória
+        (já filtrado, indexado por CNPJ). Os pedidos seguintes ao mesmo
+        ano só fazem um "slice" por CNPJ.
+        Retorna {demonstrativo: df_ano}.
+        """
+        chave = self._chave_demonstrativos(arquivo_zip, ano, tipo_doc, tipo_dados)
+        if chave in self._cache_demonstrativos:
+            return self._cache_demonstrativos[chave]
+
+        with self._lock_cache:
+            lock = self._locks_demonstrativos.setdefault(chave, threading.Lock())
+
+        with lock: # (Só uma thread faz o parse de cada ano)
+            if chave in self._cache_demonstrativos:
+                return self._cache_demonstrativos[chave]
+
+            sufixo_tipo = 'con' if tipo_dados == 'CONSOLIDADO' else 'ind'
+            demonstrativos_ano = {}
+            for demonstrativo, hierarquia in self.hierarquias_por_demonstrativo().items():
+                partes = []
+                for prefixo in self.ARQUIVOS_DEMONSTRATIVOS[demonstrativo]:
+                    # 1. Encontrar o membro (ignorando o case, com cache)
+                    try:
+                        membro = arquivo_zip.abrir(f"{prefixo}_{sufixo_tipo}_{ano}.csv")
+                    except FileNotFoundError:
+                        continue # (Ex: a DFC_MD pode não existir, mas a DFC_MI sim)
+                    # 2. Ler em streaming e filtrar (uma única passagem por arquivo)
+                    with membro:
+                        partes.append(self._ler_demonstrativo(membro, hierarquia))
+
+                # 3. Contas-pai em falta = soma das filhas (todas as empresas de uma vez)
+                demonstrativos_ano[demonstrativo] = self.montar_demonstrativo(partes, hierarquia)
+
+            with self._lock_cache:
+                self._esquecer_versoes_antigas(chave)
+                self._cache_demonstrativos[chave] = demonstrativos_ano
+            return demonstrativos_ano
+
+    def guardar_demonstrativos_ano(self, arquivo_zip, ano, tipo_doc, tipo_dados, demonstrativos_ano):
+        """
+        Põe no cache "quente" demonstrativos lidos FORA da Calculadora
+        (ex: pelo PipelineIngestao, em processos à parte). Os pedidos
+        seguintes ao ano já não leem o ZIP.
+        """
+        chave = self._chave_demonstrativos(arquivo_zip, ano, tipo_doc, tipo_dados)
+        with self._lock_cache:
+            self._esquecer_versoes_antigas(chave)
+            self._cache_demonstrativos.setdefault(chave, demonstrativos_ano)
+
+    def _esquecer_versoes_antigas(self, chave):
+        """
+        Tira do cache os demonstrativos do mesmo ano lidos de OUTRA versão
+        do ZIP (ex: baixado de novo com entregas novas). Chamar com o
+        _lock_cache.
+        """
+        for antiga in [c for c in self._cache_demonstrativos if c[:3] == chave[:3] and c != chave]:
+            del self._cache_demonstrativos[antiga]
+            self._locks_demonstrativos.pop(antiga, None)
+
+    def _protegido(self, caminho_zip):
+        """
+        Protege o ZIP contra o despejo do cache em disco durante o bloco 'with'.
+        """
+        cache_disco = self.coletor.cache_disco
+        return cache_disco.em_uso(caminho_zip) if cache_disco is not None else nullcontext()
+
+    def _reservar_zip(self, caminho_zip, ano):
+        try:
+            return self.gerenciador_zip.reservar(caminho_zip)
+        except Exception as e:
+            registar_diagnostico(Diagnosticos.ERRO, 'ZIP_INVALIDO', f"ERRO: Não foi possível abrir o arquivo ZIP: {e}", etapa='leitura', ano=ano)
+            return None
+
+    @contextmanager
+    def _usar_zip(self, caminho_zip, ano=None):
+        """
+        O ZIP (já no disco) aberto durante o bloco 'with' (None se não
+        abrir): nem o cache em disco o apaga, nem o GerenciadorZip o fecha.
+        """
+        with self._protegido(caminho_zip):
+            arquivo_zip = self._reservar_zip(caminho_zip, ano)
+            try:
+                yield arquivo_zip
+            finally:
+                if arquivo_zip is not None:
+                    self.gerenciador_zip.libertar(arquivo_zip)
+
+    @contextmanager
+    def _usar_zip_ano(self, ano, tipo_doc="DFP"):
+        """
+        Garante que o ZIP do ano existe (baixa se necessário) e devolve-o
+        aberto (via GerenciadorZip) durante o bloco 'with', como o
+        _usar_zip. None se falhar.
+        """
+        # (Protegido ANTES de existir: não é despejado entre o download e a abertura)
+        with self._protegido(self.coletor.caminho_zip(ano, tipo_doc)):
+            # (O caminho vem no retorno: o coletor é partilhado entre threads)
+            caminho_zip = self.coletor.baixar_demonstrativos(ano, tipo_doc)
+            if not caminho_zip:
+                registar_diagnostico(Diagnosticos.AVISO, 'ZIP_INDISPONIVEL', f"Falha ao baixar o ZIP do ano {ano}.", etapa='download', ano=ano)
+                yield None
+                return
+            with self._usar_zip(caminho_zip, ano) as arquivo_zip:
+                yield arquivo_zip
+
+    def pre_carregar_ano(self, ano, tipo_doc="DFP"):
+        """
+        Aquecimento: baixa o ZIP do ano, constrói o Índice de Presença e
+        faz o parse dos demonstrativos (CON e IND) para o cache "quente",
+        antes do primeiro pedido. Retorna True se o ano ficou pronto.
+        """
+        with self._usar_zip_ano(ano, tipo_doc) as arquivo_zip:
+            if arquivo_zip is None:
+                return False
+            self.indice_presenca.obter_tabela(arquivo_zip, ano, tipo_doc)
+            for tipo_dados in ["CONSOLIDADO", "INDIVIDUAL"]:
+                self._carregar_demonstrativos_ano(arquivo_zip, ano, tipo_doc, tipo_dados)
+        return True
+
+    def impressoes_empresas(self, ano, tipo_doc="DFP"):
+        """
+        {cnpj: impressão digital} das linhas do ZIP que entram no cálculo
+        de cada empresa do ano (CON ou IND, pelo Índice de Presença),
+        calculadas para TODAS as empresas de uma vez, sem extrair as
+        contas: só muda se a entrega da empresa mudou.
+        Retorna None se o ano não estiver disponível.
+        """
+        with self._usar_zip_ano(ano, tipo_doc) as arquivo_zip:
+            if arquivo_zip is None or self.indice_presenca.obter_tabela(arquivo_zip, ano, tipo_doc) is None:
+                return None
+            tipos_por_cnpj = self.indice_presenca.cnpjs_disponiveis(ano, tipo_doc)
+
+            impressoes = {}
+            for tipo_dados in ["CONSOLIDADO", "INDIVIDUAL"]:
+                cnpjs = [cnpj for cnpj, tipo in tipos_por_cnpj.items() if tipo == tipo_dados]
+                if not cnpjs:
+                    continue
+                demonstrativos_ano = self._carregar_demonstrativos_ano(arquivo_zip, ano, tipo_doc, tipo_dados)
+                # (Soma dos hashes das linhas: não depende da ordem no arquivo)
+                somas = pd.DataFrame({
+                    demonstrativo: pd.util.hash_pandas_object(df_ano[['CD_CONTA', 'VL_CONTA', 'ESCALA_MOEDA']], index=False)
+                                     .groupby(level=0).sum().reindex(cnpjs, fill_value=0)
+                    for demonstrativo, df_ano in demonstrativos_ano.items()
+                }, index=cnpjs)
+                hashes = pd.util.hash_pandas_object(somas, index=False)
+                impressoes.update((cnpj, f"{tipo_dados[:3]}{h:016x}") for cnpj, h in zip(cnpjs, hashes.to_numpy()))
+        return impressoes
+
+    def descartar_ano(self, ano, tipo_doc="DFP"):
+        """
+        Liberta da memória os demonstrativos e resultados de um ano
+        (ex: exportação ano a ano, para a memória ficar limitada).
+        """
+        tipo_doc = tipo_doc.upper()
+        with self._lock_cache:
+            for chave in [c for c in self._cache_demonstrativos if c[0] == tipo_doc and c[1] == ano]:
+                del self._cache_demonstrativos[chave]
+                self._locks_demonstrativos.pop(chave, None)
+            for cache in (self._cache_resultados, self._contas_derivadas, self._motivos_falha):
+                for chave in [c for c in cache if c[1] == ano and c[2] == tipo_doc]:
+                    del cache[chave]
 
-    # --- MÉTODO _ler_dados_do_zip (ATUALIZADO) ---
     def _ler_dados_do_zip(self, ano, cnpj, tipo_doc="DFP"):
         """
         Lógica de leitura robusta:
         1. Garante que o ZIP do ano existe (baixa se necessário).
-        2. Tenta ler os 3 arquivos CONSOLIDADOS (ignorando o case).
-        3. Se falhar, tenta ler os 3 arquivos INDIVIDUAIS (ignorando o case).
+        2. Consulta o Índice de Presença do ano: vai direto ao conjunto
+           CONSOLIDADO ou INDIVIDUAL (ou desiste, se não há nenhum).
+        3. Sem índice: tenta CONSOLIDADOS e, se falhar, INDIVIDUAIS.
+
+        Lê apenas os demonstrativos pedidos pelo registro de indicadores
+        (a UNIÃO das contas de todos), cada arquivo uma única vez por ano.
+        Retorna ({demonstrativo: df_filtrado}, tipo_dados_usados).
         """
         
-        if not self.coletor.baixar_demonstrativos(ano, tipo_doc):
-            print(f"Falha ao baixar o ZIP do ano {ano}. Cálculo para {cnpj} cancelado.")
-            return None, None, None, None 
-            
-        caminho_zip = self.coletor.caminho_saida_zip
-        
-        try:
-            zf = zipfile.ZipFile(caminho_zip)
-        except Exception as e:
-            print(f"ERRO: Não foi possível abrir o arquivo ZIP: {e}")
-            return None, None, None, None
-            
-        filtro_cnpj = lambda df, c: df['CNPJ_CIA'] == c
-        filtro_exercicio = lambda df: df['ORDEM_EXERC'] == 'ÚLTIMO'
+        # (O ZIP não pode ser apagado do cache em disco, nem fechado, durante a leitura)
+        with self._usar_zip_ano(ano, tipo_doc) as arquivo_zip:
+            if arquivo_zip is None:
+                self._registar_falha(cnpj, ano, tipo_doc, 'ZIP_INDISPONIVEL', f"Cálculo para {cnpj} cancelado (ZIP do ano {ano} indisponível).")
+                return None, None
+            return self._ler_dados_empresa(arquivo_zip, ano, cnpj, tipo_doc)
+
+    def _ler_dados_empresa(self, arquivo_zip, ano, cnpj, tipo_doc):
+        """
+        Lê os demonstrativos de UMA empresa a partir do ZIP já aberto
+        (ver _ler_dados_do_zip).
+        """
+        demonstrativos_essenciais = self.registro.demonstrativos_essenciais()
 
-        dre_df, bpa_df, bpp_df = None, None, None
-        tipo_dados_usados = None
+        # Índice de Presença: decide CON/IND sem ler os demonstrativos
+        tentativas, pelo_indice = ["CONSOLIDADO", "INDIVIDUAL"], False
+        if self.indice_presenca.obter_tabela(arquivo_zip, ano, tipo_doc) is not None:
+            tipo_indice = self.indice_presenca.tipo_disponivel(ano, cnpj, tipo_doc)
+            if tipo_indice is None:
+                return None, None # (Nem CON nem IND completos: nada a ler)
+            tentativas, pelo_indice = [tipo_indice], True
+
+        dados, tipo_dados_usados = None, None
         
         # Loop de Tentativa (primeiro CON, depois IND)
-        for tipo_tentativa in ["CONSOLIDADO", "INDIVIDUAL"]:
+        for tipo_tentativa in tentativas:
             
             if tipo_tentativa == "INDIVIDUAL":
-                print(f"INFO: Dados CONSOLIDADOS não encontrados para {cnpj} no ano {ano}. Tentando INDIVIDUAIS...")
+                registar_diagnostico(Diagnosticos.DEBUG, 'DADOS_INDIVIDUAIS',
+                                     f"INFO: Dados CONSOLIDADOS não encontrados para {cnpj} no ano {ano}. Tentando INDIVIDUAIS...",
+                                     empresa=cnpj, etapa='leitura', ano=ano)
                 
-            # Define os sufixos (em minúsculas) que queremos encontrar
-            sufixos_arquivos = {
-                'dre': f"dre_{'con' if tipo_tentativa == 'CONSOLIDADO' else 'ind'}_{ano}.csv",
-                'bpa': f"bpa_{'con' if tipo_tentativa == 'CONSOLIDADO' else 'ind'}_{ano}.csv",
-                'bpp': f"bpp_{'con' if tipo_tentativa == 'CONSOLIDADO' else 'ind'}_{ano}.csv"
-            }
-            
             try:
-                # 1. Encontrar os nomes corretos (ignorando o case)
-                nome_real_dre = self._encontrar_nome_arquivo_no_zip(zf, sufixos_arquivos['dre'])
-                nome_real_bpa = self._encontrar_nome_arquivo_no_zip(zf, sufixos_arquivos['bpa'])
-                nome_real_bpp = self._encontrar_nome_arquivo_no_zip(zf, sufixos_arquivos['bpp'])
-
-                # 2. Ler os arquivos (sem "chunks", para manter a RAM baixa, mas não tão lento)
-                df_dre = pd.read_csv(zf.open(nome_real_dre), sep=';', encoding='latin1', dtype={'CNPJ_CIA': str})
-                df_bpa = pd.read_csv(zf.open(nome_real_bpa), sep=';', encoding='latin1', dtype={'CNPJ_CIA': str})
-                df_bpp = pd.read_csv(zf.open(nome_real_bpp), sep=';', encoding='latin1', dtype={'CNPJ_CIA': str})
-
-                # 3. Filtrar
-                dre_df_filtrado = df_dre[filtro_cnpj(df_dre, cnpj) & filtro_exercicio(df_dre)].copy()
-                bpa_df_filtrado = df_bpa[filtro_cnpj(df_bpa, cnpj) & filtro_exercicio(df_bpa)].copy()
-                bpp_df_filtrado = df_bpp[filtro_cnpj(df_bpp, cnpj) & filtro_exercicio(df_bpp)].copy()
+                demonstrativos_ano = self._carregar_demonstrativos_ano(arquivo_zip, ano, tipo_doc, tipo_tentativa)
                 
-                if not dre_df_filtrado.empty and not bpa_df_filtrado.empty and not bpp_df_filtrado.empty:
-                    dre_df, bpa_df, bpp_df = dre_df_filtrado, bpa_df_filtrado, bpp_df_filtrado
-                    tipo_dados_usados = tipo_tentativa
-                    break # Sucesso!
+                dados_tentativa = {}
+                for demonstrativo, df_ano in demonstrativos_ano.items():
+                    # 3. "Slice" da empresa (índice ordenado por CNPJ)
+                    if cnpj in df_ano.index:
+                        df_filtrado = df_ano.loc[[cnpj]]
+                    else:
+                        df_filtrado = df_ano.iloc[0:0]
+                    
+                    # 4. Demonstrativo essencial vazio = tentativa falhou
+                    #    (Pelo índice, o demonstrativo existe: se nenhuma conta pedida
+                    #    passou o filtro, é uma conta em falta, não a falta de dados)
+                    if demonstrativo in demonstrativos_essenciais and df_filtrado.empty and not pelo_indice:
+                        raise ValueError(f"Demonstrativo {demonstrativo} ({tipo_tentativa}) vazio para {cnpj}.")
+                    dados_tentativa[demonstrativo] = df_filtrado
+                
+                dados, tipo_dados_usados = dados_tentativa, tipo_tentativa
+                break # Sucesso!
                         
             except Exception as e:
                 # (Falha normal se o _con_ não existir, ou _ind_ não existir)
                 # print(f"DEBUG: Falha ao tentar {tipo_tentativa}: {e}")
                 pass 
 
-        zf.close() 
-        return dre_df, bpa_df, bpp_df, tipo_dados_usados
+        return dados, tipo_dados_usados
     # --- FIM DO MÉTODO ---
 
-    def calcular_indicadores_empresa(self, cnpj, ano):
+    def _fator_escala(self, dados):
         """
-        Método PRINCIPAL. Agora lê direto do ZIP (case-insensitive).
+        Converte a ESCALA_MOEDA ('MIL', 'MILHAO') num fator multiplicativo.
         """
-        
-        dre_df, bpa_df, bpp_df, tipo_dados_usados = self._ler_dados_do_zip(ano, cnpj)
-
-        if tipo_dados_usados is None:
-            print(f"AVISO (Dados Faltantes): CNPJ {cnpj} não possui dados 'ÚLTIMO' (CON ou IND) para o ano {ano}.")
-            return None
-        
-        print(f"INFO: Usando dados {tipo_dados_usados} para {cnpj} (Ano {ano}).")
-            
         try:
-            escala_moeda_texto = bpa_df['ESCALA_MOEDA'].iloc[0]
+            df_ref = dados['BPA'] if 'BPA' in dados else next(iter(dados.values()))
+            escala_moeda_texto = df_ref['ESCALA_MOEDA'].iloc[0]
             fator_escala = 1.0
             if escala_moeda_texto == 'MIL':
                 fator_escala = 1000.0
@@ -143,43 +375,145 @@ class CalculadoraIndicadores:
                 fator_escala = 1000000.0
         except Exception as e:
             fator_escala = 1.0
-            
-        try:
-            contas = {}
-            contas['ativo_circulante'] = self.pegar_valor_conta(bpa_df, self.MAPA_CONTAS['ATIVO_CIRCULANTE']) * fator_escala
-            contas['ativo_total'] = self.pegar_valor_conta(bpa_df, self.MAPA_CONTAS['ATIVO_TOTAL']) * fator_escala
-            contas['passivo_circulante'] = self.pegar_valor_conta(bpp_df, self.MAPA_CONTAS['PASSIVO_CIRCULANTE']) * fator_escala
-            contas['passivo_nao_circulante'] = self.pegar_valor_conta(bpp_df, self.MAPA_CONTAS['PASSIVO_NAO_CIRCULANTE']) * fator_escala
-            contas['patrimonio_liquido'] = self.pegar_valor_conta(bpp_df, self.MAPA_CONTAS['PATRIMONIO_LIQUIDO']) * fator_escala
-            contas['lucro_liquido'] = self.pegar_valor_conta(dre_df, self.MAPA_CONTAS['LUCRO_LIQUIDO']) * fator_escala
-        except (ValueError, RuntimeError) as e:
-            print(f"AVISO (Conta Faltante): Não foi possível extrair uma conta essencial para {cnpj}. {e}. Cálculo cancelado.")
-            return None 
-            
-        indicadores = {}
-        pc = contas['passivo_circulante']
-        at = contas['ativo_total']
-        pl = contas['patrimonio_liquido']
+        return fator_escala
+
+    def _guardar_limitado(self, cache, chave, valor):
+        """
+        Guarda num dos caches por empresa (LRU): acima de
+        MAX_RESULTADOS_EM_CACHE, sai o menos usado.
+        """
+        with self._lock_cache:
+            cache[chave] = valor
+            cache.move_to_end(chave)
+            while len(cache) > self.MAX_RESULTADOS_EM_CACHE:
+                cache.popitem(last=False)
+
+    def _registar_falha(self, cnpj, ano, tipo_doc, codigo, mensagem):
+        # (Guardado: os resultados ficam em cache, o motivo também tem de ficar)
+        self._guardar_limitado(self._motivos_falha, (cnpj, ano, tipo_doc.upper()), (codigo, mensagem))
+        registar_diagnostico(Diagnosticos.AVISO, codigo, mensagem, empresa=cnpj, etapa='extracao', ano=ano)
+
+    def motivo_falha(self, cnpj, ano, tipo_doc="DFP"):
+        """
+        (código, mensagem) do motivo de a empresa não ter contas no ano
+        (ex: ('CONTA_FALTANTE', ...)), ou None se não falhou.
+        """
+        with self._lock_cache:
+            return self._motivos_falha.get((cnpj, ano, tipo_doc.upper()))
+
+    def extrair_contas_empresa(self, cnpj, ano, tipo_doc="DFP"):
+        """
+        Lê o ZIP do ano e extrai as contas brutas (já na escala da moeda)
+        pedidas pelo registro de indicadores. Retorna None se faltar
+        uma conta essencial; contas complementares faltantes viram 'nan'.
+        """
         
-        if abs(pc) > 1e-9:
-            indicadores['liq_corrente'] = contas['ativo_circulante'] / pc
-        else:
-            indicadores['liq_corrente'] = np.nan 
+        chave = (cnpj, ano, tipo_doc.upper())
+        with self._lock_cache: # (Como todos os acessos aos caches por empresa)
+            self._motivos_falha.pop(chave, None)
+        dados, tipo_dados_usados = self._ler_dados_do_zip(ano, cnpj, tipo_doc)
 
-        divida_total = contas['passivo_circulante'] + contas['passivo_nao_circulante']
+        if tipo_dados_usados is None:
+            if self.motivo_falha(cnpj, ano, tipo_doc) is None:
+                self._registar_falha(cnpj, ano, tipo_doc, 'SEM_DEMONSTRATIVOS',
+                                     f"AVISO (Dados Faltantes): CNPJ {cnpj} não possui dados 'ÚLTIMO' (CON ou IND) para o ano {ano}.")
+            return None
         
-        if abs(at) > 1e-9:
-            indicadores['endividamento_geral'] = divida_total / at
-        else:
-            indicadores['endividamento_geral'] = np.nan
+        registar_diagnostico(Diagnosticos.DEBUG, 'TIPO_DADOS', f"INFO: Usando dados {tipo_dados_usados} para {cnpj} (Ano {ano}).",
+                             empresa=cnpj, etapa='extracao', ano=ano)
+            
+        fator_escala = self._fator_escala(dados)
+        contas_essenciais = self.registro.contas_essenciais()
+            
+        contas, derivadas = {}, []
+        for conta in self.registro.contas_necessarias():
+            demonstrativo, cd_conta = self.MAPA_CONTAS[conta]
+            try:
+                contas[conta.lower()] = self.pegar_valor_conta(dados[demonstrativo], cd_conta) * fator_escala
+            except (ValueError, RuntimeError) as e:
+                if conta in contas_essenciais:
+                    self._registar_falha(cnpj, ano, tipo_doc, 'CONTA_FALTANTE',
+                                         f"AVISO (Conta Faltante): Não foi possível extrair uma conta essencial para {cnpj}. {e}. Cálculo cancelado.")
+                    return None 
+                contas[conta.lower()] = np.nan
+                continue
+            df_filtrado = dados[demonstrativo]
+            if df_filtrado.loc[df_filtrado['CD_CONTA'] == cd_conta, 'DERIVADA'].iloc[0]:
+                derivadas.append(conta.lower())
         
-        if abs(pl) > 1e-9:
-            indicadores['divida_pl'] = divida_total / pl
-            indicadores['roe'] = contas['lucro_liquido'] / pl
-        else:
-            indicadores['divida_pl'] = np.nan
-            indicadores['roe'] = np.nan
+        if derivadas:
+            registar_diagnostico(Diagnosticos.INFO, 'CONTAS_DERIVADAS',
+                                 f"INFO: Contas derivadas (soma das contas filhas) para {cnpj} (Ano {ano}): {derivadas}",
+                                 empresa=cnpj, etapa='extracao', ano=ano)
+        self._guardar_limitado(self._contas_derivadas, chave, derivadas)
+        return {chave: float(valor) for chave, valor in contas.items()}
+
+    def _assinatura_zip(self, ano, tipo_doc):
+        """
+        (tamanho, mtime) do ZIP do ano no disco, ou None se não existe.
+        """
+        try:
+            estado = os.stat(self.coletor.caminho_zip(ano, tipo_doc))
+        except OSError:
+            return None
+        return (estado.st_size, estado.st_mtime_ns)
+
+    def _resultado_em_cache(self, chave, assinatura):
+        with self._lock_cache:
+            em_cache = self._cache_resultados.get(chave)
+            if em_cache is None or em_cache[0] != assinatura:
+                return None # (Nunca calculado, ou calculado com outra versão do ZIP)
+            self._cache_resultados.move_to_end(chave)
+            return em_cache[1:]
+
+    def calcular_contas_e_indicadores(self, cnpj, ano, tipo_doc="DFP"):
+        """
+        Extrai as contas brutas e calcula TODOS os indicadores registados
+        numa única leitura. Retorna (contas, indicadores) ou (None, None).
+        O resultado fica em cache (também as falhas, exceto as
+        temporárias, ex: ZIP indisponível) enquanto o ZIP do ano não mudar.
+        """
+        chave = (cnpj, ano, tipo_doc.upper())
+        # (Lida ANTES da extração: se o ZIP mudar a meio, o pedido seguinte recalcula)
+        assinatura = self._assinatura_zip(ano, tipo_doc)
+        resultado = self._resultado_em_cache(chave, assinatura)
+        if resultado is None:
+            with self._lock_cache:
+                lock = self._locks_resultados.setdefault(chave, threading.Lock())
+            try:
+                with lock: # (Sessões em paralelo pedindo a mesma empresa: um só cálculo)
+                    resultado = self._resultado_em_cache(chave, assinatura)
+                    if resultado is None:
+                        contas = self.extrair_contas_empresa(cnpj, ano, tipo_doc)
+                        indicadores = self.registro.calcular(contas) if contas is not None else None
+                        resultado = (contas, indicadores)
+                        motivo = self.motivo_falha(cnpj, ano, tipo_doc)
+                        if contas is not None or motivo is None or motivo[0] not in self.FALHAS_TEMPORARIAS:
+                            self._guardar_limitado(self._cache_resultados, chave, (assinatura, contas, indicadores))
+            finally:
+                with self._lock_cache:
+                    if self._locks_resultados.get(chave) is lock:
+                        del self._locks_resultados[chave]
         
-        indicadores_limpos = {chave: float(valor) for chave, valor in indicadores.items()}
+        contas, indicadores = resultado
+        if contas is None:
+            return None, None
+        # (Cópias: quem chama pode alterar os dicts, ex: analisar_pares)
+        return dict(contas), dict(indicadores)
+
+    def contas_derivadas(self, cnpj, ano, tipo_doc="DFP"):
+        """
+        Contas da empresa no ano que não vieram do arquivo, mas da soma
+        das contas filhas (HierarquiaContas). Vazia se nenhuma
+        (ou se a empresa ainda não foi calculada).
+        """
+        with self._lock_cache:
+            return list(self._contas_derivadas.get((cnpj, ano, tipo_doc.upper()), []))
+
+    def calcular_indicadores_empresa(self, cnpj, ano, tipo_doc="DFP"):
+        """
+        Método PRINCIPAL. Agora lê direto do ZIP (case-insensitive).
+        """
         
-        return indicadores_limpos
\ No newline at end of file
+        contas, indicadores = self.calcular_contas_e_indicadores(cnpj, ano, tipo_doc)
+        return indicadores
\ No newline at end of file
@@ -1,53 +1,166 @@
-import pandas as pd
-import requests
+from ._dependencias import pd
+from ._dependencias import requests
 import os
+import json
 import zipfile
 from datetime import datetime
+from email.utils import formatdate
 import io
-import config
+import threading
+from . import config
+from .diagnosticos import Diagnosticos, registar_diagnostico
 
 class ColetorDadosCVM:
     
-    def __init__(self):
-        self.url_base = config.URL_BASE_DFP_CVM
+    # Tamanho de cada pedaço lido da rede e escrito no disco (bytes)
+    TAMANHO_PEDACO_DOWNLOAD = 8192
+    
+    def __init__(self, cache_disco=None, url_base=None):
+        # (url_base: ex. um servidor HTTP local que imita a CVM, para testes offline)
+        self.url_base = url_base or config.URL_BASE_DFP_CVM
         self.diretorio_saida_raw = config.CAMINHO_RAW_BALANCOS_CVM
+        # (Opcional) GestorCacheDisco: limita o espaço ocupado pelos ZIPs
+        self.cache_disco = cache_disco
+        
+        # Um lock por arquivo: o mesmo ZIP nunca é baixado duas vezes em paralelo
+        # (a instância é partilhada entre sessões/threads, por isso não guarda
+        # estado por chamada: o caminho do ZIP é DEVOLVIDO, não memorizado)
+        self._locks_download = {}
+        self._lock_global = threading.Lock()
         
         os.makedirs(self.diretorio_saida_raw, exist_ok=True)
         print(f"ColetorDadosCVM iniciado. Saída em: {self.diretorio_saida_raw}")
-        # (Guardamos o caminho do zip para a outra classe o encontrar)
-        self.caminho_saida_zip = "" 
+
+    def caminho_zip(self, ano, tipo_doc="DFP"):
+        nome_arquivo_zip = f"{tipo_doc.lower()}_cia_aberta_{ano}.zip"
+        return os.path.join(self.diretorio_saida_raw, nome_arquivo_zip)
+
+    def _url_zip(self, ano, tipo_doc):
+        return f"{self.url_base}{tipo_doc.upper()}/DADOS/{tipo_doc.lower()}_cia_aberta_{ano}.zip"
+
+    def _lock_arquivo(self, caminho_saida_zip):
+        with self._lock_global:
+            return self._locks_download.setdefault(caminho_saida_zip, threading.Lock())
+
+    # --- DOWNLOAD (com o ETag/Last-Modified guardado para o GET condicional) ---
+
+    @staticmethod
+    def _caminho_metadados(caminho_zip):
+        return f"{caminho_zip}.http.json"
+
+    def _cabecalhos_condicionais(self, caminho_zip):
+        """
+        If-None-Match / If-Modified-Since do último download do ZIP
+        (sem metadados guardados, a data do arquivo no disco).
+        """
+        try:
+            with open(self._caminho_metadados(caminho_zip), encoding='utf-8') as arquivo:
+                metadados = json.load(arquivo)
+        except (OSError, ValueError):
+            metadados = {}
+        cabecalhos = {'If-Modified-Since': metadados.get('last_modified') or formatdate(os.path.getmtime(caminho_zip), usegmt=True)}
+        if metadados.get('etag'):
+            cabecalhos['If-None-Match'] = metadados['etag']
+        return cabecalhos
+
+    def _transferir(self, url, caminho_saida_zip, ano, cabecalhos=None):
+        """
+        Baixa o ZIP para um arquivo temporário, renomeado no fim (atómico),
+        e guarda o ETag/Last-Modified da resposta. Retorna False se o
+        servidor respondeu 304 (o ZIP não mudou). Chamar com o lock do
+        arquivo; as falhas de rede/disco levantam exceção.
+        """
+        caminho_parcial = f"{caminho_saida_zip}.parcial"
+        try:
+            resposta = requests.get(url, stream=True, headers=cabecalhos)
+            if resposta.status_code == 304:
+                resposta.close()
+                return False
+            resposta.raise_for_status()
+
+            registar_diagnostico(Diagnosticos.INFO, 'DOWNLOAD', f"Baixando de {url}...", etapa='download', ano=ano)
+            with open(caminho_parcial, 'wb') as f:
+                for pedaco in resposta.iter_content(chunk_size=self.TAMANHO_PEDACO_DOWNLOAD):
+                    f.write(pedaco)
+            os.replace(caminho_parcial, caminho_saida_zip) # (Atómico)
+        except BaseException:
+            if os.path.exists(caminho_parcial):
+                os.remove(caminho_parcial)
+            raise
+
+        metadados = {'etag': resposta.headers.get('ETag'), 'last_modified': resposta.headers.get('Last-Modified')}
+        try:
+            with open(self._caminho_metadados(caminho_saida_zip), 'w', encoding='utf-8') as arquivo:
+                json.dump(metadados, arquivo)
+        except OSError:
+            pass # (Sem metadados, o próximo GET condicional usa a data do arquivo)
+        registar_diagnostico(Diagnosticos.INFO, 'ZIP_SALVO', f"Arquivo ZIP salvo em: {caminho_saida_zip}", etapa='download', ano=ano)
+        if self.cache_disco is not None:
+            # Abre espaço (se preciso) sem nunca apagar o ZIP acabado de baixar
+            self.cache_disco.impor_limite(proteger=[caminho_saida_zip])
+        return True
 
     # --- MÉTODO ATUALIZADO (NÃO DESCOMPACTA MAIS) ---
     def baixar_demonstrativos(self, ano, tipo_doc="DFP"):
         """
         Baixa os arquivos .ZIP da CVM, se ainda não existirem.
         NÃO descompacta mais, para poupar espaço em disco na nuvem.
+        Retorna o caminho do ZIP (ou None se falhar).
+        
+        Seguro entre threads: só uma baixa cada ZIP (as outras esperam),
+        e o download vai para um arquivo temporário, renomeado no fim,
+        para ninguém ler um ZIP incompleto.
         """
         
-        url = f"{self.url_base}{tipo_doc.upper()}/DADOS/{tipo_doc.lower()}_cia_aberta_{ano}.zip"
-        nome_arquivo_zip = f"{tipo_doc.lower()}_cia_aberta_{ano}.zip"
-        # Armazena o caminho do zip para a Calculadora poder encontrá-lo
-        self.caminho_saida_zip = os.path.join(self.diretorio_saida_raw, nome_arquivo_zip)
+        url = self._url_zip(ano, tipo_doc)
+        caminho_saida_zip = self.caminho_zip(ano, tipo_doc)
         
-        print(f"\nVerificando arquivo ZIP para {tipo_doc} {ano}...")
+        registar_diagnostico(Diagnosticos.DEBUG, 'VERIFICAR_ZIP', f"Verificando arquivo ZIP para {tipo_doc} {ano}...", etapa='download', ano=ano)
         
         # 1. Se o ZIP já existe, não faz nada.
-        if os.path.exists(self.caminho_saida_zip):
-            print(f"Arquivo ZIP de {ano} já existe. Pulando download.")
-            return True # Sucesso, o arquivo está pronto
+        if os.path.exists(caminho_saida_zip):
+            registar_diagnostico(Diagnosticos.DEBUG, 'ZIP_EXISTENTE', f"Arquivo ZIP de {ano} já existe. Pulando download.", etapa='download', ano=ano)
+            if self.cache_disco is not None:
+                self.cache_disco.registar_acesso(caminho_saida_zip)
+            return caminho_saida_zip # Sucesso, o arquivo está pronto
 
-        # 2. Se não, baixa o arquivo
-        try:
-            resposta = requests.get(url, stream=True)
-            resposta.raise_for_status() 
+        with self._lock_arquivo(caminho_saida_zip):
+            # (Outra thread pode tê-lo baixado enquanto esperávamos)
+            if os.path.exists(caminho_saida_zip):
+                return caminho_saida_zip
+            
+            # 2. Se não, baixa o arquivo
+            try:
+                self._transferir(url, caminho_saida_zip, ano)
+                return caminho_saida_zip # Sucesso
 
-            print(f"Baixando de {url}...")
-            with open(self.caminho_saida_zip, 'wb') as f:
-                for pedaco in resposta.iter_content(chunk_size=8192):
-                    f.write(pedaco)
-            print(f"Arquivo ZIP salvo em: {self.caminho_saida_zip}")
-            return True # Sucesso
+            except (requests.exceptions.RequestException, OSError) as e:
+                registar_diagnostico(Diagnosticos.ERRO, 'ERRO_DOWNLOAD', f"ERRO ao baixar o arquivo: {e}", etapa='download', ano=ano)
+                return None
+
+    def atualizar_demonstrativos(self, ano, tipo_doc="DFP"):
+        """
+        Pergunta à CVM se o ZIP do ano mudou (GET condicional, com o ETag
+        ou o Last-Modified do último download) e, se mudou, baixa-o de
+        novo (ex: entregas ou reapresentações novas). Sem ZIP em disco,
+        baixa-o. Quem estiver a ler o ZIP antigo continua a lê-lo até ao fim.
+        Retorna (caminho do ZIP ou None, True se o ZIP mudou).
+        """
+        url = self._url_zip(ano, tipo_doc)
+        caminho_saida_zip = self.caminho_zip(ano, tipo_doc)
+
+        with self._lock_arquivo(caminho_saida_zip):
+            existe = os.path.exists(caminho_saida_zip)
+            try:
+                mudou = self._transferir(url, caminho_saida_zip, ano, self._cabecalhos_condicionais(caminho_saida_zip) if existe else None)
+            except (requests.exceptions.RequestException, OSError) as e:
+                registar_diagnostico(Diagnosticos.ERRO, 'ERRO_DOWNLOAD', f"ERRO ao verificar atualizações do ZIP de {ano}: {e}", etapa='download', ano=ano)
+                return (caminho_saida_zip if existe else None), False
 
-        except requests.exceptions.RequestException as e:
-            print(f"ERRO ao baixar o arquivo: {e}")
-            return False
\ No newline at end of file
+        if mudou:
+            registar_diagnostico(Diagnosticos.INFO, 'ZIP_ATUALIZADO', f"INFO: ZIP de {tipo_doc} {ano} atualizado pela CVM.", etapa='download', ano=ano)
+        else:
+            registar_diagnostico(Diagnosticos.DEBUG, 'ZIP_SEM_ALTERACOES', f"ZIP de {tipo_doc} {ano} sem alterações na CVM.", etapa='download', ano=ano)
+        if self.cache_disco is not None:
+            self.cache_disco.registar_acesso(caminho_saida_zip)
+        return caminho_saida_zip, mudou
\ No newline at end of file
@@ -11,9 +11,13 @@ Contém todas as constantes, caminhos, URLs, e regras de negócio
 CAMINHO_DADOS_RAW = "data/raw/"
 CAMINHO_DADOS_PROCESSADOS = "data/processed/"
 CAMINHO_OUTPUT_REPORTS = "output/reports/"
+CAMINHO_OUTPUT_PERFIS = "output/perfis/"
 
 CAMINHO_RAW_BALANCOS_CVM = f"{CAMINHO_DADOS_RAW}balancos_cvm/"
 CAMINHO_RAW_CADASTRO_CVM = f"{CAMINHO_DADOS_RAW}cadastro_cvm/"
+CAMINHO_DADOS_DERIVADOS = f"{CAMINHO_DADOS_RAW}derivados/"
+CAMINHO_PAINEL_INDICADORES = f"{CAMINHO_DADOS_PROCESSADOS}painel_indicadores/"
+CAMINHO_FILA_TRABALHO = f"{CAMINHO_DADOS_PROCESSADOS}fila_trabalho/"
 
 # --- 2. URLs EXTERNAS ---
 URL_CADASTRO_CVM = "https://dados.cvm.gov.br/dados/CIA_ABERTA/CAD/DADOS/cad_cia_aberta.csv"
@@ -24,26 +28,70 @@ ARQUIVO_MAPA_TICKER_CNPJ = f"{CAMINHO_DADOS_PROCESSADOS}mapa_ticker_cnpj.csv"
 ARQUIVO_CADASTRO_CVM = f"{CAMINHO_RAW_CADASTRO_CVM}cad_cia_aberta.csv"
 
 # --- 4. MAPEAMENTO DE INDICADORES ---
-# 4a. Mapeamento de Contas CVM (para calculo_indicadores.py)
+# 4a. Mapeamento de Contas CVM (para calculo_indicadores.py e registro_indicadores.py)
+# Cada conta declara o demonstrativo de onde sai e o seu CD_CONTA.
 MAPA_CONTAS_CVM = {
-    'ATIVO_TOTAL': '1',
-    'ATIVO_CIRCULANTE': '1.01',
-    'PASSIVO_CIRCULANTE': '2.01',
-    'PASSIVO_NAO_CIRCULANTE': '2.02',
-    'PATRIMONIO_LIQUIDO': '2.03',
-    'LUCRO_LIQUIDO': '3.11'
+    'ATIVO_TOTAL': ('BPA', '1'),
+    'ATIVO_CIRCULANTE': ('BPA', '1.01'),
+    'CAIXA': ('BPA', '1.01.01'),
+    'APLICACOES_FINANCEIRAS': ('BPA', '1.01.02'),
+    'PASSIVO_CIRCULANTE': ('BPP', '2.01'),
+    'EMPRESTIMOS_CP': ('BPP', '2.01.04'),
+    'PASSIVO_NAO_CIRCULANTE': ('BPP', '2.02'),
+    'EMPRESTIMOS_LP': ('BPP', '2.02.01'),
+    'PATRIMONIO_LIQUIDO': ('BPP', '2.03'),
+    'RECEITA_LIQUIDA': ('DRE', '3.01'),
+    'EBIT': ('DRE', '3.05'),
+    'LUCRO_LIQUIDO': ('DRE', '3.11'),
+    'CAIXA_OPERACIONAL': ('DFC', '6.01'),
+    'DEPRECIACAO_AMORTIZACAO': ('DVA', '7.04.01')
 }
 
-# 4b. "Tradução" de Nomes (para gerador_relatorio.py)
+# 4b. Arquivos de cada Demonstrativo dentro do ZIP da CVM
+# (A DFC pode vir pelo Método Direto ou Indireto: lemos os dois)
+ARQUIVOS_DEMONSTRATIVOS_CVM = {
+    'BPA': ['bpa'],
+    'BPP': ['bpp'],
+    'DRE': ['dre'],
+    'DFC': ['dfc_md', 'dfc_mi'],
+    'DVA': ['dva']
+}
+
+# 4c. Demonstrativos que decidem entre CON e IND (para indice_presenca.py)
+DEMONSTRATIVOS_INDICE_PRESENCA = ['DRE', 'BPA', 'BPP']
+
+# 4d. "Tradução" de Nomes (para gerador_relatorio.py)
 TRADUCAO_INDICADORES = {
     'liq_corrente': 'Liquidez Corrente',
     'endividamento_geral': 'Endividamento Geral (%)',
     'divida_pl': 'Dívida/PL',
-    'roe': 'ROE (%)'
+    'roe': 'ROE (%)',
+    'margem_ebit': 'Margem EBIT (%)',
+    'divida_liquida_ebitda': 'Dívida Líquida/EBITDA',
+    'fco_divida': 'FCO/Dívida Bruta (%)'
 }
 
-# 4c. Lista de Indicadores que são Percentuais
-INDICADORES_PERCENTUAIS = ['endividamento_geral', 'roe']
+# 4e. Lista de Indicadores que são Percentuais
+INDICADORES_PERCENTUAIS = ['endividamento_geral', 'roe', 'margem_ebit', 'fco_divida']
+
+# 4f. Relatório PDF: máximo de empresas (colunas) por tabela de pares
+# (Tabelas maiores são divididas em blocos, para continuarem legíveis)
+MAX_EMPRESAS_POR_TABELA_PDF = 6
+
+# 4g. Cache de relatórios PDF em memória (número máximo de documentos)
+MAX_RELATORIOS_EM_CACHE = 32
+
+# 4h. Cache das tabelas formatadas (dashboard e PDF), por resultado
+MAX_TABELAS_FORMATADAS_EM_CACHE = 64
+
+# 4i. Cache de resultados por empresa/ano da Calculadora (LRU)
+# (Cada entrada são as contas e os indicadores de uma empresa num ano)
+MAX_RESULTADOS_EM_CACHE = 10000
+
+# 4j. Hierarquia de contas (para hierarquia_contas.py)
+# Quantos níveis abaixo de cada conta do MAPA_CONTAS_CVM são lidos para
+# recuperar uma conta em falta pela soma das filhas (0 = desligado)
+PROFUNDIDADE_HIERARQUIA_CONTAS = 2
 
 # --- 5. MODELO DE RATING (para modelo_rating.py) ---
 # 5a. Pesos dos Grupos de Indicadores
@@ -107,4 +155,101 @@ FAIXAS_RATING = [
     (15, "CCC"),
     (10, "CC"),
     (0, "D")
-]
\ No newline at end of file
+]
+
+# --- 6. TESTE DE ESTRESSE (para teste_estresse.py) ---
+# 6a. Choques aplicados às contas brutas: (choque médio, desvio-padrão)
+# Ex: 'lucro_liquido': (-0.30, 0.15) = lucro cai 30% em média, com dispersão de 15%
+CENARIO_ESTRESSE_PADRAO = {
+    'lucro_liquido': (-0.30, 0.15),
+    'passivo_circulante': (0.20, 0.10),
+    'ativo_circulante': (0.00, 0.05)
+}
+
+# 6b. Parâmetros da Simulação de Monte Carlo
+NUM_CENARIOS_ESTRESSE = 5000
+SEMENTE_ESTRESSE = 42
+
+
+# --- 7. SERVIÇO HTTP LOCAL (para servidor_api.py) ---
+HOST_API = "127.0.0.1"
+PORTA_API = 8765
+NUM_WORKERS_API = 4
+
+# --- 8. BUSCA E SUGESTÕES NO DASHBOARD (para indice_busca.py) ---
+MAX_SUGESTOES_BUSCA = 10
+MAX_SUGESTOES_PARES = 8
+MIN_TAMANHO_PALAVRA_BUSCA = 2
+
+# --- 9. AQUECIMENTO DOS DADOS (para aquecimento.py) ---
+# Quantos anos recentes pré-carregar (ex: 2 -> os dois últimos anos fechados)
+NUM_ANOS_AQUECIMENTO = 2
+# Verificação periódica (GET condicional) de ZIPs atualizados pela CVM, em
+# segundos; só os anos alterados são reaquecidos (0 = só ao iniciar)
+INTERVALO_AQUECIMENTO_SEGUNDOS = 0
+
+# --- 10. CACHE EM DISCO (para cache_disco.py) ---
+# Espaço máximo ocupado por data/raw/ (ZIPs, cadastro e derivados), em bytes
+LIMITE_CACHE_DISCO_BYTES = 2 * 1024 ** 3
+
+# --- 11. PARES AUTOMÁTICOS (para pares_automaticos.py) ---
+# Quantos pares escolher quando a lista de pares é "auto"
+NUM_PARES_AUTOMATICOS = 8
+# Indicadores usados na semelhança (além do tamanho, log do Ativo Total)
+INDICADORES_SIMILARIDADE = ['liq_corrente', 'endividamento_geral', 'divida_pl', 'roe', 'margem_ebit']
+PESO_TAMANHO_PARES = 2.0
+# Distância extra para empresas de outro SETOR_ATIV (só entram se o setor não chegar)
+PENALIDADE_SETOR_PARES = 10.0
+# Limite do z-score robusto de cada indicador (evita que um outlier domine)
+LIMITE_Z_PARES = 3.0
+
+# --- 12. VALIDAÇÃO DOS INDICADORES (para validacao_indicadores.py) ---
+# Indicadores essenciais 'nan' excluem sempre a empresa (código 'INDICADOR_NAN').
+# Regras de outlier, avaliadas por ordem: código -> (indicador, condição, limite)
+# Condições: '<' (abaixo do limite), '>' (acima do limite), '|>|' (valor absoluto acima)
+REGRAS_VALIDACAO_INDICADORES = {
+    'LIQUIDEZ_NEGATIVA': ('liq_corrente', '<', 0.0),
+    'ROE_EXTREMO': ('roe', '|>|', 5.0),
+    'ENDIVIDAMENTO_EXTREMO': ('endividamento_geral', '>', 10.0),
+}
+
+# --- 13. PIPELINE DE INGESTÃO (para pipeline_ingestao.py) ---
+# Download (thread) -> descompressão (thread) -> parse dos CSVs (processos),
+# com filas limitadas entre as etapas. None = um processo por núcleo livre
+# (até 3: os três demonstrativos de um ano); 0 = parse em threads.
+NUM_PROCESSOS_PARSE = None
+# CSVs descompactados à espera do parse (limita a memória da descompressão)
+TAMANHO_FILA_MEMBROS = 6
+# Anos já montados e ainda não consumidos (ex: pela exportação, ano a ano)
+MAX_ANOS_EM_MEMORIA_PIPELINE = 2
+
+# --- 14. EXECUÇÃO DISTRIBUÍDA (para fila_trabalho.py e execucao_distribuida.py) ---
+# Divisão 'faixa': empresas (CNPJs consecutivos) por unidade de trabalho
+TAMANHO_FAIXA_CNPJS = 200
+# Um lease não renovado neste prazo volta à fila (o trabalhador parou)
+DURACAO_LEASE_SEGUNDOS = 120
+# Fila vazia mas com unidades em curso: espera antes de tentar outra vez
+INTERVALO_ESPERA_FILA_SEGUNDOS = 2
+# Tentativas por unidade antes de ficar 'falhou'
+MAX_TENTATIVAS_UNIDADE = 3
+
+# --- 15. TRIAGEM DO MERCADO (para triagem_painel.py) ---
+# Colunas sempre mostradas no resultado (além das usadas nos filtros e na ordenação)
+COLUNAS_RESULTADO_TRIAGEM = ['cnpj', 'tickers', 'empresa', 'setor', 'score_final', 'rating']
+# Empresas devolvidas por consulta quando o limite não é indicado
+LIMITE_TRIAGEM_PADRAO = 50
+
+# --- 16. MODO DE PERFIL (para perfil_execucao.py) ---
+# Funções (por tempo acumulado) e locais de alocação no relatório do perfil
+NUM_FUNCOES_PERFIL = 40
+NUM_ALOCACOES_PERFIL = 25
+
+# --- 17. DIAGNÓSTICOS (para diagnosticos.py) ---
+# Níveis: 'DEBUG' < 'INFO' < 'AVISO' < 'ERRO'
+# Fora de uma execução (ex: download no aquecimento): o que é impresso
+NIVEL_DIAGNOSTICOS = 'INFO'
+# Dentro de uma execução (análise de pares, painel, cobertura, agregados):
+# o que é impresso logo; o resto vai só para o resumo final (uma linha)
+NIVEL_DIAGNOSTICOS_EXECUCAO = 'ERRO'
+# Registos guardados por execução (acima disto, só são contados)
+MAX_REGISTOS_DIAGNOSTICO = 5000
\ No newline at end of file
@@ -0,0 +1,182 @@
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from ._dependencias import pd
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+
+
+class RegistoDiagnostico:
+    """
+    UM registo estruturado: nível, código (ex: 'CONTA_FALTANTE',
+    'ROE_EXTREMO'), mensagem e, quando se aplica, a empresa, a etapa
+    ('download', 'leitura', 'extracao', 'pares', 'alertas', ...) e o ano.
+    """
+    __slots__ = ('nivel', 'codigo', 'mensagem', 'empresa', 'etapa', 'ano', 'momento')
+
+    def __init__(self, nivel, codigo, mensagem, empresa=None, etapa=None, ano=None):
+        self.nivel = nivel
+        self.codigo = codigo
+        self.mensagem = mensagem
+        self.empresa = empresa
+        self.etapa = etapa
+        self.ano = ano
+        self.momento = time.time()
+
+    def para_dict(self):
+        return {
+            'nivel': Diagnosticos.NOMES_NIVEIS[self.nivel], 'codigo': self.codigo, 'empresa': self.empresa,
+            'etapa': self.etapa, 'ano': self.ano, 'mensagem': self.mensagem
+        }
+
+    def __repr__(self):
+        return f"RegistoDiagnostico({Diagnosticos.NOMES_NIVEIS[self.nivel]}, {self.codigo!r}, {self.empresa!r})"
+
+
+class Diagnosticos:
+    """
+    Coletor de diagnósticos de UMA execução (uma análise de pares, a
+    exportação de um ano, ...), em vez de um print() por empresa:
+
+    - Os registos ficam em memória (até config.MAX_REGISTOS_DIAGNOSTICO;
+      acima disso só são contados) e voltam com o resultado
+      (ex: ResultadoIndicadores.diagnosticos).
+    - Só os de nível >= nivel_saida são impressos logo (por padrão, os
+      erros); o resto aparece num resumo de UMA linha no fim.
+
+        with coletar_diagnosticos("painel 2023") as diagnosticos:
+            ...  # registar_diagnostico(...) nas fábricas
+        print(diagnosticos.resumo())
+
+    A execução ativa é por contexto (contextvars): sessões do dashboard
+    e pedidos da API em paralelo não misturam os registos. Execuções
+    aninhadas passam os registos também à execução exterior.
+    """
+
+    # Níveis (os prefixos das mensagens: 'INFO:', 'AVISO:', 'ERRO:')
+    DEBUG = 10
+    INFO = 20
+    AVISO = 30
+    ERRO = 40
+    NOMES_NIVEIS = {DEBUG: 'DEBUG', INFO: 'INFO', AVISO: 'AVISO', ERRO: 'ERRO'}
+
+    def __init__(self, nome=None, nivel_saida=None, pai=None):
+        self.nome = nome
+        self.nivel_saida = self.nivel(nivel_saida or config.NIVEL_DIAGNOSTICOS_EXECUCAO)
+        self.pai = pai
+        self.MAX_REGISTOS = config.MAX_REGISTOS_DIAGNOSTICO
+        self._registos = []
+        self._contagens = {} # (nível, código) -> número de registos (também os descartados)
+        self.descartados = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def nivel(cls, nome_ou_nivel):
+        """
+        'AVISO' -> 30 (aceita também o número).
+        """
+        if isinstance(nome_ou_nivel, int):
+            return nome_ou_nivel
+        for nivel, nome in cls.NOMES_NIVEIS.items():
+            if nome == str(nome_ou_nivel).upper():
+                return nivel
+        raise ValueError(f"Nível de diagnóstico '{nome_ou_nivel}' inválido. Use um de {list(cls.NOMES_NIVEIS.values())}.")
+
+    def _adicionar(self, registo):
+        with self._lock:
+            chave = (registo.nivel, registo.codigo)
+            self._contagens[chave] = self._contagens.get(chave, 0) + 1
+            if len(self._registos) < self.MAX_REGISTOS:
+                self._registos.append(registo)
+            else:
+                self.descartados += 1
+
+    # --- CONSULTA ---
+
+    def registos(self, nivel_minimo=None, empresa=None, etapa=None):
+        nivel_minimo = self.nivel(nivel_minimo or self.DEBUG)
+        with self._lock:
+            registos = list(self._registos)
+        return [
+            registo for registo in registos
+            if registo.nivel >= nivel_minimo
+            and (empresa is None or registo.empresa == empresa)
+            and (etapa is None or registo.etapa == etapa)
+        ]
+
+    def contagens(self, nivel_minimo=None):
+        """
+        {(nível, código): número de registos}, do mais grave para o menos grave.
+        """
+        nivel_minimo = self.nivel(nivel_minimo or self.DEBUG)
+        with self._lock:
+            itens = list(self._contagens.items())
+        itens = sorted((item for item in itens if item[0][0] >= nivel_minimo), key=lambda item: (-item[0][0], -item[1]))
+        return {(self.NOMES_NIVEIS[nivel], codigo): total for (nivel, codigo), total in itens}
+
+    def empresas_excluidas(self, etapa='pares'):
+        """
+        {empresa: registo} das empresas excluídas na etapa (o último motivo de cada uma).
+        """
+        return {registo.empresa: registo for registo in self.registos(self.AVISO, etapa=etapa) if registo.empresa is not None}
+
+    def tabela(self, nivel_minimo=None):
+        """
+        DataFrame dos registos (para o dashboard ou para exportar).
+        """
+        colunas = ['nivel', 'codigo', 'empresa', 'etapa', 'ano', 'mensagem']
+        return pd.DataFrame([registo.para_dict() for registo in self.registos(nivel_minimo or self.INFO)], columns=colunas)
+
+    def resumo(self):
+        """
+        UMA linha: total de registos e contagem por nível e código (sem o DEBUG).
+        """
+        total = sum(self._contagens.values())
+        por_nivel = {}
+        for (nome_nivel, codigo), contagem in self.contagens(self.INFO).items():
+            por_nivel.setdefault(nome_nivel, []).append(f"{codigo} x {contagem}")
+        partes = [f"{nome_nivel}: {', '.join(codigos)}" for nome_nivel, codigos in por_nivel.items()]
+        return f"Diagnósticos ({self.nome or 'execução'}): {total} registos" + "".join(f" | {parte}" for parte in partes)
+
+
+_diagnosticos_atuais = contextvars.ContextVar('diagnosticos_atuais', default=None)
+
+
+@contextmanager
+def coletar_diagnosticos(nome=None, nivel_saida=None):
+    """
+    Abre uma execução: os registos feitos dentro do 'with' (neste
+    contexto) vão para o Diagnosticos devolvido.
+    """
+    diagnosticos = Diagnosticos(nome, nivel_saida, pai=_diagnosticos_atuais.get())
+    token = _diagnosticos_atuais.set(diagnosticos)
+    try:
+        yield diagnosticos
+    finally:
+        _diagnosticos_atuais.reset(token)
+
+
+def diagnosticos_atuais():
+    """
+    O Diagnosticos da execução ativa neste contexto (ou None).
+    """
+    return _diagnosticos_atuais.get()
+
+
+def registar_diagnostico(nivel, codigo, mensagem, empresa=None, etapa=None, ano=None):
+    """
+    Regista na execução ativa (e nas exteriores). Sem execução ativa,
+    só imprime, se o nível chegar a config.NIVEL_DIAGNOSTICOS.
+    """
+    diagnosticos = _diagnosticos_atuais.get()
+    if diagnosticos is None:
+        if nivel >= Diagnosticos.nivel(config.NIVEL_DIAGNOSTICOS):
+            print(mensagem)
+        return
+
+    if nivel >= diagnosticos.nivel_saida:
+        print(mensagem)
+    registo = RegistoDiagnostico(nivel, codigo, mensagem, empresa, etapa, ano)
+    while diagnosticos is not None:
+        diagnosticos._adicionar(registo)
+        diagnosticos = diagnosticos.pai
\ No newline at end of file
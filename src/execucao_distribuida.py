@@ -0,0 +1,245 @@
+import os
+import re
+import time
+import socket
+import hashlib
+import threading
+from ._dependencias import pd
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+
+from .coleta_dados import ColetorDadosCVM
+from .gestor_cadastro import GestorCadastro
+from .calculo_indicadores import CalculadoraIndicadores
+from .modelo_rating import ModeloRating
+from .exportacao_painel import ExportadorPainel
+from .fila_trabalho import FilaTrabalho
+from .cache_disco import GestorCacheDisco
+
+# (Só os resultados parciais e a junção precisam do pyarrow)
+from ._dependencias import disponivel
+
+
+class ExecutorDistribuido:
+    """
+    Re-rating do MERCADO INTEIRO repartido em unidades de trabalho
+    (ano x setor, ou ano x faixa de CNPJs) numa FilaTrabalho partilhada:
+
+    1. planear (uma vez, numa máquina): baixa os ZIPs, constrói os
+       índices de presença e cria as unidades na fila.
+    2. trabalhar (N processos, numa ou em várias máquinas com a pasta
+       de trabalho partilhada): cada processo reivindica uma unidade,
+       calcula o painel dessas empresas (ExportadorPainel) e grava o
+       resultado parcial com um nome fixo por unidade (refazer uma
+       unidade só o substitui, de forma atómica). O lease é renovado
+       em segundo plano; se o processo parar, o lease expira e outro
+       trabalhador reivindica a unidade.
+    3. juntar: junta os resultados num único painel, no formato do
+       exportar_painel.py (destino/ano=AAAA/painel.parquet).
+    """
+
+    POR_SETOR = 'setor'
+    POR_FAIXA = 'faixa'
+
+    def __init__(self, exportador: ExportadorPainel, diretorio_trabalho=None, fila: FilaTrabalho = None):
+        """
+        Construtor. Recebe o ExportadorPainel (que calcula as linhas do
+        painel) e, opcionalmente, a pasta de trabalho partilhada.
+        """
+        self.exportador = exportador
+        self.diretorio_trabalho = diretorio_trabalho or config.CAMINHO_FILA_TRABALHO
+        self.diretorio_partes = os.path.join(self.diretorio_trabalho, "partes")
+        self.fila = fila or FilaTrabalho(os.path.join(self.diretorio_trabalho, "fila.sqlite"))
+        self.TAMANHO_FAIXA = config.TAMANHO_FAIXA_CNPJS
+        # (Renova o lease 3 vezes por prazo: um atraso pontual não o faz perder)
+        self.INTERVALO_RENOVACAO = self.fila.DURACAO_LEASE / 3
+        self.INTERVALO_ESPERA = config.INTERVALO_ESPERA_FILA_SEGUNDOS
+        self.trabalhador = f"{socket.gethostname()}:{os.getpid()}"
+        print(f"ExecutorDistribuido iniciado (trabalhador {self.trabalhador}, fila em {self.fila.caminho_db}).")
+
+    @classmethod
+    def criar(cls, diretorio_trabalho=None):
+        """
+        Cria o executor com as "fábricas" padrão (cada processo
+        trabalhador tem as suas, com os seus caches), com o limite do
+        cache em disco (GestorCacheDisco), como no aquecer.py.
+        """
+        cache_disco = GestorCacheDisco()
+        exportador = ExportadorPainel(CalculadoraIndicadores(ColetorDadosCVM(cache_disco)), GestorCadastro(cache_disco), ModeloRating())
+        return cls(exportador, diretorio_trabalho)
+
+    # --- 1. PLANEAR ---
+
+    def _unidades_ano(self, ano, por, setores):
+        tipos_por_cnpj = self.exportador.empresas_ano(ano)
+        if not tipos_por_cnpj:
+            return []
+        cnpjs = sorted(tipos_por_cnpj)
+
+        if por == self.POR_SETOR:
+            grupos = {}
+            for cnpj in cnpjs:
+                grupos.setdefault(setores.get(cnpj) or 'SEM SETOR', []).append(cnpj)
+        else:
+            faixas = [cnpjs[i:i + self.TAMANHO_FAIXA] for i in range(0, len(cnpjs), self.TAMANHO_FAIXA)]
+            grupos = {f"{faixa[0]}..{faixa[-1]}": faixa for faixa in faixas}
+
+        return [
+            {'id': f"{ano}|{por}|{grupo}", 'ano': ano, 'grupo': grupo, 'cnpjs': membros}
+            for grupo, membros in sorted(grupos.items())
+        ]
+
+    def planear(self, anos, por=None):
+        """
+        Cria as unidades de trabalho dos anos (por setor ou por faixa de
+        CNPJs). Idempotente: as unidades que já existem não mudam.
+        Retorna o número de unidades novas.
+        """
+        por = por or self.POR_SETOR
+        if por not in (self.POR_SETOR, self.POR_FAIXA):
+            raise ValueError(f"Divisão '{por}' inválida. Use '{self.POR_SETOR}' ou '{self.POR_FAIXA}'.")
+
+        _, _, setores = self.exportador._dados_cadastrais()
+        unidades = []
+        for ano in anos:
+            unidades_ano = self._unidades_ano(ano, por, setores)
+            print(f"Planeamento {ano}: {len(unidades_ano)} unidades ({por}).")
+            unidades.extend(unidades_ano)
+        novas = self.fila.adicionar(unidades)
+        print(f"Fila: {novas} unidades novas ({len(unidades) - novas} já existiam). Estado: {self.fila.resumo()}")
+        return novas
+
+    # --- 2. TRABALHAR ---
+
+    def _caminho_parte(self, unidade):
+        """
+        Nome fixo (e seguro para o sistema de arquivos) por unidade.
+        """
+        legivel = re.sub(r'[^0-9A-Za-z_-]+', '_', unidade['grupo'])[:60]
+        resumo = hashlib.sha1(unidade['id'].encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.diretorio_partes, f"ano={unidade['ano']}", f"{legivel}_{resumo}.parquet")
+
+    def _gravar_parte(self, unidade, df_parte):
+        caminho = self._caminho_parte(unidade)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        # (Temporário + rename: quem junta nunca lê uma parte incompleta)
+        caminho_parcial = f"{caminho}.{re.sub(r'[^0-9A-Za-z]+', '_', self.trabalhador)}.parcial"
+        df_parte.to_parquet(caminho_parcial, index=False, compression='zstd')
+        os.replace(caminho_parcial, caminho)
+        return caminho
+
+    def _renovar_lease(self, id_unidade, parar):
+        while not parar.wait(self.INTERVALO_RENOVACAO):
+            if not self.fila.renovar(id_unidade, self.trabalhador):
+                print(f"AVISO: Lease de '{id_unidade}' perdido por {self.trabalhador}.")
+                return
+
+    def _processar(self, unidade, dados_cadastrais):
+        """
+        Calcula e grava UMA unidade. Retorna True se a concluiu.
+        """
+        id_unidade, ano = unidade['id'], unidade['ano']
+        print(f"[{self.trabalhador}] Unidade '{id_unidade}': {len(unidade['cnpjs'])} empresas (tentativa {unidade['tentativas']}).")
+        parar = threading.Event()
+        renovacao = threading.Thread(target=self._renovar_lease, args=(id_unidade, parar), name="renovacao-lease", daemon=True)
+        renovacao.start()
+        try:
+            if self.exportador.empresas_ano(ano) is None:
+                raise RuntimeError(f"Ano {ano} indisponível.")
+            df_parte = self.exportador.montar_painel_ano(ano, dados_cadastrais, cnpjs=unidade['cnpjs'])
+            # (Unidade sem nenhuma empresa no ZIP: concluída sem parte)
+            caminho = self._gravar_parte(unidade, df_parte) if df_parte is not None else None
+        except Exception as e:
+            print(f"ERRO na unidade '{id_unidade}': {e}")
+            self.fila.falhar(id_unidade, self.trabalhador, e)
+            return False
+        finally:
+            parar.set()
+            renovacao.join()
+
+        if not self.fila.concluir(id_unidade, self.trabalhador, caminho):
+            # (Outro trabalhador reivindicou-a: o resultado dele é idêntico)
+            print(f"AVISO: '{id_unidade}' já não pertence a {self.trabalhador}. Resultado descartado da fila.")
+            return False
+        return True
+
+    def trabalhar(self, max_unidades=None):
+        """
+        Reivindica e processa unidades até a fila terminar (ou até
+        'max_unidades'). Enquanto há unidades em curso noutros
+        trabalhadores, espera: se um deles parar, o lease expira e a
+        unidade é reivindicada aqui. Retorna quantas unidades concluiu.
+        """
+        if not disponivel('pyarrow'):
+            print("ERRO: Biblioteca 'pyarrow' não encontrada (necessária para o Parquet).")
+            return 0
+
+        dados_cadastrais = self.exportador._dados_cadastrais()
+        concluidas, ano_em_memoria = 0, None
+        while max_unidades is None or concluidas < max_unidades:
+            unidade = self.fila.reivindicar(self.trabalhador)
+            if unidade is None:
+                if self.fila.terminada():
+                    break
+                time.sleep(self.INTERVALO_ESPERA)
+                continue
+
+            # Memória limitada: as unidades vêm por ano, um ano de cada vez
+            if ano_em_memoria not in (None, unidade['ano']):
+                self.exportador.calculadora.descartar_ano(ano_em_memoria, self.exportador.tipo_doc)
+            ano_em_memoria = unidade['ano']
+            concluidas += self._processar(unidade, dados_cadastrais)
+
+        print(f"[{self.trabalhador}] Terminado: {concluidas} unidades concluídas.")
+        return concluidas
+
+    # --- 3. JUNTAR ---
+
+    def juntar(self, destino=None):
+        """
+        Junta os resultados das unidades concluídas num painel por ano
+        (destino/ano=AAAA/painel.parquet). Retorna {ano: número de empresas}.
+        """
+        if not disponivel('pyarrow'):
+            print("ERRO: Biblioteca 'pyarrow' não encontrada (necessária para o Parquet).")
+            return None
+
+        resumo_fila = self.fila.resumo()
+        if not self.fila.terminada() or resumo_fila.get(FilaTrabalho.FALHOU):
+            print(f"AVISO: A fila não terminou sem falhas ({resumo_fila}). O painel fica parcial.")
+
+        partes_por_ano = {}
+        for unidade in self.fila.unidades(FilaTrabalho.CONCLUIDA):
+            if unidade['resultado']:
+                partes_por_ano.setdefault(unidade['ano'], []).append(unidade['resultado'])
+
+        resumo = {}
+        for ano, caminhos in sorted(partes_por_ano.items()):
+            df_painel = pd.concat([pd.read_parquet(caminho) for caminho in caminhos], ignore_index=True)
+            # (Mesma ordem do exportar_painel.py; uma empresa só entra uma vez)
+            df_painel = df_painel.drop_duplicates('cnpj').sort_values('cnpj', ignore_index=True)
+            diretorio_ano = self.exportador.gravar_ano(df_painel, ano, destino)
+            resumo[ano] = len(df_painel)
+            print(f"Painel {ano}: {len(df_painel)} empresas de {len(caminhos)} unidades -> {diretorio_ano}")
+        return resumo
+
+
+def _processo_trabalhador(diretorio_trabalho, max_unidades):
+    ExecutorDistribuido.criar(diretorio_trabalho).trabalhar(max_unidades)
+
+
+def iniciar_trabalhadores(num_processos, diretorio_trabalho=None, max_unidades=None):
+    """
+    Corre 'num_processos' trabalhadores nesta máquina (cada um com as
+    suas fábricas) e espera que terminem. Retorna os códigos de saída.
+    """
+    import multiprocessing
+    contexto = multiprocessing.get_context('spawn')
+    processos = [
+        contexto.Process(target=_processo_trabalhador, args=(diretorio_trabalho, max_unidades), name=f"trabalhador-{i}")
+        for i in range(num_processos)
+    ]
+    for processo in processos:
+        processo.start()
+    for processo in processos:
+        processo.join()
+    return [processo.exitcode for processo in processos]
\ No newline at end of file
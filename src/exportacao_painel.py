@@ -0,0 +1,184 @@
+import os
+import shutil
+import time
+from contextlib import closing
+from ._dependencias import np
+from ._dependencias import pd
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+from .resultado_indicadores import ResultadoIndicadores
+from .validacao_indicadores import ValidadorIndicadores
+from .diagnosticos import coletar_diagnosticos
+
+# (Só a exportação precisa do pyarrow, e só o importa ao gravar)
+from ._dependencias import pa, pq, disponivel
+
+
+class ExportadorPainel:
+    """
+    Exporta o PAINEL de mercado: todas as empresas presentes na DFP x
+    anos, com situação no cadastro (ativa), conta brutas, contas
+    derivadas (somadas das filhas), indicadores, motivo de validação
+    ('OK' ou o código da regra que falhou), score e rating, num único
+    dataset Parquet particionado por ano:
+
+        data/processed/painel_indicadores/ano=2023/painel.parquet
+        data/processed/painel_indicadores/ano=2024/painel.parquet
+
+    (Leitura: pd.read_parquet(config.CAMINHO_PAINEL_INDICADORES))
+
+    As empresas sem contas utilizáveis também têm a sua linha, com as
+    contas, os indicadores e o score em 'nan' e o motivo da exclusão em
+    motivo_validacao (os códigos do IndiceCobertura: 'SEM_DEMONSTRATIVOS',
+    'CONTA_FALTANTE', ...), para não se confundirem com as que não entregaram.
+
+    Corre ano a ano: cada ano é lido, calculado, gravado e libertado
+    da memória antes do seguinte, por isso a memória fica limitada a
+    um ano, qualquer que seja o intervalo pedido. Com um
+    PipelineIngestao, o ano seguinte é baixado e lido enquanto o atual
+    é calculado (config.MAX_ANOS_EM_MEMORIA_PIPELINE anos em memória).
+    """
+
+    def __init__(self, calculadora, gestor, modelo, tipo_doc="DFP", pipeline=None):
+        self.calculadora = calculadora
+        self.gestor = gestor
+        self.modelo = modelo
+        self.validador = ValidadorIndicadores(calculadora.registro)
+        self.tipo_doc = tipo_doc
+        # (Opcional) PipelineIngestao: ingere os anos seguintes em paralelo
+        self.pipeline = pipeline
+        self.diretorio_painel = config.CAMINHO_PAINEL_INDICADORES
+
+    def _dados_cadastrais(self):
+        """
+        CNPJ -> (tickers, nome, setor), a partir do mapa e do cadastro CVM
+        (ambos opcionais: o que faltar fica vazio).
+        """
+        tickers, nomes, setores = {}, {}, {}
+        if self.gestor._carregar_mapa_ticker():
+            df_mapa = self.gestor.df_mapa_ticker
+            tickers = df_mapa.groupby('CNPJ')['TICKER'].agg(lambda t: ','.join(sorted(set(t)))).to_dict()
+            nomes = df_mapa.drop_duplicates('CNPJ').set_index('CNPJ')['NOME_EMPRESA'].to_dict()
+        if self.gestor._carregar_cadastro_cvm():
+            df_cadastro = self.gestor.df_cadastro_cvm.drop_duplicates('CNPJ_CIA').set_index('CNPJ_CIA')
+            setores = df_cadastro['SETOR_ATIV'].to_dict()
+            nomes = {**df_cadastro['DENOM_COMERC'].fillna(df_cadastro['DENOM_SOCIAL']).to_dict(), **nomes}
+        return tickers, nomes, setores
+
+    def empresas_ano(self, ano):
+        """
+        {cnpj: 'CONSOLIDADO' | 'INDIVIDUAL' | None} de todas as empresas
+        presentes no ZIP do ano (pelo Índice de Presença; None = sem
+        demonstrativos completos), ou None se o ano não estiver disponível.
+        """
+        presenca = self.calculadora.indice_presenca
+        with self.calculadora._usar_zip_ano(ano, self.tipo_doc) as arquivo_zip:
+            df_presenca = presenca.obter_tabela(arquivo_zip, ano, self.tipo_doc) if arquivo_zip is not None else None
+        if df_presenca is None:
+            print(f"AVISO: Ano {ano} indisponível. Fica fora do painel.")
+            return None
+        tipos_por_cnpj = presenca.cnpjs_disponiveis(ano, self.tipo_doc)
+        return {cnpj: tipos_por_cnpj.get(cnpj) for cnpj in df_presenca['CNPJ_CIA'].unique()}
+
+    def montar_painel_ano(self, ano, dados_cadastrais=None, cnpjs=None):
+        """
+        DataFrame (uma linha por CNPJ) do ano, ou None se o ano não
+        estiver disponível. 'cnpjs' limita o painel a essas empresas
+        (ex: uma unidade de trabalho do ExecutorDistribuido).
+        """
+        tipos_por_cnpj = self.empresas_ano(ano)
+        if tipos_por_cnpj is None:
+            return None
+        if cnpjs is not None:
+            tipos_por_cnpj = {cnpj: tipos_por_cnpj[cnpj] for cnpj in cnpjs if cnpj in tipos_por_cnpj}
+        tickers, nomes, setores = dados_cadastrais or self._dados_cadastrais()
+
+        registro = self.calculadora.registro
+        colunas_contas = [conta.lower() for conta in registro.contas_necessarias()]
+        resultado = ResultadoIndicadores(registro.nomes(), capacidade=len(tipos_por_cnpj))
+        linhas_contas, contas_derivadas, motivos_exclusao = [], [], {}
+        # (Uma linha de resumo no fim, em vez de uma por empresa)
+        with coletar_diagnosticos(f"painel {ano}") as diagnosticos:
+            for cnpj in sorted(tipos_por_cnpj):
+                tipo_dados = tipos_por_cnpj[cnpj]
+                contas, indicadores = (None, None)
+                if tipo_dados is not None:
+                    contas, indicadores = self.calculadora.calcular_contas_e_indicadores(cnpj, ano, self.tipo_doc)
+                if indicadores is None:
+                    # (Entregou, mas não é analisável: a linha fica, só com o motivo)
+                    motivo = self.calculadora.motivo_falha(cnpj, ano, self.tipo_doc) if tipo_dados is not None else None
+                    motivos_exclusao[len(linhas_contas)] = (
+                        motivo[0] if motivo else 'CONTA_FALTANTE' if tipo_dados is not None else 'SEM_DEMONSTRATIVOS'
+                    )
+                    contas, indicadores, derivadas = {}, {}, []
+                else:
+                    derivadas = self.calculadora.contas_derivadas(cnpj, ano, self.tipo_doc)
+                resultado.adicionar(cnpj, indicadores)
+                linhas_contas.append([contas.get(conta, np.nan) for conta in colunas_contas])
+                contas_derivadas.append(','.join(derivadas))
+        print(diagnosticos.resumo())
+        resultado.finalizar()
+        if not len(resultado):
+            return None
+
+        ratings = self.modelo.calcular_ratings_resultado(resultado)
+        cnpjs = resultado.empresas
+        df_painel = pd.DataFrame({
+            'cnpj': cnpjs,
+            'tickers': [tickers.get(cnpj) for cnpj in cnpjs],
+            'empresa': [nomes.get(cnpj) for cnpj in cnpjs],
+            'setor': [setores.get(cnpj) for cnpj in cnpjs],
+            # (O cadastro só tem as ativas; sem cadastro, desconhecido)
+            'ativa': [cnpj in setores for cnpj in cnpjs] if setores else None,
+            'tipo_dados': [tipos_por_cnpj[cnpj] for cnpj in cnpjs],
+        })
+        df_contas = pd.DataFrame(np.array(linhas_contas, dtype=np.float64), columns=colunas_contas)
+        df_indicadores = pd.DataFrame(resultado.matriz(), columns=resultado.indicadores)
+        df_painel = pd.concat([df_painel, df_contas, df_indicadores], axis=1)
+        df_painel['contas_derivadas'] = contas_derivadas # (Somadas das contas filhas)
+        df_painel['motivo_validacao'] = self.validador.validar_matriz(resultado.matriz(), resultado.indicadores).astype(str)
+        df_painel['score_final'] = [ratings[cnpj]['score_final'] for cnpj in cnpjs]
+        df_painel['rating'] = [ratings[cnpj]['rating'] for cnpj in cnpjs]
+        if motivos_exclusao:
+            excluidas = list(motivos_exclusao)
+            df_painel.loc[excluidas, 'motivo_validacao'] = list(motivos_exclusao.values())
+            df_painel.loc[excluidas, 'score_final'] = np.nan
+            df_painel.loc[excluidas, 'rating'] = None
+        return df_painel
+
+    def gravar_ano(self, df_painel, ano, destino=None):
+        """
+        Grava (ou regrava) a partição do ano: destino/ano=AAAA/painel.parquet.
+        """
+        # (Regrava só a partição do ano: as outras ficam intactas)
+        diretorio_ano = os.path.join(destino or self.diretorio_painel, f"ano={ano}")
+        shutil.rmtree(diretorio_ano, ignore_errors=True)
+        os.makedirs(diretorio_ano)
+        tabela = pa.Table.from_pandas(df_painel, preserve_index=False)
+        pq.write_table(tabela, os.path.join(diretorio_ano, "painel.parquet"), compression='zstd')
+        return diretorio_ano
+
+    def exportar(self, ano_inicio, ano_fim, destino=None):
+        """
+        Exporta os anos [ano_inicio, ano_fim] (um arquivo por ano).
+        Retorna {ano: número de empresas} ou None se o pyarrow faltar.
+        """
+        if not disponivel('pyarrow'):
+            print("ERRO: Biblioteca 'pyarrow' não encontrada (necessária para o Parquet).")
+            return None
+
+        destino = destino or self.diretorio_painel
+        dados_cadastrais = self._dados_cadastrais()
+        resumo = {}
+        anos = range(ano_inicio, ano_fim + 1)
+        anos_prontos = self.pipeline.iterar(anos) if self.pipeline is not None else ((ano, None) for ano in anos)
+        with closing(anos_prontos):
+            for ano, _ in anos_prontos:
+                inicio = time.perf_counter()
+                df_painel = self.montar_painel_ano(ano, dados_cadastrais)
+                if df_painel is not None:
+                    diretorio_ano = self.gravar_ano(df_painel, ano, destino)
+                    resumo[ano] = len(df_painel)
+                    print(f"Painel {ano}: {len(df_painel)} empresas em {time.perf_counter() - inicio:.1f}s -> {diretorio_ano}")
+                # Memória limitada: o ano seguinte começa sem os dados deste
+                self.calculadora.descartar_ano(ano, self.tipo_doc)
+        return resumo
@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import sqlite3
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+
+
+class FilaTrabalho:
+    """
+    Fila de unidades de trabalho num arquivo SQLite (sem serviços
+    externos). Vários processos, em várias máquinas que partilhem a
+    pasta, reivindicam unidades com um "lease" (prazo):
+
+    - reivindicar: a próxima unidade 'pendente' (ou com o lease
+      expirado: o trabalhador parou ou morreu) passa a 'em_curso',
+      numa transação exclusiva (duas reivindicações nunca recebem a
+      mesma unidade).
+    - renovar: o trabalhador prolonga o lease enquanto trabalha.
+    - concluir / falhar: só o dono do lease muda o estado; uma unidade
+      que falha volta a 'pendente' até config.MAX_TENTATIVAS_UNIDADE
+      tentativas, depois fica 'falhou'.
+
+    Adicionar unidades é idempotente (o id é a chave): planear outra vez
+    não repete o que já está concluído.
+
+    (O SQLite precisa de locks de arquivo funcionais: num sistema de
+    arquivos em rede, use um que os suporte, ex: NFSv4.)
+    """
+
+    # Estados de uma unidade
+    PENDENTE = 'pendente'
+    EM_CURSO = 'em_curso'
+    CONCLUIDA = 'concluida'
+    FALHOU = 'falhou'
+
+    def __init__(self, caminho_db=None):
+        self.caminho_db = caminho_db or os.path.join(config.CAMINHO_FILA_TRABALHO, "fila.sqlite")
+        self.DURACAO_LEASE = config.DURACAO_LEASE_SEGUNDOS
+        self.MAX_TENTATIVAS = config.MAX_TENTATIVAS_UNIDADE
+        os.makedirs(os.path.dirname(self.caminho_db) or '.', exist_ok=True)
+        with self._conectar() as conexao:
+            conexao.execute("""
+                CREATE TABLE IF NOT EXISTS unidades (
+                    id TEXT PRIMARY KEY,
+                    ano INTEGER NOT NULL,
+                    grupo TEXT NOT NULL,
+                    cnpjs TEXT NOT NULL,
+                    estado TEXT NOT NULL,
+                    trabalhador TEXT,
+                    lease_ate REAL,
+                    tentativas INTEGER NOT NULL DEFAULT 0,
+                    erro TEXT,
+                    resultado TEXT,
+                    atualizado REAL
+                )
+            """)
+
+    def _conectar(self):
+        # (Uma conexão por operação: segura entre threads e processos)
+        conexao = sqlite3.connect(self.caminho_db, timeout=30, isolation_level=None)
+        conexao.row_factory = sqlite3.Row
+        return _Conexao(conexao)
+
+    @staticmethod
+    def _para_dict(linha):
+        if linha is None:
+            return None
+        unidade = dict(linha)
+        unidade['cnpjs'] = json.loads(unidade['cnpjs'])
+        return unidade
+
+    # --- PLANEAMENTO ---
+
+    def adicionar(self, unidades):
+        """
+        Adiciona unidades [{'id', 'ano', 'grupo', 'cnpjs'}] (as que já
+        existem ficam como estão). Retorna quantas eram novas.
+        """
+        agora = time.time()
+        with self._conectar() as conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            antes = conexao.execute("SELECT COUNT(*) FROM unidades").fetchone()[0]
+            conexao.executemany(
+                "INSERT OR IGNORE INTO unidades (id, ano, grupo, cnpjs, estado, atualizado) VALUES (?, ?, ?, ?, ?, ?)",
+                [(u['id'], u['ano'], u['grupo'], json.dumps(u['cnpjs']), self.PENDENTE, agora) for u in unidades]
+            )
+            depois = conexao.execute("SELECT COUNT(*) FROM unidades").fetchone()[0]
+            conexao.execute("COMMIT")
+        return depois - antes
+
+    # --- CICLO DE VIDA DE UMA UNIDADE ---
+
+    def _expirar_esgotadas(self, conexao, agora):
+        """
+        Lease expirado na última tentativa: a unidade já não volta à fila.
+        """
+        conexao.execute("""
+            UPDATE unidades SET estado = ?, trabalhador = NULL, lease_ate = NULL, erro = ?, atualizado = ?
+            WHERE estado = ? AND lease_ate < ? AND tentativas >= ?
+        """, (self.FALHOU, "Lease expirado na última tentativa.", agora, self.EM_CURSO, agora, self.MAX_TENTATIVAS))
+
+    def reivindicar(self, trabalhador):
+        """
+        Reivindica a próxima unidade (por ano, para o trabalhador reaproveitar
+        o ano em memória) ou None se não há nada disponível.
+        """
+        agora = time.time()
+        with self._conectar() as conexao:
+            conexao.execute("BEGIN IMMEDIATE") # (Lock de escrita: uma reivindicação de cada vez)
+            self._expirar_esgotadas(conexao, agora)
+            linha = conexao.execute("""
+                SELECT * FROM unidades
+                WHERE (estado = ? OR (estado = ? AND lease_ate < ?)) AND tentativas < ?
+                ORDER BY ano, id LIMIT 1
+            """, (self.PENDENTE, self.EM_CURSO, agora, self.MAX_TENTATIVAS)).fetchone()
+            if linha is None:
+                conexao.execute("COMMIT")
+                return None
+            if linha['estado'] == self.EM_CURSO:
+                print(f"AVISO: Lease de '{linha['id']}' expirado ({linha['trabalhador']}). Reivindicada por {trabalhador}.")
+            conexao.execute("""
+                UPDATE unidades SET estado = ?, trabalhador = ?, lease_ate = ?, tentativas = tentativas + 1, atualizado = ?
+                WHERE id = ?
+            """, (self.EM_CURSO, trabalhador, agora + self.DURACAO_LEASE, agora, linha['id']))
+            conexao.execute("COMMIT")
+        unidade = self._para_dict(linha)
+        unidade['tentativas'] += 1
+        return unidade
+
+    def _atualizar_se_dono(self, id_unidade, trabalhador, atribuicoes, valores):
+        """
+        UPDATE só se o trabalhador ainda é o dono do lease. Retorna True/False.
+        """
+        with self._conectar() as conexao:
+            cursor = conexao.execute(
+                f"UPDATE unidades SET {atribuicoes}, atualizado = ? WHERE id = ? AND estado = ? AND trabalhador = ?",
+                (*valores, time.time(), id_unidade, self.EM_CURSO, trabalhador)
+            )
+            return cursor.rowcount == 1
+
+    def renovar(self, id_unidade, trabalhador):
+        """
+        Prolonga o lease. False = o lease foi perdido (expirou e outro
+        trabalhador reivindicou a unidade).
+        """
+        return self._atualizar_se_dono(id_unidade, trabalhador, "lease_ate = ?", (time.time() + self.DURACAO_LEASE,))
+
+    def concluir(self, id_unidade, trabalhador, resultado=None):
+        """
+        Marca a unidade como concluída (com o caminho do resultado).
+        """
+        return self._atualizar_se_dono(
+            id_unidade, trabalhador, "estado = ?, lease_ate = NULL, erro = NULL, resultado = ?",
+            (self.CONCLUIDA, resultado)
+        )
+
+    def falhar(self, id_unidade, trabalhador, erro):
+        """
+        Devolve a unidade à fila (ou marca-a como 'falhou', se esgotou as tentativas).
+        """
+        with self._conectar() as conexao:
+            cursor = conexao.execute("""
+                UPDATE unidades
+                SET estado = CASE WHEN tentativas >= ? THEN ? ELSE ? END,
+                    trabalhador = NULL, lease_ate = NULL, erro = ?, atualizado = ?
+                WHERE id = ? AND estado = ? AND trabalhador = ?
+            """, (self.MAX_TENTATIVAS, self.FALHOU, self.PENDENTE, str(erro), time.time(),
+                  id_unidade, self.EM_CURSO, trabalhador))
+            return cursor.rowcount == 1
+
+    # --- CONSULTA ---
+
+    def unidades(self, estado=None):
+        with self._conectar() as conexao:
+            if estado is None:
+                linhas = conexao.execute("SELECT * FROM unidades ORDER BY ano, id").fetchall()
+            else:
+                linhas = conexao.execute("SELECT * FROM unidades WHERE estado = ? ORDER BY ano, id", (estado,)).fetchall()
+        return [self._para_dict(linha) for linha in linhas]
+
+    def resumo(self):
+        """
+        {estado: número de unidades} (ex: {'pendente': 3, 'concluida': 12}).
+        """
+        with self._conectar() as conexao:
+            self._expirar_esgotadas(conexao, time.time())
+            linhas = conexao.execute("SELECT estado, COUNT(*) FROM unidades GROUP BY estado").fetchall()
+        return {estado: total for estado, total in linhas}
+
+    def terminada(self):
+        """
+        True se não há unidades por fazer (pendentes ou em curso).
+        """
+        resumo = self.resumo()
+        return not resumo.get(self.PENDENTE) and not resumo.get(self.EM_CURSO)
+
+
+class _Conexao:
+    """
+    'with' que FECHA a conexão SQLite no fim (o da sqlite3 só faz commit),
+    e faz ROLLBACK se uma transação ficou aberta por um erro.
+    """
+
+    def __init__(self, conexao):
+        self._conexao = conexao
+
+    def __enter__(self):
+        return self._conexao
+
+    def __exit__(self, tipo, valor, traceback):
+        if self._conexao.in_transaction:
+            self._conexao.rollback()
+        self._conexao.close()
+        return False
\ No newline at end of file
@@ -0,0 +1,57 @@
+from ._dependencias import pd
+from ._dependencias import np
+import threading
+from collections import OrderedDict
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+
+# Cache das tabelas formatadas: impressão digital do resultado -> (comparativo, completo)
+_cache_formatados = OrderedDict()
+_lock_cache = threading.Lock()
+
+
+def formatar_tabela_indicadores(df_indicadores):
+    """
+    Formata uma tabela de indicadores (linhas = indicadores com os nomes
+    internos, ex: 'roe'; colunas = empresas ou "Média do Setor") para texto,
+    de forma VETORIZADA (sem loops por linha/célula):
+
+    - Indicadores em config.INDICADORES_PERCENTUAIS: "12.34%"
+    - Os demais: "1.23"
+    - 'nan': "N/A"
+    - As linhas são traduzidas com config.TRADUCAO_INDICADORES.
+
+    Usado pelo dashboard e pelo GeradorRelatorioPDF.
+    """
+    valores = df_indicadores.to_numpy(dtype=np.float64)
+    eh_percentual = df_indicadores.index.isin(config.INDICADORES_PERCENTUAIS)[:, np.newaxis]
+
+    texto = np.char.mod('%.2f', np.where(eh_percentual, valores * 100, valores))
+    texto = np.where(eh_percentual, np.char.add(texto, '%'), texto)
+    texto = np.where(np.isnan(valores), 'N/A', texto)
+
+    df_formatado = pd.DataFrame(texto, index=df_indicadores.index, columns=df_indicadores.columns)
+    return df_formatado.rename(index=config.TRADUCAO_INDICADORES)
+
+
+def formatar_resultado(resultado):
+    """
+    Devolve (df_comparativo_formatado, df_completo_t_formatado) de um
+    ResultadoIndicadores, com cache por conteúdo (impressão digital):
+    os "reruns" do Streamlit e o PDF do mesmo resultado não refazem
+    a formatação. (Não altere os DataFrames devolvidos: são partilhados.)
+    """
+    chave = resultado.impressao_digital()
+    with _lock_cache:
+        if chave in _cache_formatados:
+            _cache_formatados.move_to_end(chave)
+            return _cache_formatados[chave]
+
+    formatados = (
+        formatar_tabela_indicadores(resultado.df_comparativo()),
+        formatar_tabela_indicadores(resultado.df_completo_t())
+    )
+    with _lock_cache:
+        _cache_formatados[chave] = formatados
+        while len(_cache_formatados) > config.MAX_TABELAS_FORMATADAS_EM_CACHE:
+            _cache_formatados.popitem(last=False)
+    return formatados
\ No newline at end of file
@@ -1,34 +1,42 @@
-import pandas as pd
+from ._dependencias import pd
 import os
-import sys
+import hashlib
+import json
+import threading
+from collections import OrderedDict
 from datetime import datetime
-import config 
+from . import config 
 
-try:
-    from fpdf import FPDF
-    from fpdf.enums import XPos, YPos
-    from fpdf.fonts import FontFace
-except ImportError:
-    print("ERRO: Biblioteca 'fpdf2' não encontrada.")
-    sys.exit(1)
-
-try:
-    from alerta_flags import GeradorAlertas
-    from modelo_rating import ModeloRating
-except ImportError:
-    print("ERRO: Falha ao importar AlertaFlags ou ModeloRating.")
-    sys.exit(1)
+# (O fpdf só é importado ao gerar o primeiro PDF)
+from ._dependencias import fpdf, fpdf_enums, fpdf_fonts
+from .alerta_flags import GeradorAlertas
+from .modelo_rating import ModeloRating
+from .formatacao import formatar_resultado
 
 
 class GeradorRelatorioPDF:
     
+    # Objetos de estilo criados UMA vez (no primeiro PDF) e reutilizados em todos os documentos
+    ESTILO_CABECALHO_TABELA = None
+    LARGURA_PRIMEIRA_COLUNA = 50
+    
+    @classmethod
+    def _estilo_cabecalho_tabela(cls):
+        if cls.ESTILO_CABECALHO_TABELA is None:
+            cls.ESTILO_CABECALHO_TABELA = fpdf_fonts.FontFace(emphasis="BOLD")
+        return cls.ESTILO_CABECALHO_TABELA
+
     def __init__(self):
         self.diretorio_relatorios_pdf = config.CAMINHO_OUTPUT_REPORTS
         self.TRADUCAO_INDICADORES = config.TRADUCAO_INDICADORES
         self.INDICADORES_PERCENTUAIS = config.INDICADORES_PERCENTUAIS
-        self.perc_traduzidos = [self.TRADUCAO_INDICADORES.get(p) for p in self.INDICADORES_PERCENTUAIS]
+        self.MAX_EMPRESAS_POR_TABELA = config.MAX_EMPRESAS_POR_TABELA_PDF
+        self.MAX_RELATORIOS_EM_CACHE = config.MAX_RELATORIOS_EM_CACHE
+        
+        # Cache por conteúdo: chave (hash das entradas) -> bytes do PDF
+        self._cache_pdfs = OrderedDict()
+        self._lock_cache = threading.Lock()
         
-        os.makedirs(self.diretorio_relatorios_pdf, exist_ok=True)
         print(f"GeradorRelatorioPDF iniciado. Pasta de saída: {self.diretorio_relatorios_pdf}")
 
     def _ler_dados_relatorio(self, ticker_alvo, ano):
@@ -52,72 +60,89 @@ class GeradorRelatorioPDF:
             print(f"ERRO ao ler arquivos CSV (verifique 'analise_setorial.py'): {e}")
             return None, None, None
 
-    # --- VERSÃO CORRIGIDA E SIMPLIFICADA (A QUE FUNCIONA) ---
-    # (Substitua a sua função _escrever_tabela_pdf por esta)
-    def _escrever_tabela_pdf(self, pdf, df_dados, col_widths, text_align):
+    def _escrever_tabela_pdf(self, pdf, df_formatado, titulo_primeira_coluna, col_widths):
         """
-        Método auxiliar para desenhar uma tabela, forçando o alinhamento
-        de cada célula manualmente, pois 'text_align' está a ser ignorado.
+        Método auxiliar para desenhar uma tabela já formatada (só texto).
+        O alinhamento vai num único tuplo (1ª coluna à esquerda, dados ao
+        centro) e o fpdf2 quebra a tabela entre páginas, repetindo o cabeçalho.
         """
         pdf.set_font("Helvetica", size=10)
-        estilo_cabecalho_tabela = FontFace(emphasis="BOLD")
+        
+        # Linhas montadas de uma vez (sem iterrows)
+        dados_tabela = [[titulo_primeira_coluna] + [str(c) for c in df_formatado.columns]]
+        dados_tabela += df_formatado.reset_index().to_numpy().tolist()
         
         with pdf.table(
             col_widths=col_widths,
-            # (Removemos o text_align daqui, pois vamos fazê-lo manualmente)
+            width=sum(col_widths),
+            align="LEFT",
+            text_align=("LEFT",) + ("CENTER",) * (len(col_widths) - 1),
             first_row_as_headings=True,
-            headings_style=estilo_cabecalho_tabela
+            headings_style=self._estilo_cabecalho_tabela()
         ) as tabela:
+            for linha_dados in dados_tabela:
+                tabela.row(linha_dados)
+
+    def _escrever_tabela_pares_paginada(self, pdf, df_formatado):
+        """
+        Divide a tabela de pares (indicadores x empresas) em blocos de no
+        máximo MAX_EMPRESAS_POR_TABELA colunas, para continuar legível
+        com muitos pares. Cada bloco repete a coluna de indicadores.
+        """
+        largura_util = pdf.epw
+        num_empresas = len(df_formatado.columns)
+        
+        for inicio in range(0, num_empresas, self.MAX_EMPRESAS_POR_TABELA):
+            bloco = df_formatado.iloc[:, inicio:inicio + self.MAX_EMPRESAS_POR_TABELA]
+            num_colunas_dados = len(bloco.columns)
+            largura_coluna_dados = (largura_util - self.LARGURA_PRIMEIRA_COLUNA) / self.MAX_EMPRESAS_POR_TABELA
+            col_widths = (self.LARGURA_PRIMEIRA_COLUNA,) + (largura_coluna_dados,) * num_colunas_dados
             
-            # Iteramos sobre os dados (que é uma lista de listas)
-            for i, linha_dados in enumerate(df_dados):
-                # Criamos a linha no PDF
-                linha_pdf = tabela.row(linha_dados)
-                
-                # Agora, iteramos sobre cada CÉLULA dessa linha
-                for j, celula in enumerate(linha_pdf.cells):
-                    # 'j' é o índice da coluna (0, 1, 2...)
-                    # Usamos o 'text_align' (o tuplo que passámos)
-                    # para definir o alinhamento de cada célula
-                    
-                    # (text_align[j] será "LEFT" para a coluna 0, 
-                    # e "CENTER" para as colunas 1, 2, 3...)
-                    celula.align = text_align[j].upper() 
-                    
-        # Esta abordagem é mais explícita e deve sobrepor-se
-        # a qualquer padrão interno da biblioteca.
-    # --- FIM DA CORREÇÃO ---
+            if num_empresas > self.MAX_EMPRESAS_POR_TABELA:
+                pdf.set_font("Helvetica", 'I', 8)
+                fim = min(inicio + self.MAX_EMPRESAS_POR_TABELA, num_empresas)
+                pdf.cell(0, 5, f"Empresas {inicio + 1} a {fim} de {num_empresas}", new_x=fpdf_enums.XPos.LMARGIN, new_y=fpdf_enums.YPos.NEXT, align='L')
+            self._escrever_tabela_pdf(pdf, bloco, 'Indicador', col_widths)
+            pdf.ln(4)
 
-    def gerar_relatorio(self, ticker_alvo, ano, resultado_rating, lista_alertas, df_comparativo, df_completo_t):
+    def gerar_relatorio_bytes(self, ticker_alvo, ano, resultado_rating, lista_alertas, resultado):
+        """
+        Gera o PDF inteiramente em memória e devolve os bytes
+        (nada é escrito em disco).
+        """
         
         print(f"Iniciando geração de PDF para {ticker_alvo} ({ano})...")
         
-        pdf = FPDF(orientation='P', unit='mm', format='A4')
+        # (Camada de apresentação: formatação vetorizada, em cache por
+        # resultado e partilhada com o dashboard)
+        df_comp_formatado, df_completo_t_formatado = formatar_resultado(resultado)
+        
+        pdf = fpdf.FPDF(orientation='P', unit='mm', format='A4')
         pdf.add_page()
         
         # --- Secções 2, 3, 4, 5 (Títulos, Rating, Alertas) ---
         pdf.set_font("Helvetica", 'B', 16)
-        pdf.cell(0, 10, f"Relatório de Análise de Crédito", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
+        pdf.cell(0, 10, f"Relatório de Análise de Crédito", new_x=fpdf_enums.XPos.LMARGIN, new_y=fpdf_enums.YPos.NEXT, align='C')
         pdf.set_font("Helvetica", 'B', 14)
-        pdf.cell(0, 10, f"Empresa Alvo: {ticker_alvo.upper()} | Ano: {ano}", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
+        pdf.cell(0, 10, f"Empresa Alvo: {ticker_alvo.upper()} | Ano: {ano}", new_x=fpdf_enums.XPos.LMARGIN, new_y=fpdf_enums.YPos.NEXT, align='C')
         pdf.set_font("Helvetica", '', 8)
         data_geracao = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
-        pdf.cell(0, 10, f"Gerado em: {data_geracao}", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
+        pdf.cell(0, 10, f"Gerado em: {data_geracao}", new_x=fpdf_enums.XPos.LMARGIN, new_y=fpdf_enums.YPos.NEXT, align='C')
         pdf.ln(10)
         pdf.set_font("Helvetica", 'B', 12)
-        pdf.cell(0, 7, "Rating de Crédito (Absoluto):", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
+        pdf.cell(0, 7, "Rating de Crédito (Absoluto):", new_x=fpdf_enums.XPos.LMARGIN, new_y=fpdf_enums.YPos.NEXT, align='L')
         pdf.ln(2)
         pdf.set_font("Helvetica", 'B', 24)
-        pdf.cell(0, 10, resultado_rating['rating'], new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
+        pdf.cell(0, 10, resultado_rating['rating'], new_x=fpdf_enums.XPos.LMARGIN, new_y=fpdf_enums.YPos.NEXT, align='L')
         pdf.set_font("Helvetica", '', 10)
-        pdf.cell(0, 7, f"Score Final (0-100): {resultado_rating['score_final']:.2f}", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
+        pdf.cell(0, 7, f"Score Final (0-100): {resultado_rating['score_final']:.2f}", new_x=fpdf_enums.XPos.LMARGIN, new_y=fpdf_enums.YPos.NEXT, align='L')
         detalhes = resultado_rating['detalhes_scores']
         pdf.set_font("Helvetica", '', 8)
         pdf.cell(0, 5, f"Detalhes: Liquidez ({detalhes['score_liquidez']:.0f}) | Endividamento ({detalhes['score_endividamento']:.0f}) | Rentabilidade ({detalhes['score_rentabilidade']:.0f})",
-                 new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
+                 new_x=fpdf_enums.XPos.LMARGIN, new_y=fpdf_enums.YPos.NEXT, align='L')
         pdf.ln(10)
         pdf.set_font("Helvetica", 'B', 12)
-        pdf.cell(0, 7, "Conclusões e Sinais de Alerta (vs. Média do Setor):", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
+        pdf.cell(0, 7, "Conclusões e Sinais de Alerta (vs. Média do Setor):", new_x=fpdf_enums.XPos.LMARGIN, new_y=fpdf_enums.YPos.NEXT, align='L')
         pdf.ln(2)
         pdf.set_font("Helvetica", '', 10)
         largura_texto = pdf.w - pdf.l_margin - pdf.r_margin
@@ -126,76 +151,78 @@ class GeradorRelatorioPDF:
                 pdf.set_text_color(194, 24, 7)
             elif "[GREEN FLAG]" in alerta:
                 pdf.set_text_color(0, 128, 0)
-            pdf.multi_cell(largura_texto, 5, f"- {alerta}", new_x=XPos.LMARGIN)
+            pdf.multi_cell(largura_texto, 5, f"- {alerta}", new_x=fpdf_enums.XPos.LMARGIN)
             pdf.set_text_color(0, 0, 0)
         pdf.ln(10)
         
         # --- Seção 8 (Tabela Comparativa) ---
         pdf.set_font("Helvetica", 'B', 12)
-        pdf.cell(0, 7, "Análise Comparativa (Empresa vs. Média do Setor):", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
+        pdf.cell(0, 7, "Análise Comparativa (Empresa vs. Média do Setor):", new_x=fpdf_enums.XPos.LMARGIN, new_y=fpdf_enums.YPos.NEXT, align='L')
         pdf.ln(2)
-        df_comp_renomeado = df_comparativo.rename(index=self.TRADUCAO_INDICADORES)
-        dados_tabela_comp = [ [df_comp_renomeado.index.name or 'Indicador'] + list(df_comp_renomeado.columns) ]
-        for idx, row in df_comp_renomeado.iterrows():
-            linha_formatada = [idx]
-            for val in row:
-                if idx in self.perc_traduzidos:
-                    linha_formatada.append(f"{val*100:.2f}%")
-                else:
-                    linha_formatada.append(f"{val:.2f}")
-            dados_tabela_comp.append(linha_formatada)
-        
-        # O alinhamento "CENTER" está aqui:
-        self._escrever_tabela_pdf(pdf, dados_tabela_comp, 
-                                 col_widths=(60, 65, 65), 
-                                 text_align=("LEFT", "CENTER", "CENTER"))
+        self._escrever_tabela_pdf(pdf, df_comp_formatado, 'Indicador', col_widths=(60, 65, 65))
         pdf.ln(10)
 
-        # --- Seção 9 (Tabela Completa) ---
+        # --- Seção 9 (Tabela Completa, dividida em blocos de pares) ---
         pdf.set_font("Helvetica", 'B', 12)
-        pdf.cell(0, 7, "Indicadores Detalhados (Todos os Pares):", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
+        pdf.cell(0, 7, "Indicadores Detalhados (Todos os Pares):", new_x=fpdf_enums.XPos.LMARGIN, new_y=fpdf_enums.YPos.NEXT, align='L')
         pdf.ln(2)
+        self._escrever_tabela_pares_paginada(pdf, df_completo_t_formatado)
         
-        df_completo_t_renomeado = df_completo_t.rename(columns=self.TRADUCAO_INDICADORES)
-        dados_tabela_completa = [ [df_completo_t_renomeado.index.name or 'Empresa'] + list(df_completo_t_renomeado.columns) ]
-        for idx, row in df_completo_t_renomeado.iterrows():
-            linha_formatada = [idx]
-            for nome_coluna, val in row.items():
-                if nome_coluna in self.perc_traduzidos:
-                    linha_formatada.append(f"{val*100:.2f}%")
-                else:
-                    linha_formatada.append(f"{val:.2f}")
-            dados_tabela_completa.append(linha_formatada)
-        
-        # --- LÓGICA DE LARGURA DINÂMICA ---
-        num_colunas = len(dados_tabela_completa[0])
-        largura_primeira_coluna = 50 
-        largura_pagina_util = 190 
-        largura_restante = largura_pagina_util - largura_primeira_coluna
-        num_colunas_dados = num_colunas - 1
-        
-        if num_colunas_dados > 0:
-            largura_coluna_dados = largura_restante / num_colunas_dados
-        else:
-            largura_coluna_dados = largura_restante
-            
-        col_widths = [largura_primeira_coluna] + [largura_coluna_dados] * num_colunas_dados
-        
-        # O alinhamento "CENTER" está aqui:
-        text_align = ["LEFT"] + ["CENTER"] * num_colunas_dados
-        
-        self._escrever_tabela_pdf(pdf, dados_tabela_completa,
-                                  col_widths=tuple(col_widths), 
-                                  text_align=tuple(text_align)) 
+        return bytes(pdf.output())
+
+    def chave_relatorio(self, ticker_alvo, ano, resultado_rating, lista_alertas, resultado):
+        """
+        Chave "content-addressed" do relatório: hash das entradas
+        (ticker, ano, rating, alertas) + impressão digital dos dados.
+        """
+        entradas = json.dumps(
+            [ticker_alvo.upper(), int(ano), resultado_rating, list(lista_alertas)],
+            sort_keys=True, default=str
+        )
+        h = hashlib.sha256(entradas.encode('utf-8'))
+        h.update(resultado.impressao_digital().encode('ascii'))
+        return h.hexdigest()
+
+    def obter_relatorio_bytes(self, ticker_alvo, ano, resultado_rating, lista_alertas, resultado):
+        """
+        Como gerar_relatorio_bytes, mas com cache em memória (LRU):
+        o mesmo relatório (mesmas entradas e dados) nunca é renderizado
+        duas vezes. Retorna (chave, bytes_pdf).
+        """
+        chave = self.chave_relatorio(ticker_alvo, ano, resultado_rating, lista_alertas, resultado)
+        with self._lock_cache:
+            if chave in self._cache_pdfs:
+                self._cache_pdfs.move_to_end(chave)
+                return chave, self._cache_pdfs[chave]
+        
+        conteudo_pdf = self.gerar_relatorio_bytes(ticker_alvo, ano, resultado_rating, lista_alertas, resultado)
+        
+        with self._lock_cache:
+            self._cache_pdfs[chave] = conteudo_pdf
+            self._cache_pdfs.move_to_end(chave)
+            while len(self._cache_pdfs) > self.MAX_RELATORIOS_EM_CACHE:
+                self._cache_pdfs.popitem(last=False) # (Remove o menos usado)
+        return chave, conteudo_pdf
+
+    def gerar_relatorio(self, ticker_alvo, ano, resultado_rating, lista_alertas, resultado):
+        """
+        Gera o PDF e guarda-o em config.CAMINHO_OUTPUT_REPORTS.
+        Retorna o caminho do arquivo (ou None se falhar).
+        """
+        conteudo_pdf = self.gerar_relatorio_bytes(ticker_alvo, ano, resultado_rating, lista_alertas, resultado)
         
-        # 10. Guardar o Arquivo PDF
+        # 10. Guardar o Arquivo PDF (a pasta só é criada quando se grava)
+        os.makedirs(self.diretorio_relatorios_pdf, exist_ok=True)
         nome_pdf = f"Relatorio_Analise_{ticker_alvo.upper()}_{ano}.pdf"
         caminho_pdf = os.path.join(self.diretorio_relatorios_pdf, nome_pdf)
         
         try:
-            pdf.output(caminho_pdf)
+            with open(caminho_pdf, 'wb') as f:
+                f.write(conteudo_pdf)
             print(f"\n--- SUCESSO! ---")
             print(f"Relatório PDF gerado em: {caminho_pdf}")
+            return caminho_pdf
         except Exception as e:
             print(f"\n--- ERRO AO SALVAR PDF ---")
-            print(f"Erro: {e}")
\ No newline at end of file
+            print(f"Erro: {e}")
+            return None
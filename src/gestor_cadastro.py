@@ -1,21 +1,30 @@
-import pandas as pd
-import requests
+from ._dependencias import pd
+from ._dependencias import requests
 import os
 import sys
+import threading
 from datetime import datetime, timedelta
-import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+from .diagnosticos import Diagnosticos, registar_diagnostico
 
 class GestorCadastro:
     
-    def __init__(self):
+    def __init__(self, cache_disco=None):
         # Usa as constantes do config.py
         self.url_cadastro_cvm = config.URL_CADASTRO_CVM
         self.diretorio_cadastro_raw = config.CAMINHO_RAW_CADASTRO_CVM
         self.caminho_arquivo_cvm = config.ARQUIVO_CADASTRO_CVM
         self.caminho_mapa_ticker = config.ARQUIVO_MAPA_TICKER_CNPJ
         
+        # (Opcional) GestorCacheDisco: limita o espaço ocupado em data/raw/
+        self.cache_disco = cache_disco
+        
         self.df_cadastro_cvm = None 
         self.df_mapa_ticker = None 
+        # Locks das cargas "preguiçosas": a instância é partilhada entre
+        # sessões/threads e cada arquivo só deve ser lido/baixado uma vez
+        self._lock_mapa = threading.Lock()
+        self._lock_cadastro = threading.Lock()
         
         os.makedirs(self.diretorio_cadastro_raw, exist_ok=True)
         print("GestorCadastro iniciado.")
@@ -23,17 +32,26 @@ class GestorCadastro:
     def _carregar_mapa_ticker(self):
         if self.df_mapa_ticker is not None:
             return True 
-            
+        
+        with self._lock_mapa:
+            if self.df_mapa_ticker is not None:
+                return True # (Carregado por outra thread enquanto esperávamos)
+            return self._ler_mapa_ticker()
+
+    def _ler_mapa_ticker(self):
         try:
-            self.df_mapa_ticker = pd.read_csv(
+            # (Montado numa variável local e só publicado no fim: as outras
+            # threads nunca veem um DataFrame a meio da preparação)
+            df_mapa_ticker = pd.read_csv(
                 self.caminho_mapa_ticker,
                 sep=';', 
                 encoding='utf-8-sig', 
                 header=None, 
                 names=['CNPJ', 'TICKER', 'NOME_EMPRESA'] 
             )
-            self.df_mapa_ticker['TICKER'] = self.df_mapa_ticker['TICKER'].astype(str).str.strip()
-            self.df_mapa_ticker['CNPJ'] = self.df_mapa_ticker['CNPJ'].astype(str).str.strip()
+            df_mapa_ticker['TICKER'] = df_mapa_ticker['TICKER'].astype(str).str.strip()
+            df_mapa_ticker['CNPJ'] = df_mapa_ticker['CNPJ'].astype(str).str.strip()
+            self.df_mapa_ticker = df_mapa_ticker
             print("Mapa Ticker <-> CNPJ carregado com sucesso.")
             return True
         except FileNotFoundError:
@@ -56,9 +74,13 @@ class GestorCadastro:
             try:
                 response = requests.get(self.url_cadastro_cvm)
                 response.raise_for_status()
-                with open(self.caminho_arquivo_cvm, 'wb') as f:
+                caminho_parcial = f"{self.caminho_arquivo_cvm}.parcial"
+                with open(caminho_parcial, 'wb') as f:
                     f.write(response.content)
+                os.replace(caminho_parcial, self.caminho_arquivo_cvm) # (Atómico)
                 print(f"Arquivo de cadastro CVM salvo em: {self.caminho_arquivo_cvm}")
+                if self.cache_disco is not None:
+                    self.cache_disco.impor_limite(proteger=[self.caminho_arquivo_cvm])
             except requests.exceptions.RequestException as e:
                 print(f"ERRO CRÍTICO: Falha ao baixar o arquivo de cadastro CVM: {e}")
                 return False
@@ -67,15 +89,22 @@ class GestorCadastro:
     def _carregar_cadastro_cvm(self):
         if self.df_cadastro_cvm is not None:
             return True 
+        
+        with self._lock_cadastro:
+            if self.df_cadastro_cvm is not None:
+                return True # (Carregado por outra thread enquanto esperávamos)
+            return self._ler_cadastro_cvm()
+
+    def _ler_cadastro_cvm(self):
         if not self._baixar_cadastro_cvm_se_necessario():
             return False
         try:
-            self.df_cadastro_cvm = pd.read_csv(
+            df_cadastro_cvm = pd.read_csv(
                 self.caminho_arquivo_cvm,
                 sep=';',
                 encoding='latin1'
             )
-            self.df_cadastro_cvm = self.df_cadastro_cvm[self.df_cadastro_cvm['SIT'] == 'ATIVO'].copy()
+            self.df_cadastro_cvm = df_cadastro_cvm[df_cadastro_cvm['SIT'] == 'ATIVO'].copy()
             print(f"Cadastro CVM (CNPJ -> Setor) carregado e filtrado. Total de {len(self.df_cadastro_cvm)} empresas ativas.")
             return True
         except FileNotFoundError:
@@ -92,7 +121,9 @@ class GestorCadastro:
             cnpj = self.df_mapa_ticker.loc[self.df_mapa_ticker['TICKER'] == ticker.upper(), 'CNPJ'].iloc[0]
             return cnpj
         except IndexError:
-            print(f"AVISO: Ticker {ticker} não encontrado no 'mapa_ticker_cnpj.csv'.")
+            # (DEBUG: quem pediu decide o que fazer, ex: a análise de pares regista a exclusão)
+            registar_diagnostico(Diagnosticos.DEBUG, 'TICKER_DESCONHECIDO', f"AVISO: Ticker {ticker} não encontrado no 'mapa_ticker_cnpj.csv'.",
+                                 empresa=ticker, etapa='cadastro')
             return None
         except Exception as e:
             print(f"ERRO ao procurar CNPJ por Ticker: {e}")
@@ -117,7 +148,8 @@ class GestorCadastro:
             setor = self.df_cadastro_cvm.loc[self.df_cadastro_cvm['CNPJ_CIA'] == cnpj_alvo, 'SETOR_ATIV'].iloc[0]
             return setor
         except IndexError:
-            print(f"AVISO: CNPJ {cnpj_alvo} não encontrado no cadastro CVM de empresas ativas.")
+            registar_diagnostico(Diagnosticos.AVISO, 'EMPRESA_INATIVA', f"AVISO: CNPJ {cnpj_alvo} não encontrado no cadastro CVM de empresas ativas.",
+                                 empresa=cnpj_alvo, etapa='cadastro')
             return None
         except Exception as e:
             print(f"ERRO ao procurar setor por CNPJ: {e}")
@@ -0,0 +1,83 @@
+from ._dependencias import pd
+
+
+class HierarquiaContas:
+    """
+    Árvore do plano de contas da CVM, pelos prefixos do CD_CONTA
+    ('2.02.01' e '2.02.02' são filhas de '2.02').
+
+    Quando uma conta pedida falta a uma empresa mas as suas filhas
+    existem, o valor é recuperado pela SOMA das filhas, para todas as
+    empresas de uma vez (groupby por CNPJ e conta-pai, de baixo para
+    cima, nível a nível), e a linha criada fica marcada (DERIVADA=True).
+
+    Uso (por arquivo de demonstrativo):
+    1. codigos_a_ler: contas pedidas + descendentes até 'profundidade'
+       níveis abaixo (calculado sobre os CD_CONTA únicos do arquivo).
+    2. completar: cria as contas-pai em falta e devolve só as pedidas.
+    """
+
+    def __init__(self, codigos, profundidade):
+        self.codigos = set(codigos)
+        self.profundidade = profundidade
+
+    @staticmethod
+    def nivel(cd_conta):
+        return cd_conta.count('.')
+
+    @staticmethod
+    def pai(cd_conta):
+        return cd_conta.rpartition('.')[0]
+
+    def _e_descendente(self, cd_conta):
+        """
+        True se cd_conta está até 'profundidade' níveis abaixo de uma conta pedida.
+        """
+        ancestral = cd_conta
+        for _ in range(self.profundidade):
+            ancestral = self.pai(ancestral)
+            if not ancestral:
+                return False
+            if ancestral in self.codigos:
+                return True
+        return False
+
+    def codigos_a_ler(self, codigos_arquivo):
+        """
+        Os CD_CONTA do arquivo que interessam: os pedidos e os seus descendentes.
+        """
+        return {cd for cd in codigos_arquivo if cd in self.codigos or self._e_descendente(cd)}
+
+    def completar(self, df):
+        """
+        Recebe as linhas lidas (todas as empresas, CNPJ_CIA / CD_CONTA /
+        VL_CONTA / ...) e devolve só as contas pedidas, com as contas-pai
+        em falta calculadas pela soma das filhas (coluna DERIVADA).
+        """
+        df = df.reset_index(drop=True).assign(DERIVADA=False)
+        if df.empty or self.profundidade <= 0:
+            return df[df['CD_CONTA'].isin(self.codigos)]
+
+        nivel_minimo = min(self.nivel(cd) for cd in self.codigos)
+        niveis = df['CD_CONTA'].map({cd: self.nivel(cd) for cd in df['CD_CONTA'].unique()})
+        for nivel in range(niveis.max(), nivel_minimo, -1):
+            # Filhas deste nível (originais ou derivadas no passo anterior)
+            filhas = df[niveis == nivel]
+            if filhas.empty:
+                continue
+            pais = filhas['CD_CONTA'].map({cd: self.pai(cd) for cd in filhas['CD_CONTA'].unique()})
+            somas = filhas.groupby([filhas['CNPJ_CIA'], pais.rename('CD_CONTA')], sort=False).agg(
+                ORDEM_EXERC=('ORDEM_EXERC', 'first'),
+                ESCALA_MOEDA=('ESCALA_MOEDA', 'first'),
+                VL_CONTA=('VL_CONTA', 'sum'),
+            )
+
+            # Só as contas-pai que a empresa NÃO tem
+            existentes = pd.MultiIndex.from_frame(df.loc[niveis == nivel - 1, ['CNPJ_CIA', 'CD_CONTA']])
+            em_falta = somas[~somas.index.isin(existentes)]
+            if not em_falta.empty:
+                novas = em_falta.reset_index().assign(DERIVADA=True)[df.columns]
+                df = pd.concat([df, novas], ignore_index=True)
+                niveis = pd.concat([niveis, pd.Series(nivel - 1, index=novas.index)], ignore_index=True)
+
+        return df[df['CD_CONTA'].isin(self.codigos)]
\ No newline at end of file
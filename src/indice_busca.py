@@ -0,0 +1,163 @@
+import difflib
+import unicodedata
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+
+
+def normalizar_texto(texto):
+    """
+    Maiúsculas e sem acentos ("Petróleo" -> "PETROLEO"), para a busca
+    não depender de como o utilizador escreve.
+    """
+    texto = unicodedata.normalize('NFKD', str(texto))
+    return ''.join(c for c in texto if not unicodedata.combining(c)).upper().strip()
+
+
+class _NoTrie:
+    __slots__ = ('filhos', 'tickers')
+
+    def __init__(self):
+        self.filhos = {}
+        self.tickers = [] # (Todos os tickers "abaixo" deste nó, por ordem de inserção)
+
+
+class IndiceBusca:
+    """
+    Índice de busca do dashboard, construído UMA vez (a partir do
+    mapa Ticker <-> CNPJ e do cadastro CVM do GestorCadastro):
+
+    - Trie de prefixos sobre os tickers e as palavras dos nomes das
+      empresas: cada nó já guarda os tickers que lhe correspondem, por
+      isso uma busca custa O(tamanho do prefixo), sem varrer DataFrames.
+    - Mapa Setor -> Tickers (e Ticker -> Setor), para sugerir pares.
+    - Busca "fuzzy" por nome (difflib) como recurso quando o prefixo
+      não encontra nada (ex: erros de digitação).
+    """
+
+    def __init__(self, gestor):
+        self.gestor = gestor
+        self.MIN_TAMANHO_PALAVRA = config.MIN_TAMANHO_PALAVRA_BUSCA
+
+        self._raiz_tickers = _NoTrie()
+        self._raiz_nomes = _NoTrie()
+        self._palavras = {}         # palavra do nome -> [tickers]
+        self.nomes = {}             # ticker -> nome da empresa
+        self.cnpjs = {}             # ticker -> CNPJ
+        self.setores = {}           # ticker -> setor
+        self.tickers_por_setor = {} # setor -> [tickers]
+        self.tickers = []           # (ordenados)
+        self.construido = False
+
+    # --- CONSTRUÇÃO ---
+
+    def _inserir(self, raiz, chave, ticker):
+        no = raiz
+        for caractere in chave:
+            no = no.filhos.setdefault(caractere, _NoTrie())
+            if not no.tickers or no.tickers[-1] != ticker: # (Sem repetidos seguidos)
+                no.tickers.append(ticker)
+
+    def construir(self):
+        """
+        Carrega o mapa (obrigatório) e o cadastro (opcional: sem ele não há
+        sugestões por setor) e monta as estruturas. Retorna True/False.
+        """
+        if self.construido:
+            return True
+        if not self.gestor._carregar_mapa_ticker():
+            return False
+
+        df_mapa = self.gestor.df_mapa_ticker.drop_duplicates('TICKER').sort_values('TICKER')
+        for cnpj, ticker, nome in df_mapa[['CNPJ', 'TICKER', 'NOME_EMPRESA']].itertuples(index=False):
+            ticker = ticker.upper()
+            nome = '' if nome != nome else str(nome) # (nan -> '')
+            self.tickers.append(ticker)
+            self.cnpjs[ticker] = cnpj
+            self.nomes[ticker] = nome
+            self._inserir(self._raiz_tickers, ticker, ticker)
+            for palavra in set(normalizar_texto(nome).replace('/', ' ').replace('.', ' ').split()):
+                if len(palavra) >= self.MIN_TAMANHO_PALAVRA:
+                    self._inserir(self._raiz_nomes, palavra, ticker)
+                    self._palavras.setdefault(palavra, []).append(ticker)
+
+        # Setor (via cadastro CVM, junção pelo CNPJ)
+        if self.gestor._carregar_cadastro_cvm():
+            setor_por_cnpj = dict(zip(self.gestor.df_cadastro_cvm['CNPJ_CIA'], self.gestor.df_cadastro_cvm['SETOR_ATIV']))
+            for ticker in self.tickers:
+                setor = setor_por_cnpj.get(self.cnpjs[ticker])
+                if isinstance(setor, str):
+                    self.setores[ticker] = setor
+                    self.tickers_por_setor.setdefault(setor, []).append(ticker)
+        else:
+            print("AVISO: Cadastro CVM indisponível. Sugestões de pares por setor desativadas.")
+
+        self.construido = True
+        print(f"IndiceBusca construído: {len(self.tickers)} tickers, {len(self.tickers_por_setor)} setores.")
+        return True
+
+    # --- CONSULTAS ---
+
+    def _buscar_no(self, raiz, prefixo):
+        no = raiz
+        for caractere in prefixo:
+            no = no.filhos.get(caractere)
+            if no is None:
+                return []
+        return no.tickers
+
+    def buscar_prefixo(self, prefixo, limite=None):
+        """
+        Tickers que começam pelo prefixo e, depois, empresas com
+        alguma palavra do nome a começar pelo prefixo.
+        """
+        limite = limite or config.MAX_SUGESTOES_BUSCA
+        prefixo = normalizar_texto(prefixo)
+        if not prefixo:
+            return []
+        resultado = list(self._buscar_no(self._raiz_tickers, prefixo)[:limite])
+        if len(resultado) < limite:
+            vistos = set(resultado)
+            for ticker in self._buscar_no(self._raiz_nomes, prefixo):
+                if ticker not in vistos:
+                    resultado.append(ticker)
+                    vistos.add(ticker)
+                    if len(resultado) == limite:
+                        break
+        return resultado
+
+    def buscar_nome(self, texto, limite=None):
+        """
+        Busca por nome com várias palavras ("petro brasil"): cada palavra
+        é um prefixo e o resultado é a interseção. Se nada for encontrado,
+        tenta palavras parecidas (tolerância a erros de digitação).
+        """
+        limite = limite or config.MAX_SUGESTOES_BUSCA
+        palavras = [p for p in normalizar_texto(texto).split() if p]
+        if not palavras:
+            return []
+
+        candidatos = None
+        for palavra in palavras:
+            encontrados = self._buscar_no(self._raiz_nomes, palavra) or self._buscar_no(self._raiz_tickers, palavra)
+            if not encontrados:
+                # Recurso "fuzzy": palavras do vocabulário mais parecidas
+                parecidas = difflib.get_close_matches(palavra, self._palavras.keys(), n=3, cutoff=0.75)
+                encontrados = [t for p in parecidas for t in self._palavras[p]]
+            conjunto = set(encontrados)
+            candidatos = conjunto if candidatos is None else candidatos & conjunto
+            if not candidatos:
+                return []
+        return sorted(candidatos)[:limite]
+
+    def setor_do_ticker(self, ticker):
+        return self.setores.get(ticker.upper())
+
+    def sugerir_pares(self, ticker, limite=None):
+        """
+        Outros tickers do mesmo setor (cadastro CVM) do ticker alvo.
+        """
+        limite = limite or config.MAX_SUGESTOES_PARES
+        ticker = ticker.upper()
+        setor = self.setores.get(ticker)
+        if setor is None:
+            return []
+        return [t for t in self.tickers_por_setor[setor] if t != ticker][:limite]
@@ -0,0 +1,222 @@
+import os
+import threading
+from ._dependencias import np
+from ._dependencias import pd
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+from .diagnosticos import coletar_diagnosticos
+
+
+class IndiceCobertura:
+    """
+    Índice de COBERTURA dos dados: para cada (CNPJ, ano), se a empresa
+    tem demonstrativos CON/IND completos, se todas as contas essenciais
+    existem (e quais foram somadas das contas filhas) e se os indicadores
+    passam na validação (ValidadorIndicadores).
+
+    - Construído na ingestão (ex: pelo AquecedorDados), varrendo o ano
+      inteiro, e guardado em data/raw/derivados/ (revalidado pelo ZIP).
+    - Consultado ANTES de uma análise (dashboard, validar_inputs): um
+      pedido condenado (ex: "AVISO (Dados Faltantes)") é rejeitado com
+      uma consulta a um dicionário, sem baixar nem ler o ZIP.
+    - Ano sem índice construído = cobertura desconhecida: a consulta não
+      rejeita nada (a análise corre como antes).
+    """
+
+    # Motivo -> mensagem (MOTIVO na tabela; 'OK' = dados utilizáveis)
+    OK = 'OK'
+    MOTIVOS = {
+        'OK': "dados completos e indicadores válidos",
+        'SEM_DEMONSTRATIVOS': "sem demonstrativos 'ÚLTIMO' completos (CON ou IND)",
+        'CONTA_FALTANTE': "falta uma conta essencial nos demonstrativos",
+        'INDICADOR_INVALIDO': "indicadores inválidos", # (Códigos do ValidadorIndicadores)
+        'NAO_ENTREGOU': "não entregou demonstrativos neste ano",
+    }
+    COLUNAS = ['CNPJ_CIA', 'CON', 'IND', 'TIPO_DADOS', 'CONTAS_COMPLETAS', 'CONTAS_DERIVADAS',
+               'INDICADORES_VALIDOS', 'MOTIVO', 'DETALHE']
+
+    def __init__(self, analisador, tipo_doc="DFP"):
+        # (O analisador dá a calculadora, o gestor e a MESMA validação dos pares)
+        self.analisador = analisador
+        self.calculadora = analisador.calculadora
+        self.gestor = analisador.gestor
+        self.tipo_doc = tipo_doc
+        self.diretorio_derivados = config.CAMINHO_DADOS_DERIVADOS
+        os.makedirs(self.diretorio_derivados, exist_ok=True)
+
+        self._motivos = {}  # ano -> {cnpj: (MOTIVO, DETALHE)}
+        self._cnpj_por_ticker = None
+        self._locks = {}
+        self._lock_global = threading.Lock()
+
+    def _caminho(self, ano):
+        return os.path.join(self.diretorio_derivados, f"cobertura_{self.tipo_doc.lower()}_{ano}.csv")
+
+    # --- CONSTRUÇÃO ---
+
+    def _construir_tabela(self, ano):
+        """
+        Uma linha por CNPJ presente no ZIP do ano (CON ou IND, mesmo que
+        incompleto), com o motivo de a empresa (não) ser analisável.
+        """
+        presenca = self.calculadora.indice_presenca
+        with self.calculadora._usar_zip_ano(ano, self.tipo_doc) as arquivo_zip:
+            if arquivo_zip is None:
+                return None
+            df_presenca = presenca.obter_tabela(arquivo_zip, ano, self.tipo_doc)
+        if df_presenca is None:
+            return None
+
+        completos = df_presenca[presenca.DEMONSTRATIVOS].all(axis=1)
+        tipos_completos = df_presenca[completos].groupby('CNPJ_CIA')['TIPO'].agg(set)
+        tipos_por_cnpj = presenca.cnpjs_disponiveis(ano, self.tipo_doc)
+
+        linhas, calculadas = [], {}
+        # (Uma linha de resumo no fim, em vez de uma por empresa)
+        with coletar_diagnosticos(f"cobertura {ano}") as diagnosticos:
+            for cnpj in sorted(df_presenca['CNPJ_CIA'].unique()):
+                tipos = tipos_completos.get(cnpj, set())
+                tipo_dados = tipos_por_cnpj.get(cnpj)
+                contas_completas, derivadas, motivo = False, '', 'SEM_DEMONSTRATIVOS'
+                if tipo_dados is not None:
+                    contas, indicadores = self.calculadora.calcular_contas_e_indicadores(cnpj, ano, self.tipo_doc)
+                    contas_completas, motivo = contas is not None, 'CONTA_FALTANTE'
+                    if contas_completas:
+                        calculadas[len(linhas)] = indicadores
+                        derivadas = ','.join(self.calculadora.contas_derivadas(cnpj, ano, self.tipo_doc))
+                linhas.append([cnpj, 'CONSOLIDADO' in tipos, 'INDIVIDUAL' in tipos, tipo_dados or '',
+                               contas_completas, derivadas, False, motivo, ''])
+        print(diagnosticos.resumo())
+
+        # Validação de todas as empresas com contas de uma vez (códigos de motivo)
+        if calculadas:
+            validador = self.analisador.validador
+            nomes = self.calculadora.registro.nomes()
+            matriz = np.array([[indicadores[nome] for nome in nomes] for indicadores in calculadas.values()], dtype=np.float64)
+            codigos = validador.validar_matriz(matriz, nomes)
+            for posicao, i in enumerate(calculadas):
+                codigo = codigos[posicao]
+                linhas[i][6] = codigo == validador.OK
+                linhas[i][7] = codigo # (Código do validador, ex: 'ROE_EXTREMO')
+                linhas[i][8] = validador.descrever(codigo, matriz[posicao], nomes)
+
+        df_cobertura = pd.DataFrame(linhas, columns=self.COLUNAS)
+        print(f"INFO: Cobertura {ano}: {int(df_cobertura['INDICADORES_VALIDOS'].sum())} de {len(df_cobertura)} empresas analisáveis.")
+        return df_cobertura
+
+    def _publicar(self, ano, df_cobertura):
+        self._motivos[ano] = dict(zip(df_cobertura['CNPJ_CIA'], zip(df_cobertura['MOTIVO'], df_cobertura['DETALHE'])))
+
+    def _ler_do_disco(self, ano):
+        """
+        A tabela guardada do ano, ou None se não existir ou estiver
+        desatualizada face ao ZIP. (Sem o ZIP em disco, ex: despejado
+        do cache, a tabela guardada continua a valer.)
+        """
+        caminho = self._caminho(ano)
+        if not os.path.exists(caminho):
+            return None
+        caminho_zip = self.calculadora.coletor.caminho_zip(ano, self.tipo_doc)
+        if os.path.exists(caminho_zip) and os.path.getmtime(caminho) < os.path.getmtime(caminho_zip):
+            return None
+        df_cobertura = pd.read_csv(caminho, sep=';', dtype={'CNPJ_CIA': str}, keep_default_na=False)
+        if not set(self.COLUNAS).issubset(df_cobertura.columns):
+            return None # (Esquema antigo: reconstruir)
+        return df_cobertura
+
+    def construir(self, ano):
+        """
+        (Ingestão) Constrói ou revalida o índice do ano. Retorna True se
+        o ano ficou coberto.
+        """
+        with self._lock_global:
+            lock = self._locks.setdefault(ano, threading.Lock())
+
+        with lock:
+            try:
+                df_cobertura = self._ler_do_disco(ano)
+                if df_cobertura is None:
+                    print(f"INFO: Construindo índice de cobertura para {self.tipo_doc} {ano}...")
+                    df_cobertura = self._construir_tabela(ano)
+                    if df_cobertura is None:
+                        return False
+                    df_cobertura.to_csv(self._caminho(ano), sep=';', index=False)
+            except Exception as e:
+                print(f"ERRO ao construir o índice de cobertura de {ano}: {e}")
+                return False
+            self._publicar(ano, df_cobertura)
+            return True
+
+    def invalidar(self, ano):
+        with self._lock_global:
+            self._motivos.pop(ano, None)
+
+    # --- CONSULTAS (nunca baixam nem leem o ZIP) ---
+
+    def _obter_motivos(self, ano):
+        if ano not in self._motivos:
+            with self._lock_global:
+                lock = self._locks.setdefault(ano, threading.Lock())
+            with lock:
+                if ano not in self._motivos:
+                    try:
+                        df_cobertura = self._ler_do_disco(ano)
+                    except Exception as e:
+                        print(f"ERRO ao ler o índice de cobertura de {ano}: {e}")
+                        df_cobertura = None
+                    if df_cobertura is None:
+                        return None
+                    self._publicar(ano, df_cobertura)
+        return self._motivos[ano]
+
+    def _obter_cnpj(self, ticker):
+        if self._cnpj_por_ticker is None:
+            if not self.gestor._carregar_mapa_ticker():
+                return None
+            df_mapa = self.gestor.df_mapa_ticker
+            self._cnpj_por_ticker = df_mapa.drop_duplicates('TICKER').set_index('TICKER')['CNPJ'].to_dict()
+        return self._cnpj_por_ticker.get(ticker.strip().upper())
+
+    def ano_coberto(self, ano):
+        return self._obter_motivos(ano) is not None
+
+    def anos_cobertos(self, anos):
+        return [ano for ano in anos if self.ano_coberto(ano)]
+
+    def motivo(self, ticker, ano):
+        """
+        (MOTIVO, DETALHE) do ticker no ano, ou None se a cobertura do
+        ano (ou o ticker) for desconhecida.
+        """
+        motivos = self._obter_motivos(ano)
+        cnpj = self._obter_cnpj(ticker) if motivos is not None else None
+        if cnpj is None:
+            return None
+        return motivos.get(cnpj, ('NAO_ENTREGOU', ''))
+
+    def coberto(self, ticker, ano):
+        """
+        True/False se o ticker é (não é) analisável no ano;
+        None se não se sabe (ano sem índice).
+        """
+        motivo = self.motivo(ticker, ano)
+        return None if motivo is None else motivo[0] == self.OK
+
+    def mensagem(self, ticker, ano):
+        """
+        Texto para o utilizador quando o ticker não é analisável, ou None.
+        """
+        motivo = self.motivo(ticker, ano)
+        if motivo is None or motivo[0] == self.OK:
+            return None
+        codigo, detalhe = motivo
+        texto = self.MOTIVOS.get(codigo, self.MOTIVOS['INDICADOR_INVALIDO'])
+        return f"{ticker.strip().upper()} em {ano}: {texto}" + (f" ({detalhe})" if detalhe else "") + "."
+
+    def tickers_cobertos(self, ano, tickers):
+        """
+        Filtra uma lista de tickers pelos analisáveis no ano (sem índice
+        do ano, devolve a lista como está).
+        """
+        if not self.ano_coberto(ano):
+            return list(tickers)
+        return [ticker for ticker in tickers if self.coberto(ticker, ano) is not False]
\ No newline at end of file
@@ -0,0 +1,168 @@
+from ._dependencias import pd
+import os
+import threading
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+
+
+class IndicePresenca:
+    """
+    Índice de Presença (por ano): quais CNPJs têm linhas 'ÚLTIMO'
+    em cada demonstrativo (DRE/BPA/BPP), nos arquivos CON e IND.
+
+    É construído UMA vez por ano (na primeira leitura do ZIP), lendo
+    apenas as colunas CNPJ_CIA e ORDEM_EXERC, e guardado em disco
+    (data/raw/derivados/). Com ele, a Calculadora vai direto ao conjunto
+    certo de arquivos (CON ou IND) e desiste logo se a empresa não
+    tem os demonstrativos, sem fazer o parse duplo CON -> IND.
+    """
+
+    # Tipo de dados (como a Calculadora os chama) -> sufixo no ZIP
+    TIPOS = {'CONSOLIDADO': 'con', 'INDIVIDUAL': 'ind'}
+
+    def __init__(self):
+        self.DEMONSTRATIVOS = config.DEMONSTRATIVOS_INDICE_PRESENCA
+        self.ARQUIVOS_DEMONSTRATIVOS = config.ARQUIVOS_DEMONSTRATIVOS_CVM
+        self.diretorio_derivados = config.CAMINHO_DADOS_DERIVADOS
+        os.makedirs(self.diretorio_derivados, exist_ok=True)
+
+        # (tipo_doc, ano) -> {cnpj: 'CONSOLIDADO' | 'INDIVIDUAL'}
+        self._indices = {}
+        self._tabelas = {}
+        self._assinaturas = {} # (tipo_doc, ano) -> assinatura do ZIP de onde veio a tabela
+        self._locks = {}
+        self._lock_global = threading.Lock()
+
+    def _caminho_indice(self, ano, tipo_doc):
+        return os.path.join(self.diretorio_derivados, f"presenca_{tipo_doc.lower()}_{ano}.csv")
+
+    def _construir_tabela(self, arquivo_zip, ano):
+        """
+        Lê os arquivos do ZIP (só 2 colunas) e monta a tabela
+        CNPJ_CIA | TIPO | DRE | BPA | BPP (True = tem linhas 'ÚLTIMO').
+        """
+        presencas_por_tipo = {}
+        for tipo, sufixo_tipo in self.TIPOS.items():
+            presencas = {}
+            for demonstrativo in self.DEMONSTRATIVOS:
+                cnpjs = set()
+                for prefixo in self.ARQUIVOS_DEMONSTRATIVOS[demonstrativo]:
+                    try:
+                        membro = arquivo_zip.abrir(f"{prefixo}_{sufixo_tipo}_{ano}.csv")
+                    except FileNotFoundError:
+                        continue
+                    with membro:
+                        df = pd.read_csv(
+                            membro, sep=';', encoding='latin1',
+                            usecols=['CNPJ_CIA', 'ORDEM_EXERC'], dtype={'CNPJ_CIA': str}
+                        )
+                    cnpjs.update(df.loc[df['ORDEM_EXERC'] == 'ÚLTIMO', 'CNPJ_CIA'].unique())
+                presencas[demonstrativo] = cnpjs
+            presencas_por_tipo[tipo] = presencas
+
+        return self._montar_tabela(presencas_por_tipo)
+
+    def _montar_tabela(self, presencas_por_tipo):
+        """
+        {tipo: {demonstrativo: CNPJs com 'ÚLTIMO'}} -> tabela de presença.
+        """
+        partes = []
+        for tipo, presencas in presencas_por_tipo.items():
+            todos_cnpjs = sorted(set().union(*presencas.values()))
+            df_tipo = pd.DataFrame({'CNPJ_CIA': todos_cnpjs, 'TIPO': tipo})
+            for demonstrativo, cnpjs in presencas.items():
+                df_tipo[demonstrativo] = df_tipo['CNPJ_CIA'].isin(cnpjs)
+            partes.append(df_tipo)
+
+        return pd.concat(partes, ignore_index=True)
+
+    def _mapear_tipos(self, df_tabela):
+        """
+        CNPJ -> tipo de dados a usar: CONSOLIDADO se tem todos os
+        demonstrativos em CON; senão INDIVIDUAL se tem todos em IND.
+        """
+        completos = df_tabela[df_tabela[self.DEMONSTRATIVOS].all(axis=1)]
+        mapa = {}
+        for tipo in ['INDIVIDUAL', 'CONSOLIDADO']: # (CON por último = prioridade)
+            for cnpj in completos.loc[completos['TIPO'] == tipo, 'CNPJ_CIA']:
+                mapa[cnpj] = tipo
+        return mapa
+
+    def obter_tabela(self, arquivo_zip, ano, tipo_doc="DFP"):
+        """
+        Devolve a tabela de presença do ano (memória -> disco -> construção).
+        Só uma thread constrói cada ano; as outras esperam pelo resultado.
+        Se o ZIP mudou (ex: baixado de novo), a tabela é revalidada.
+        """
+        chave = (tipo_doc.upper(), ano)
+        if chave in self._tabelas and self._assinaturas.get(chave) == arquivo_zip.assinatura:
+            return self._tabelas[chave]
+
+        with self._lock_global:
+            lock = self._locks.setdefault(chave, threading.Lock())
+
+        with lock:
+            if chave in self._tabelas and self._assinaturas.get(chave) == arquivo_zip.assinatura:
+                return self._tabelas[chave]
+
+            caminho = self._caminho_indice(ano, tipo_doc)
+            mtime_zip = os.path.getmtime(arquivo_zip.caminho_zip)
+            try:
+                df_tabela = None
+                if os.path.exists(caminho) and os.path.getmtime(caminho) >= mtime_zip:
+                    df_tabela = pd.read_csv(caminho, sep=';', dtype={'CNPJ_CIA': str})
+                    if not set(self.DEMONSTRATIVOS).issubset(df_tabela.columns):
+                        df_tabela = None # (Índice antigo, com outros demonstrativos)
+                if df_tabela is None:
+                    print(f"INFO: Construindo índice de presença (CON/IND) para {tipo_doc} {ano}...")
+                    df_tabela = self._construir_tabela(arquivo_zip, ano)
+                    df_tabela.to_csv(caminho, sep=';', index=False)
+            except Exception as e:
+                print(f"ERRO ao construir o índice de presença de {ano}: {e}")
+                return None
+
+            self._indices[chave] = self._mapear_tipos(df_tabela)
+            self._tabelas[chave] = df_tabela
+            self._assinaturas[chave] = arquivo_zip.assinatura
+            return df_tabela
+
+    def registar_presencas(self, ano, tipo_doc, presencas_por_tipo, assinatura=None):
+        """
+        Constrói o índice do ano a partir de presenças já lidas FORA
+        daqui ({tipo: {demonstrativo: CNPJs com 'ÚLTIMO'}}, ex: pelo
+        PipelineIngestao, no mesmo parse dos demonstrativos), sem voltar
+        a ler o ZIP. 'assinatura': a do ZIP lido. Não faz nada se o ano
+        já está carregado (da mesma versão do ZIP).
+        """
+        chave = (tipo_doc.upper(), ano)
+        with self._lock_global:
+            lock = self._locks.setdefault(chave, threading.Lock())
+
+        with lock:
+            if chave in self._tabelas and self._assinaturas.get(chave) == assinatura:
+                return self._tabelas[chave]
+            try:
+                df_tabela = self._montar_tabela(presencas_por_tipo)
+                df_tabela.to_csv(self._caminho_indice(ano, tipo_doc), sep=';', index=False)
+            except Exception as e:
+                print(f"ERRO ao gravar o índice de presença de {ano}: {e}")
+                return None
+
+            self._indices[chave] = self._mapear_tipos(df_tabela)
+            self._tabelas[chave] = df_tabela
+            self._assinaturas[chave] = assinatura
+            return df_tabela
+
+    def tipo_disponivel(self, ano, cnpj, tipo_doc="DFP"):
+        """
+        Retorna 'CONSOLIDADO', 'INDIVIDUAL' ou None (sem dados completos).
+        (Chame obter_tabela antes, para garantir que o ano está carregado.)
+        """
+        return self._indices.get((tipo_doc.upper(), ano), {}).get(cnpj)
+
+    def cnpjs_disponiveis(self, ano, tipo_doc="DFP"):
+        """
+        {cnpj: 'CONSOLIDADO' | 'INDIVIDUAL'} de TODAS as empresas com
+        dados completos no ano (ex: para exportar o mercado inteiro).
+        (Chame obter_tabela antes, para garantir que o ano está carregado.)
+        """
+        return dict(self._indices.get((tipo_doc.upper(), ano), {}))
\ No newline at end of file
@@ -1,6 +1,7 @@
-import pandas as pd
+from ._dependencias import pd
+from ._dependencias import np
 import sys
-import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
 
 class ModeloRating:
     
@@ -12,6 +13,7 @@ class ModeloRating:
         self.BAREMA_DPL = config.BAREMA_DIVIDA_PL
         self.BAREMA_ROE = config.BAREMA_ROE
         self.FAIXAS_RATING = config.FAIXAS_RATING
+        self.ROTULOS_RATING = [rating for _, rating in self.FAIXAS_RATING]
         
         print("ModeloRating iniciado com sucesso.")
 
@@ -35,6 +37,62 @@ class ModeloRating:
                 return rating
         return "D" # Default (o último da lista)
 
+    # --- VERSÕES VETORIZADAS (para teste_estresse.py) ---
+    def _pontuar_indicador_vetorizado(self, valores, barema, menor_melhor=False):
+        """
+        Igual a _pontuar_indicador, mas para um array NumPy inteiro.
+        O np.select escolhe a PRIMEIRA condição verdadeira, tal como o loop.
+        ('nan' não satisfaz nenhuma condição e recebe 0, como no escalar.)
+        """
+        if menor_melhor:
+            condicoes = [valores < limite for limite, _ in barema]
+        else:
+            condicoes = [valores > limite for limite, _ in barema]
+        pontos = [float(p) for _, p in barema]
+        return np.select(condicoes, pontos, default=0.0)
+
+    def calcular_scores_vetorizado(self, liq_corrente, endividamento_geral, divida_pl, roe):
+        """
+        Calcula o score final (0-100) para arrays de indicadores de qualquer
+        formato (ex: empresas x cenários). Mesma regra de calcular_rating_empresa.
+        """
+        pontos_lc = self._pontuar_indicador_vetorizado(liq_corrente, self.BAREMA_LC)
+        pontos_eg = self._pontuar_indicador_vetorizado(endividamento_geral, self.BAREMA_EG, menor_melhor=True)
+        pontos_dpl = self._pontuar_indicador_vetorizado(divida_pl, self.BAREMA_DPL, menor_melhor=True)
+        pontos_roe = self._pontuar_indicador_vetorizado(roe, self.BAREMA_ROE)
+
+        return (
+            (pontos_lc * self.PESOS_INDICADORES['LIQUIDEZ']) +
+            (((pontos_eg + pontos_dpl) / 2) * self.PESOS_INDICADORES['ENDIVIDAMENTO']) +
+            (pontos_roe * self.PESOS_INDICADORES['RENTABILIDADE'])
+        )
+
+    def converter_scores_para_indices_rating(self, scores):
+        """
+        Converte um array de scores em índices de self.ROTULOS_RATING
+        (0 = melhor rating). Scores abaixo de todas as faixas caem no último.
+        """
+        condicoes = [scores > limite for limite, _ in self.FAIXAS_RATING]
+        indices = np.arange(len(self.FAIXAS_RATING))
+        return np.select(condicoes, indices, default=len(self.FAIXAS_RATING) - 1)
+
+    def calcular_ratings_resultado(self, resultado):
+        """
+        Score e rating de TODAS as empresas de um ResultadoIndicadores
+        de uma só vez (as colunas do contentor são arrays NumPy).
+        Retorna {empresa: {'score_final': ..., 'rating': ...}}.
+        """
+        scores = self.calcular_scores_vetorizado(
+            resultado.coluna('liq_corrente'), resultado.coluna('endividamento_geral'),
+            resultado.coluna('divida_pl'), resultado.coluna('roe')
+        )
+        indices = self.converter_scores_para_indices_rating(scores)
+        return {
+            empresa: {'score_final': round(float(score), 2), 'rating': self.ROTULOS_RATING[indice]}
+            for empresa, score, indice in zip(resultado.empresas, scores, indices)
+        }
+    # --- FIM DAS VERSÕES VETORIZADAS ---
+
     def calcular_rating_empresa(self, indicadores_empresa):
         """
         Método PÚBLICO. Orquestra o cálculo de Rating.
@@ -0,0 +1,121 @@
+import threading
+from ._dependencias import np
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+
+
+class _IndiceAno:
+    """
+    Matriz de características (empresas x dimensões) de um ano, já
+    normalizada, pronta para a busca dos vizinhos mais próximos.
+    """
+    __slots__ = ('cnpjs', 'tickers', 'setores', 'matriz', '_posicoes')
+
+    def __init__(self, cnpjs, tickers, setores, matriz):
+        self.cnpjs = cnpjs
+        self.tickers = tickers
+        self.setores = setores
+        self.matriz = matriz
+        self._posicoes = {cnpj: i for i, cnpj in enumerate(cnpjs)}
+
+
+class BuscadorPares:
+    """
+    Seleção AUTOMÁTICA de pares por semelhança (k vizinhos mais próximos).
+
+    Características de cada empresa (a partir da tabela por empresa dos
+    AgregadosSetoriais, ou seja, do painel já extraído do ano):
+    - tamanho: log10(ativo_total), com peso config.PESO_TAMANHO_PARES;
+    - indicadores de config.INDICADORES_SIMILARIDADE, normalizados de
+      forma robusta (mediana / intervalo interquartil) e limitados a
+      +-config.LIMITE_Z_PARES, para um outlier não dominar a distância;
+    - setor CVM: empresas de outro setor pagam a penalidade
+      config.PENALIDADE_SETOR_PARES (só entram se o setor não chegar).
+
+    O índice de cada ano é construído UMA vez; uma consulta é um único
+    cálculo vetorizado de distâncias (NumPy) + argpartition, abaixo de
+    1 ms para os ~700 emissores da DFP (a esta escala, mais rápido do
+    que uma KD-tree em Python puro).
+    """
+
+    def __init__(self, agregados, gestor):
+        self.agregados = agregados
+        self.gestor = gestor
+        self.INDICADORES = config.INDICADORES_SIMILARIDADE
+        self.PESO_TAMANHO = config.PESO_TAMANHO_PARES
+        self.PENALIDADE_SETOR = config.PENALIDADE_SETOR_PARES
+        self.LIMITE_Z = config.LIMITE_Z_PARES
+
+        self._indices = {}
+        self._lock = threading.Lock()
+
+    # --- CONSTRUÇÃO ---
+
+    def _construir_indice(self, ano):
+        df_empresas = self.agregados.tabela_empresas(ano)
+        if df_empresas is None or not self.gestor._carregar_mapa_ticker():
+            return None
+
+        # Só entram empresas válidas (indicadores essenciais) e com ticker
+        tickers_por_cnpj = self.gestor.df_mapa_ticker.drop_duplicates('CNPJ').set_index('CNPJ')['TICKER']
+        essenciais = self.agregados.calculadora.registro.indicadores_essenciais()
+        df = df_empresas[
+            df_empresas['CNPJ_CIA'].isin(tickers_por_cnpj.index)
+            & df_empresas[essenciais].notna().all(axis=1)
+            & (df_empresas['ATIVO_TOTAL'] > 0)
+        ]
+        if df.empty:
+            return None
+
+        valores = df[self.INDICADORES].to_numpy(dtype=np.float64)
+        mediana = np.nanmedian(valores, axis=0)
+        iqr = np.nanpercentile(valores, 75, axis=0) - np.nanpercentile(valores, 25, axis=0)
+        iqr[~(iqr > 0)] = 1.0
+        z = np.clip((valores - mediana) / iqr, -self.LIMITE_Z, self.LIMITE_Z)
+        z[np.isnan(z)] = 0.0 # (Indicador em falta = "típico")
+
+        tamanho = np.log10(df['ATIVO_TOTAL'].to_numpy(dtype=np.float64))
+        tamanho = (tamanho - np.median(tamanho)) * self.PESO_TAMANHO
+
+        matriz = np.ascontiguousarray(np.column_stack([tamanho, z]))
+        cnpjs = df['CNPJ_CIA'].tolist()
+        return _IndiceAno(cnpjs, tickers_por_cnpj.loc[cnpjs].tolist(), df['SETOR_ATIV'].to_numpy(), matriz)
+
+    def _obter_indice(self, ano):
+        if ano not in self._indices:
+            with self._lock:
+                if ano not in self._indices:
+                    indice = self._construir_indice(ano)
+                    if indice is None:
+                        return None # (Ex: download falhou: o próximo pedido tenta de novo)
+                    self._indices[ano] = indice
+        return self._indices[ano]
+
+    # --- CONSULTA ---
+
+    def encontrar_pares(self, cnpj_alvo, ano, k=None):
+        """
+        Os k pares mais parecidos com a empresa alvo no ano.
+        Retorna [(ticker, cnpj, distancia)] por ordem de semelhança,
+        ou None se a empresa alvo não estiver no índice.
+        """
+        k = k or config.NUM_PARES_AUTOMATICOS
+        indice = self._obter_indice(ano)
+        if indice is None or cnpj_alvo not in indice._posicoes:
+            return None
+        posicao = indice._posicoes[cnpj_alvo]
+
+        diferencas = indice.matriz - indice.matriz[posicao]
+        distancias = np.sqrt(np.einsum('ij,ij->i', diferencas, diferencas))
+        distancias += self.PENALIDADE_SETOR * (indice.setores != indice.setores[posicao])
+        distancias[posicao] = np.inf # (A própria empresa não é par)
+
+        k = min(k, len(distancias) - 1)
+        if k <= 0:
+            return []
+        mais_proximos = np.argpartition(distancias, k - 1)[:k]
+        mais_proximos = mais_proximos[np.argsort(distancias[mais_proximos])]
+        return [(indice.tickers[i], indice.cnpjs[i], float(distancias[i])) for i in mais_proximos]
+
+    def invalidar(self, ano):
+        with self._lock:
+            self._indices.pop(ano, None)
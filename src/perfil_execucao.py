@@ -0,0 +1,149 @@
+import io
+import os
+import re
+import time
+import marshal
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+
+# (Um perfil de cada vez: o tracemalloc é global ao processo)
+_LOCK_PERFIL = threading.Lock()
+
+
+class PerfilExecucao:
+    """
+    Artefactos de UMA execução perfilada, identificados pelo rótulo
+    (ticker, pares e ano):
+
+    - perfil_bytes: estatísticas do cProfile no formato do pstats
+      (python -m pstats arquivo.prof, ou snakeviz arquivo.prof).
+    - relatorio: texto com as funções mais lentas (tempo acumulado)
+      e os locais que mais memória alocaram durante a execução.
+    """
+
+    def __init__(self, rotulo, ticker, pares, ano):
+        self.rotulo = rotulo
+        self.ticker = ticker
+        self.pares = pares
+        self.ano = ano
+        self.duracao_s = None
+        self.pico_memoria_bytes = None
+        self.perfil_bytes = None
+        self.relatorio = None
+
+    @property
+    def nome_arquivo_perfil(self):
+        return f"{self.rotulo}.prof"
+
+    @property
+    def nome_arquivo_relatorio(self):
+        return f"{self.rotulo}.txt"
+
+
+class PerfiladorExecucao:
+    """
+    Modo de perfil OPT-IN de uma análise (dashboard com ?perfil=1,
+    main.py --perfil): corre a análise dentro do cProfile (determinístico,
+    na thread que a executa) e do tracemalloc, e produz um PerfilExecucao.
+
+        with PerfiladorExecucao().perfilar("PETR4", ["PRIO3"], 2023) as perfil:
+            rodar_analise_completa("PETR4", ["PRIO3"], 2023)
+        perfil.relatorio, perfil.perfil_bytes
+
+    Desligado, não custa nada: quem chama só entra aqui com o modo
+    ativo, e o cProfile e o tracemalloc só são importados nessa altura.
+    """
+
+    def __init__(self, diretorio=None):
+        self.diretorio = diretorio or config.CAMINHO_OUTPUT_PERFIS
+        self.NUM_FUNCOES = config.NUM_FUNCOES_PERFIL
+        self.NUM_ALOCACOES = config.NUM_ALOCACOES_PERFIL
+
+    @staticmethod
+    def rotulo(ticker, pares, ano):
+        """
+        Ex: perfil_PETR4_2023_PRIO3-RECV3_20240101-120000 (seguro para nomes de arquivos).
+        """
+        texto_pares = pares if isinstance(pares, str) else '-'.join(pares)
+        texto_pares = re.sub(r'[^0-9A-Za-z-]+', '', texto_pares)[:60] or 'sem-pares'
+        ticker = re.sub(r'[^0-9A-Za-z]+', '', str(ticker).upper())
+        return f"perfil_{ticker}_{ano}_{texto_pares}_{datetime.now():%Y%m%d-%H%M%S}"
+
+    @contextmanager
+    def perfilar(self, ticker, pares, ano):
+        """
+        Perfila o bloco 'with'. O PerfilExecucao é preenchido no fim do
+        bloco (também se o bloco falhar).
+        """
+        import cProfile
+        import tracemalloc
+        perfil = PerfilExecucao(self.rotulo(ticker, pares, ano), ticker, pares, ano)
+
+        with _LOCK_PERFIL:
+            ja_rastreava = tracemalloc.is_tracing()
+            if not ja_rastreava:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            fotografia_inicial = tracemalloc.take_snapshot()
+            perfilador = cProfile.Profile()
+            inicio = time.perf_counter()
+            perfilador.enable()
+            try:
+                yield perfil
+            finally:
+                perfilador.disable()
+                perfil.duracao_s = time.perf_counter() - inicio
+                fotografia_final = tracemalloc.take_snapshot()
+                perfil.pico_memoria_bytes = tracemalloc.get_traced_memory()[1]
+                if not ja_rastreava:
+                    tracemalloc.stop()
+                self._preencher(perfil, perfilador, fotografia_inicial, fotografia_final)
+                print(f"Perfil '{perfil.rotulo}': {perfil.duracao_s:.2f}s, pico de memória "
+                      f"{perfil.pico_memoria_bytes / 1024 ** 2:.1f} MB.")
+
+    def _preencher(self, perfil, perfilador, fotografia_inicial, fotografia_final):
+        import pstats
+        import tracemalloc
+
+        perfilador.create_stats()
+        perfil.perfil_bytes = marshal.dumps(perfilador.stats) # (O mesmo que Profile.dump_stats grava)
+
+        texto_funcoes = io.StringIO()
+        pstats.Stats(perfilador, stream=texto_funcoes).sort_stats('cumulative').print_stats(self.NUM_FUNCOES)
+
+        # Alocações LÍQUIDAS do bloco (o que ficou alocado), por linha de código
+        filtros = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+        diferencas = fotografia_final.filter_traces(filtros).compare_to(fotografia_inicial.filter_traces(filtros), 'lineno')
+        linhas_alocacoes = [
+            f"{i:>3}. {diferenca.traceback[0].filename}:{diferenca.traceback[0].lineno}: "
+            f"{diferenca.size_diff / 1024:+.1f} KB ({diferenca.count_diff:+d} blocos)"
+            for i, diferenca in enumerate(diferencas[:self.NUM_ALOCACOES], start=1)
+        ]
+
+        perfil.relatorio = "\n".join([
+            f"Perfil: {perfil.rotulo}",
+            f"Ticker: {perfil.ticker} | Pares: {perfil.pares} | Ano: {perfil.ano}",
+            f"Duração: {perfil.duracao_s:.3f}s | Pico de memória (tracemalloc): {perfil.pico_memoria_bytes / 1024 ** 2:.1f} MB",
+            "",
+            f"--- Funções por tempo acumulado (top {self.NUM_FUNCOES}; cProfile, só a thread da análise) ---",
+            texto_funcoes.getvalue().strip(),
+            "",
+            f"--- Locais com mais memória alocada durante a execução (top {self.NUM_ALOCACOES}) ---",
+            *(linhas_alocacoes or ["(nenhuma alocação líquida)"]),
+        ])
+
+    def gravar(self, perfil, diretorio=None):
+        """
+        Grava o .prof e o relatório .txt. Retorna (caminho_perfil, caminho_relatorio).
+        """
+        diretorio = diretorio or self.diretorio
+        os.makedirs(diretorio, exist_ok=True)
+        caminho_perfil = os.path.join(diretorio, perfil.nome_arquivo_perfil)
+        caminho_relatorio = os.path.join(diretorio, perfil.nome_arquivo_relatorio)
+        with open(caminho_perfil, 'wb') as arquivo:
+            arquivo.write(perfil.perfil_bytes)
+        with open(caminho_relatorio, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(perfil.relatorio)
+        return caminho_perfil, caminho_relatorio
\ No newline at end of file
@@ -0,0 +1,369 @@
+import io
+import os
+import sys
+import time
+import queue
+import threading
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+from .calculo_indicadores import CalculadoraIndicadores
+
+try:
+    import resource # (Só Unix: pico de memória dos processos de parse)
+except ImportError:
+    resource = None
+
+# Marca de "fim" que cada etapa passa à seguinte
+_FIM = object()
+
+
+def _pico_memoria_processo():
+    """
+    Pico de memória residente (bytes) do processo atual, ou 0 se o
+    sistema não o disponibiliza.
+    """
+    if resource is None:
+        return 0
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == 'darwin' else pico * 1024 # (Linux: em KB)
+
+
+def _processar_membro(conteudo, hierarquia, com_presenca):
+    """
+    Etapa de PARSE (corre num processo à parte): lê um CSV já
+    descompactado e devolve (df filtrado ou None, CNPJs com 'ÚLTIMO'
+    ou None, início, fim, pico de memória do processo).
+    """
+    inicio = time.time()
+    df = CalculadoraIndicadores.ler_csv_demonstrativo(io.BytesIO(conteudo))
+    presenca = set(df.loc[df['ORDEM_EXERC'] == 'ÚLTIMO', 'CNPJ_CIA'].unique()) if com_presenca else None
+    filtrado = CalculadoraIndicadores.filtrar_demonstrativo(df, hierarquia) if hierarquia is not None else None
+    return filtrado, presenca, inicio, time.time(), _pico_memoria_processo()
+
+
+class EstatisticasEtapa:
+    """
+    Contadores de UMA etapa do pipeline (seguros entre threads):
+    itens, bytes de entrada/saída, tempo ocupado, duração (do primeiro
+    início ao último fim) e pico de memória (None nas etapas em que não
+    é medido, ex: o download, que escreve direto no disco).
+    """
+
+    def __init__(self, nome, medir_memoria=True):
+        self.nome = nome
+        self.medir_memoria = medir_memoria
+        self.itens = 0
+        self.bytes_entrada = 0
+        self.bytes_saida = 0
+        self.tempo_ocupado = 0.0
+        self.pico_memoria = 0
+        self._inicio = None
+        self._fim = None
+        self._lock = threading.Lock()
+
+    def registar(self, inicio, fim, bytes_entrada=0, bytes_saida=0, memoria=0):
+        with self._lock:
+            self.itens += 1
+            self.bytes_entrada += bytes_entrada
+            self.bytes_saida += bytes_saida
+            self.tempo_ocupado += fim - inicio
+            self.pico_memoria = max(self.pico_memoria, memoria)
+            self._inicio = inicio if self._inicio is None else min(self._inicio, inicio)
+            self._fim = fim if self._fim is None else max(self._fim, fim)
+
+    def observar_memoria(self, memoria):
+        with self._lock:
+            self.pico_memoria = max(self.pico_memoria, memoria)
+
+    def resumo(self):
+        with self._lock:
+            duracao = (self._fim - self._inicio) if self._inicio is not None else 0.0
+            return {
+                'etapa': self.nome,
+                'itens': self.itens,
+                'bytes_entrada': self.bytes_entrada,
+                'bytes_saida': self.bytes_saida,
+                'tempo_ocupado_s': self.tempo_ocupado,
+                'duracao_s': duracao,
+                'mb_por_s': self.bytes_entrada / 1024 ** 2 / duracao if duracao > 0 else 0.0,
+                'pico_memoria_bytes': self.pico_memoria if self.medir_memoria else None
+            }
+
+
+class PipelineIngestao:
+    """
+    Ingestão em PIPELINE de vários anos (produtor/consumidor):
+
+        download (thread) -> descompressão (thread) -> parse (processos) -> montagem (thread)
+
+    - Enquanto o ano N está a ser lido, o ano N+1 já está a ser baixado.
+    - Os membros de um ano (DRE, BPA, BPP... CON e IND) são lidos em
+      paralelo, cada um num processo (config.NUM_PROCESSOS_PARSE).
+    - As filas entre as etapas são limitadas: a memória fica limitada a
+      config.TAMANHO_FILA_MEMBROS CSVs descompactados e a
+      config.MAX_ANOS_EM_MEMORIA_PIPELINE anos montados e por consumir.
+    - O resultado vai para os caches da Calculadora (demonstrativos e
+      Índice de Presença): os pedidos seguintes ao ano não leem o ZIP.
+
+    Cada etapa regista itens, throughput (MB/s) e pico de memória
+    (ver estatisticas()). Uma execução de cada vez por instância.
+    """
+
+    ETAPAS = ['download', 'descompressao', 'parse', 'montagem']
+    # (O download escreve os pedaços direto no disco: sem memória a medir)
+    ETAPAS_SEM_MEMORIA = ('download',)
+
+    def __init__(self, calculadora, tipo_doc="DFP", num_processos=None):
+        self.calculadora = calculadora
+        self.tipo_doc = tipo_doc
+        if num_processos is None:
+            num_processos = config.NUM_PROCESSOS_PARSE
+        if num_processos is None:
+            # (Com um só núcleo, os processos só somam o custo de arranque)
+            num_processos = min(len(config.DEMONSTRATIVOS_INDICE_PRESENCA), (os.cpu_count() or 1) - 1)
+        self.NUM_PROCESSOS = num_processos
+        self.TAMANHO_FILA_MEMBROS = config.TAMANHO_FILA_MEMBROS
+        self.MAX_ANOS_EM_MEMORIA = config.MAX_ANOS_EM_MEMORIA_PIPELINE
+        self.DEMONSTRATIVOS_PRESENCA = config.DEMONSTRATIVOS_INDICE_PRESENCA
+        self.ARQUIVOS_DEMONSTRATIVOS = config.ARQUIVOS_DEMONSTRATIVOS_CVM
+        self.TIPOS = self.calculadora.indice_presenca.TIPOS
+
+        self._lock_execucao = threading.Lock()
+        self._lock_memoria = threading.Lock()
+        self._estatisticas = {}
+        print(f"PipelineIngestao iniciado ({self.NUM_PROCESSOS or 'sem'} processos de parse).")
+
+    # --- TAREFAS DE UM ANO ---
+
+    def _tarefas_ano(self, hierarquias):
+        """
+        Os membros a ler de cada ano: (tipo_dados, demonstrativo, prefixo),
+        para os demonstrativos do registro e os do Índice de Presença.
+        """
+        demonstrativos = list(hierarquias) + [d for d in self.DEMONSTRATIVOS_PRESENCA if d not in hierarquias]
+        return [
+            (tipo_dados, demonstrativo, prefixo)
+            for tipo_dados in self.TIPOS
+            for demonstrativo in demonstrativos
+            for prefixo in self.ARQUIVOS_DEMONSTRATIVOS[demonstrativo]
+        ]
+
+    def _colocar(self, fila, item):
+        """
+        put() numa fila limitada que desiste se a execução for cancelada.
+        """
+        while not self._cancelado.is_set():
+            try:
+                fila.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _memoria_em_voo(self, delta):
+        """
+        Bytes descompactados que ainda não passaram pelo parse.
+        """
+        with self._lock_memoria:
+            self._bytes_em_voo += delta
+            self._estatisticas['descompressao'].observar_memoria(self._bytes_em_voo)
+
+    # --- ETAPAS ---
+
+    def _etapa_download(self, anos):
+        etapa = self._estatisticas['download']
+        coletor = self.calculadora.coletor
+        for ano in anos:
+            if self._cancelado.is_set():
+                break
+            inicio = time.time()
+            caminho_zip = coletor.baixar_demonstrativos(ano, self.tipo_doc)
+            tamanho = os.path.getsize(caminho_zip) if caminho_zip else 0
+            etapa.registar(inicio, time.time(), bytes_entrada=tamanho, bytes_saida=tamanho)
+            if not self._colocar(self._fila_zips, (ano, caminho_zip)):
+                break
+        self._fila_zips.put(_FIM)
+
+    def _etapa_descompressao(self, tarefas):
+        etapa = self._estatisticas['descompressao']
+        while (item := self._fila_zips.get()) is not _FIM:
+            ano, caminho_zip = item
+            arquivo_zip, num_membros = None, 0
+            if caminho_zip and not self._cancelado.is_set():
+                # (O ZIP não pode ser apagado do cache em disco, nem fechado, durante a leitura)
+                with self.calculadora._usar_zip(caminho_zip, ano) as arquivo_zip:
+                    if arquivo_zip is not None: # (ZIP inválido: o ano falha na montagem)
+                        for tipo_dados, demonstrativo, prefixo in tarefas:
+                            sufixo = f"{prefixo}_{self.TIPOS[tipo_dados]}_{ano}.csv"
+                            try:
+                                info = arquivo_zip.encontrar_membro(sufixo)
+                            except FileNotFoundError:
+                                continue # (Ex: a DFC_MD pode não existir, mas a DFC_MI sim)
+                            inicio = time.time()
+                            with arquivo_zip.abrir(sufixo) as membro:
+                                conteudo = membro.read()
+                            etapa.registar(inicio, time.time(), bytes_entrada=info.compress_size, bytes_saida=len(conteudo))
+                            self._memoria_em_voo(len(conteudo))
+                            if not self._colocar(self._fila_membros, ('membro', ano, (tipo_dados, demonstrativo), conteudo)):
+                                self._memoria_em_voo(-len(conteudo))
+                                break
+                            num_membros += 1
+
+            self._colocar(self._fila_membros, ('ano', ano, arquivo_zip, num_membros))
+        self._fila_membros.put(_FIM)
+
+    def _etapa_parse(self, executor, hierarquias):
+        """
+        Despacha cada CSV para um processo de parse (no máximo 2 por
+        processo em curso) e passa os "futuros" de cada ano à montagem.
+        """
+        vagas = threading.Semaphore(max(self.NUM_PROCESSOS, 1) * 2)
+        futuros_por_ano = {}
+
+        def libertar(tamanho):
+            def callback(futuro):
+                vagas.release()
+                self._memoria_em_voo(-tamanho)
+            return callback
+
+        while (item := self._fila_membros.get()) is not _FIM:
+            if item[0] == 'ano':
+                _, ano, arquivo_zip, num_membros = item
+                self._colocar(self._fila_montagem, (ano, arquivo_zip, futuros_por_ano.pop(ano, [])))
+                continue
+
+            _, ano, (tipo_dados, demonstrativo), conteudo = item
+            if self._cancelado.is_set():
+                self._memoria_em_voo(-len(conteudo))
+                continue
+            vagas.acquire()
+            futuro = executor.submit(
+                _processar_membro, conteudo, hierarquias.get(demonstrativo),
+                demonstrativo in self.DEMONSTRATIVOS_PRESENCA
+            )
+            futuro.add_done_callback(libertar(len(conteudo)))
+            futuros_por_ano.setdefault(ano, []).append(((tipo_dados, demonstrativo, len(conteudo)), futuro))
+        self._fila_montagem.put(_FIM)
+
+    def _montar_ano(self, ano, arquivo_zip, futuros, hierarquias):
+        """
+        Junta os resultados do parse de um ano e guarda-os nos caches
+        da Calculadora (demonstrativos CON/IND e Índice de Presença).
+        """
+        if self._cancelado.is_set():
+            return False
+        etapa_parse = self._estatisticas['parse']
+        partes = {}
+        presencas = {tipo_dados: {d: set() for d in self.DEMONSTRATIVOS_PRESENCA} for tipo_dados in self.TIPOS}
+        falhou = False
+        for (tipo_dados, demonstrativo, tamanho), futuro in futuros:
+            try:
+                filtrado, presenca, inicio, fim, memoria = futuro.result()
+            except Exception as e:
+                print(f"ERRO no parse de {demonstrativo} ({tipo_dados}) de {ano}: {e}")
+                falhou = True
+                continue
+            bytes_saida = int(filtrado.memory_usage(deep=True).sum()) if filtrado is not None else 0
+            etapa_parse.registar(inicio, fim, bytes_entrada=tamanho, bytes_saida=bytes_saida, memoria=memoria)
+            if filtrado is not None:
+                partes.setdefault((tipo_dados, demonstrativo), []).append(filtrado)
+            if presenca is not None:
+                presencas[tipo_dados][demonstrativo].update(presenca)
+        if falhou or self._cancelado.is_set():
+            return False
+
+        inicio, memoria = time.time(), 0
+        for tipo_dados in self.TIPOS:
+            demonstrativos_ano = {
+                demonstrativo: self.calculadora.montar_demonstrativo(partes.get((tipo_dados, demonstrativo), []), hierarquia)
+                for demonstrativo, hierarquia in hierarquias.items()
+            }
+            memoria += sum(int(df.memory_usage(deep=True).sum()) for df in demonstrativos_ano.values())
+            self.calculadora.guardar_demonstrativos_ano(arquivo_zip, ano, self.tipo_doc, tipo_dados, demonstrativos_ano)
+        ok = self.calculadora.indice_presenca.registar_presencas(ano, self.tipo_doc, presencas, arquivo_zip.assinatura) is not None
+        self._estatisticas['montagem'].registar(inicio, time.time(), bytes_saida=memoria, memoria=memoria)
+        return ok
+
+    def _etapa_montagem(self, hierarquias):
+        while (item := self._fila_montagem.get()) is not _FIM:
+            ano, arquivo_zip, futuros = item
+            # (Limite de anos montados e ainda por consumir)
+            while not self._cancelado.is_set() and not self._vagas_anos.acquire(timeout=0.1):
+                continue
+            ok = arquivo_zip is not None and self._montar_ano(ano, arquivo_zip, futuros, hierarquias)
+            self._fila_prontos.put((ano, ok))
+        self._fila_prontos.put(_FIM)
+
+    # --- EXECUÇÃO ---
+
+    def _criar_executor(self):
+        # (Importados só aqui: o arranque dos scripts não paga o multiprocessing)
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        if self.NUM_PROCESSOS <= 0:
+            # (Sem processos: os demonstrativos de um ano em threads)
+            return ThreadPoolExecutor(max_workers=len(self.DEMONSTRATIVOS_PRESENCA))
+        # ('spawn': os processos não herdam as threads e locks deste processo)
+        return ProcessPoolExecutor(max_workers=self.NUM_PROCESSOS, mp_context=multiprocessing.get_context('spawn'))
+
+    def iterar(self, anos):
+        """
+        Corre o pipeline e devolve (ano, pronto) à medida que cada ano
+        fica pronto, pela ordem pedida. Quem consome pode trabalhar no
+        ano N (ex: exportá-lo) enquanto os seguintes são ingeridos.
+        Parar a iteração cancela o resto do pipeline.
+        """
+        anos = list(dict.fromkeys(anos))
+        with self._lock_execucao:
+            self._cancelado = threading.Event()
+            self._estatisticas = {nome: EstatisticasEtapa(nome, nome not in self.ETAPAS_SEM_MEMORIA) for nome in self.ETAPAS}
+            self._bytes_em_voo = 0
+            self._fila_zips = queue.Queue(maxsize=1)
+            self._fila_membros = queue.Queue(maxsize=self.TAMANHO_FILA_MEMBROS)
+            self._fila_montagem = queue.Queue(maxsize=1)
+            self._fila_prontos = queue.Queue()
+            self._vagas_anos = threading.Semaphore(self.MAX_ANOS_EM_MEMORIA)
+
+            inicio = time.perf_counter()
+            print(f"Pipeline de ingestão iniciado (anos: {anos})...")
+            hierarquias = self.calculadora.hierarquias_por_demonstrativo()
+            executor = self._criar_executor()
+            threads = [
+                threading.Thread(target=self._etapa_download, args=(anos,), name="pipeline-download", daemon=True),
+                threading.Thread(target=self._etapa_descompressao, args=(self._tarefas_ano(hierarquias),), name="pipeline-descompressao", daemon=True),
+                threading.Thread(target=self._etapa_parse, args=(executor, hierarquias), name="pipeline-parse", daemon=True),
+                threading.Thread(target=self._etapa_montagem, args=(hierarquias,), name="pipeline-montagem", daemon=True),
+            ]
+            for thread in threads:
+                thread.start()
+
+            try:
+                while (item := self._fila_prontos.get()) is not _FIM:
+                    yield item
+                    self._vagas_anos.release() # (O ano foi consumido)
+            finally:
+                self._cancelado.set()
+                for thread in threads:
+                    thread.join()
+                executor.shutdown(wait=True, cancel_futures=True)
+                print(f"Pipeline de ingestão concluído em {time.perf_counter() - inicio:.1f}s.")
+                self.imprimir_estatisticas()
+
+    def executar(self, anos):
+        """
+        Ingere todos os anos. Retorna {ano: True/False}.
+        """
+        return dict(self.iterar(anos))
+
+    def estatisticas(self):
+        """
+        Resumo da última execução, por etapa (ver EstatisticasEtapa.resumo).
+        """
+        return [self._estatisticas[nome].resumo() for nome in self.ETAPAS if nome in self._estatisticas]
+
+    def imprimir_estatisticas(self):
+        for resumo in self.estatisticas():
+            memoria = resumo['pico_memoria_bytes']
+            print(f"  [{resumo['etapa']}] {resumo['itens']} itens, "
+                  f"{resumo['bytes_entrada'] / 1024 ** 2:.1f} MB -> {resumo['bytes_saida'] / 1024 ** 2:.1f} MB "
+                  f"em {resumo['duracao_s']:.2f}s ({resumo['mb_por_s']:.1f} MB/s, ocupado {resumo['tempo_ocupado_s']:.2f}s)"
+                  + (f", pico de memória {memoria / 1024 ** 2:.1f} MB" if memoria is not None else ""))
\ No newline at end of file
@@ -0,0 +1,154 @@
+from ._dependencias import np
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+
+
+def _dividir(numerador, denominador):
+    """
+    Divisão "segura": converte divisões por (quase) zero em 'nan'
+    (em vez de 0.0) para não distorcer as médias.
+    """
+    if abs(denominador) > 1e-9:
+        return numerador / denominador
+    return np.nan
+
+
+class RegistroIndicadores:
+    """
+    Registro "plugável" de indicadores.
+
+    Cada indicador declara as contas de que precisa (chaves do
+    config.MAPA_CONTAS_CVM) e uma função que recebe o dict 'contas'.
+    A Calculadora pergunta ao registro quais contas e demonstrativos
+    ler, e lê a UNIÃO de tudo numa única passagem por arquivo.
+    Adicionar um indicador não adiciona leituras de arquivos.
+    """
+
+    def __init__(self):
+        self.MAPA_CONTAS = config.MAPA_CONTAS_CVM
+        # nome -> {'contas': [...], 'funcao': callable, 'essencial': bool}
+        self._indicadores = {}
+
+    def registrar(self, nome, contas, funcao, essencial=False):
+        """
+        Regista um novo indicador.
+
+        Args:
+            nome (str): Nome do indicador (ex: 'margem_ebit').
+            contas (list): Chaves do config.MAPA_CONTAS_CVM (ex: ['EBIT', 'RECEITA_LIQUIDA']).
+            funcao (callable): Recebe o dict 'contas' (chaves em minúsculas) e devolve um float.
+            essencial (bool): Se True, as suas contas são obrigatórias e um
+                valor 'nan' descarta a empresa. Se False, vira apenas 'nan'.
+        """
+        for conta in contas:
+            if conta not in self.MAPA_CONTAS:
+                raise ValueError(f"Conta '{conta}' do indicador '{nome}' não existe no MAPA_CONTAS_CVM.")
+        self._indicadores[nome] = {'contas': list(contas), 'funcao': funcao, 'essencial': essencial}
+
+    def nomes(self):
+        return list(self._indicadores)
+
+    def indicadores_essenciais(self):
+        return [nome for nome, ind in self._indicadores.items() if ind['essencial']]
+
+    def contas_necessarias(self):
+        """
+        União (ordenada) das contas de todos os indicadores registados.
+        """
+        contas = []
+        for ind in self._indicadores.values():
+            for conta in ind['contas']:
+                if conta not in contas:
+                    contas.append(conta)
+        return contas
+
+    def contas_essenciais(self):
+        """
+        Contas exigidas por pelo menos um indicador essencial.
+        """
+        return {conta for ind in self._indicadores.values() if ind['essencial'] for conta in ind['contas']}
+
+    def codigos_por_demonstrativo(self):
+        """
+        Agrupa os CD_CONTA necessários por demonstrativo (ex: {'BPA': {'1', '1.01'}}).
+        É o que a Calculadora usa para ler cada arquivo uma única vez.
+        """
+        codigos = {}
+        for conta in self.contas_necessarias():
+            demonstrativo, cd_conta = self.MAPA_CONTAS[conta]
+            codigos.setdefault(demonstrativo, set()).add(cd_conta)
+        return codigos
+
+    def demonstrativos_essenciais(self):
+        return {self.MAPA_CONTAS[conta][0] for conta in self.contas_essenciais()}
+
+    def calcular(self, contas):
+        """
+        Calcula todos os indicadores registados a partir do dict 'contas'.
+        """
+        indicadores = {}
+        for nome, ind in self._indicadores.items():
+            try:
+                valor = ind['funcao'](contas)
+            except (KeyError, TypeError, ZeroDivisionError):
+                valor = np.nan
+            indicadores[nome] = float(valor)
+        return indicadores
+
+
+# --- FÓRMULAS DOS INDICADORES ---
+
+def _divida_total(c):
+    return c['passivo_circulante'] + c['passivo_nao_circulante']
+
+def _divida_liquida(c):
+    divida_bruta = c['emprestimos_cp'] + c['emprestimos_lp']
+    return divida_bruta - c['caixa'] - c['aplicacoes_financeiras']
+
+
+def criar_registro_padrao():
+    """
+    Cria o registro com os indicadores do sistema.
+    (Para adicionar um indicador: declare as contas no config.py
+    e registe-o aqui.)
+    """
+    registro = RegistroIndicadores()
+
+    # Indicadores essenciais (usados pelo Rating e pelos Alertas)
+    registro.registrar(
+        'liq_corrente', ['ATIVO_CIRCULANTE', 'PASSIVO_CIRCULANTE'],
+        lambda c: _dividir(c['ativo_circulante'], c['passivo_circulante']),
+        essencial=True
+    )
+    registro.registrar(
+        'endividamento_geral', ['PASSIVO_CIRCULANTE', 'PASSIVO_NAO_CIRCULANTE', 'ATIVO_TOTAL'],
+        lambda c: _dividir(_divida_total(c), c['ativo_total']),
+        essencial=True
+    )
+    registro.registrar(
+        'divida_pl', ['PASSIVO_CIRCULANTE', 'PASSIVO_NAO_CIRCULANTE', 'PATRIMONIO_LIQUIDO'],
+        lambda c: _dividir(_divida_total(c), c['patrimonio_liquido']),
+        essencial=True
+    )
+    registro.registrar(
+        'roe', ['LUCRO_LIQUIDO', 'PATRIMONIO_LIQUIDO'],
+        lambda c: _dividir(c['lucro_liquido'], c['patrimonio_liquido']),
+        essencial=True
+    )
+
+    # Indicadores complementares (se faltar uma conta, viram 'nan')
+    registro.registrar(
+        'margem_ebit', ['EBIT', 'RECEITA_LIQUIDA'],
+        lambda c: _dividir(c['ebit'], c['receita_liquida'])
+    )
+    registro.registrar(
+        'divida_liquida_ebitda',
+        ['EMPRESTIMOS_CP', 'EMPRESTIMOS_LP', 'CAIXA', 'APLICACOES_FINANCEIRAS', 'EBIT', 'DEPRECIACAO_AMORTIZACAO'],
+        # (Na DVA da CVM as Retenções (7.04.x) vêm NEGATIVAS: EBITDA = EBIT + |D&A|)
+        lambda c: _dividir(_divida_liquida(c), c['ebit'] + abs(c['depreciacao_amortizacao']))
+    )
+    registro.registrar(
+        'fco_divida', ['CAIXA_OPERACIONAL', 'EMPRESTIMOS_CP', 'EMPRESTIMOS_LP'],
+        lambda c: _dividir(c['caixa_operacional'], c['emprestimos_cp'] + c['emprestimos_lp'])
+    )
+
+    return registro
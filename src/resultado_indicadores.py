@@ -0,0 +1,181 @@
+from ._dependencias import pd
+from ._dependencias import np
+import warnings
+import hashlib
+
+
+class LinhaIndicadores:
+    """
+    "Vista" leve de UMA linha (uma empresa, ou a média do setor).
+    Não copia nada: guarda só uma fatia do array NumPy e o esquema.
+    Comporta-se como um dict de leitura: linha['roe'], linha.items()...
+    """
+    __slots__ = ('empresa', '_valores', '_posicoes')
+
+    def __init__(self, empresa, valores, posicoes):
+        self.empresa = empresa
+        self._valores = valores
+        self._posicoes = posicoes
+
+    def __getitem__(self, nome):
+        return float(self._valores[self._posicoes[nome]])
+
+    def get(self, nome, padrao=None):
+        if nome not in self._posicoes:
+            return padrao
+        return self[nome]
+
+    def __contains__(self, nome):
+        return nome in self._posicoes
+
+    def __iter__(self):
+        return iter(self._posicoes)
+
+    def __len__(self):
+        return len(self._posicoes)
+
+    def keys(self):
+        return self._posicoes.keys()
+
+    def items(self):
+        return [(nome, self[nome]) for nome in self._posicoes]
+
+    def para_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"LinhaIndicadores({self.empresa!r}, {self.para_dict()!r})"
+
+
+class ResultadoIndicadores:
+    """
+    Contentor COLUNAR dos indicadores de um conjunto de empresas.
+
+    - Esquema fixo de indicadores (colunas) definido na criação.
+    - Os valores vivem num único array float64 (empresas x indicadores),
+      pré-alocado, em vez de um dict por empresa.
+    - As linhas são vistas (LinhaIndicadores, com __slots__).
+    - Os DataFrames só são criados quando a camada de apresentação
+      (dashboard, PDF, API) os pede, e ficam em cache.
+    - 'diagnosticos' (Diagnosticos, opcional): o que aconteceu na
+      análise que o produziu (ex: pares excluídos e porquê).
+    """
+    __slots__ = ('indicadores', 'empresas', 'valores', 'empresa_alvo', 'diagnosticos',
+                 '_posicoes', '_posicoes_empresas', '_num_linhas', '_cache_dfs')
+
+    def __init__(self, indicadores, capacidade=16, empresa_alvo=None):
+        self.indicadores = list(indicadores)
+        self.empresas = []
+        self.valores = np.empty((max(capacidade, 1), len(self.indicadores)), dtype=np.float64)
+        self.empresa_alvo = empresa_alvo
+        self.diagnosticos = None
+        self._posicoes = {nome: i for i, nome in enumerate(self.indicadores)}
+        self._posicoes_empresas = {}
+        self._num_linhas = 0
+        self._cache_dfs = {}
+
+    # --- CONSTRUÇÃO ---
+
+    def adicionar(self, empresa, indicadores):
+        """
+        Adiciona uma empresa a partir de um dict {indicador: valor}
+        (indicadores fora do esquema são ignorados; os em falta viram 'nan').
+        """
+        if self._num_linhas == self.valores.shape[0]:
+            maior = np.empty((self._num_linhas * 2, len(self.indicadores)), dtype=np.float64)
+            maior[:self._num_linhas] = self.valores
+            self.valores = maior
+        self.valores[self._num_linhas] = [indicadores.get(nome, np.nan) for nome in self.indicadores]
+        self._posicoes_empresas[empresa] = self._num_linhas
+        self.empresas.append(empresa)
+        self._num_linhas += 1
+        self._cache_dfs.clear()
+
+    def finalizar(self):
+        """
+        Corta a capacidade extra (o array fica exatamente empresas x indicadores).
+        """
+        self.valores = self.valores[:self._num_linhas]
+        return self
+
+    def filtrar(self, mascara):
+        """
+        Novo resultado só com as empresas (linhas) em que a máscara é True
+        (ex: codigos == 'OK' do ValidadorIndicadores).
+        """
+        indices = np.flatnonzero(mascara)
+        filtrado = ResultadoIndicadores(self.indicadores, capacidade=len(indices), empresa_alvo=self.empresa_alvo)
+        if len(indices):
+            filtrado.valores = self.matriz()[indices]
+            filtrado.empresas = [self.empresas[i] for i in indices]
+            filtrado._posicoes_empresas = {empresa: i for i, empresa in enumerate(filtrado.empresas)}
+            filtrado._num_linhas = len(indices)
+        return filtrado
+
+    # --- ACESSO ---
+
+    def __len__(self):
+        return self._num_linhas
+
+    def __contains__(self, empresa):
+        return empresa in self._posicoes_empresas
+
+    def matriz(self):
+        return self.valores[:self._num_linhas]
+
+    def coluna(self, nome):
+        """
+        Vista (sem cópia) de um indicador para todas as empresas.
+        """
+        return self.matriz()[:, self._posicoes[nome]]
+
+    def linha(self, empresa):
+        return LinhaIndicadores(empresa, self.valores[self._posicoes_empresas[empresa]], self._posicoes)
+
+    def linha_alvo(self):
+        if self.empresa_alvo not in self._posicoes_empresas:
+            return None
+        return self.linha(self.empresa_alvo)
+
+    def media_setor(self):
+        """
+        Média de cada indicador entre todas as empresas (ignora 'nan').
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning) # (coluna toda 'nan' -> 'nan')
+            media = np.nanmean(self.matriz(), axis=0) if self._num_linhas else np.full(len(self.indicadores), np.nan)
+        return LinhaIndicadores("Média do Setor", media, self._posicoes)
+
+    def impressao_digital(self):
+        """
+        Hash (SHA-256) do conteúdo: esquema, empresas, alvo e valores.
+        Dois resultados com os mesmos dados têm a mesma impressão digital.
+        """
+        h = hashlib.sha256()
+        h.update(repr((self.indicadores, self.empresas, self.empresa_alvo)).encode('utf-8'))
+        h.update(np.ascontiguousarray(self.matriz()).tobytes())
+        return h.hexdigest()
+
+    # --- VISTAS PARA A APRESENTAÇÃO (criadas só quando pedidas) ---
+
+    def df_completo_t(self):
+        """
+        DataFrame indicadores x empresas (o antigo 'df_completo.T').
+        """
+        if 'completo_t' not in self._cache_dfs:
+            df = pd.DataFrame(self.matriz().T, index=self.indicadores, columns=self.empresas)
+            df.columns.name = 'empresa'
+            self._cache_dfs['completo_t'] = df
+        return self._cache_dfs['completo_t']
+
+    def df_comparativo(self):
+        """
+        DataFrame com as colunas "Empresa Alvo (TICKER)" e "Média do Setor".
+        """
+        if 'comparativo' not in self._cache_dfs:
+            alvo = self.linha_alvo()
+            self._cache_dfs['comparativo'] = pd.DataFrame({
+                f"Empresa Alvo ({self.empresa_alvo})": alvo._valores if alvo is not None else np.nan,
+                "Média do Setor": self.media_setor()._valores
+            }, index=self.indicadores)
+        return self._cache_dfs['comparativo']
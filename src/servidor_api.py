@@ -0,0 +1,296 @@
+import asyncio
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+
+from .coleta_dados import ColetorDadosCVM
+from .gestor_cadastro import GestorCadastro
+from .calculo_indicadores import CalculadoraIndicadores
+from .analise_setorial import AnalisadorSetorial
+from .modelo_rating import ModeloRating
+from .alerta_flags import GeradorAlertas
+from .cache_disco import GestorCacheDisco
+from .triagem_painel import TriagemPainel
+
+
+class ErroPedido(Exception):
+    """
+    Erro "esperado" de um pedido (vira uma resposta HTTP com 'status').
+    """
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+def _para_json(valor):
+    """
+    Converte o resultado para algo serializável em JSON
+    ('nan'/'inf' viram null; tipos NumPy viram tipos Python).
+    """
+    if isinstance(valor, dict):
+        return {str(chave): _para_json(v) for chave, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_para_json(v) for v in valor]
+    if hasattr(valor, 'item'): # (escalares NumPy)
+        valor = valor.item()
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    return valor
+
+
+class ServidorAPI:
+    """
+    Serviço HTTP local (asyncio, só biblioteca padrão) que expõe o pipeline.
+
+    - As "fábricas" (GestorCadastro, Calculadora, ...) são criadas UMA vez
+      e os seus caches (ZIPs abertos, demonstrativos, indicadores) ficam
+      quentes entre pedidos.
+    - Pedidos idênticos em andamento são "coalescidos": só um cálculo
+      corre e todos os clientes recebem o mesmo resultado.
+    - O trabalho pesado (pandas) corre num pool de threads, para o
+      event loop continuar a responder.
+
+    Rotas (GET, respostas em JSON):
+        /saude
+        /indicadores?ticker=PETR4&ano=2023
+        /rating?ticker=PETR4&ano=2023
+        /pares?ticker=PETR4&ano=2023&pares=PRIO3,RECV3
+        /alertas?ticker=PETR4&ano=2023&pares=PRIO3,RECV3
+        /triagem?ano=2023&filtros=liq_corrente<1;roe<0&ordenar=divida_pl&decrescente=1&limite=20
+            (sobre o painel exportado: python exportar_painel.py)
+    """
+
+    def __init__(self, host=None, porta=None, num_workers=None):
+        self.host = host or config.HOST_API
+        self.porta = porta or config.PORTA_API
+        self.executor = ThreadPoolExecutor(
+            max_workers=num_workers or config.NUM_WORKERS_API,
+            thread_name_prefix="api-worker"
+        )
+
+        # Injeção de dependência (como no dashboard.py)
+        self.cache_disco = GestorCacheDisco()
+        self.gestor = GestorCadastro(self.cache_disco)
+        self.calculadora = CalculadoraIndicadores(ColetorDadosCVM(self.cache_disco))
+        self.analisador = AnalisadorSetorial(self.calculadora, self.gestor)
+        self.modelo = ModeloRating()
+        self.alertas = GeradorAlertas()
+        self.triagem = TriagemPainel()
+
+        self._em_andamento = {} # chave do pedido -> Future partilhado
+        self._rotas = {
+            '/saude': self._rota_saude,
+            '/indicadores': self._rota_indicadores,
+            '/rating': self._rota_rating,
+            '/pares': self._rota_pares,
+            '/alertas': self._rota_alertas,
+            '/triagem': self._rota_triagem,
+        }
+        print(f"ServidorAPI iniciado ({self.host}:{self.porta}).")
+
+    # --- LÓGICA DOS PEDIDOS (corre no pool de threads) ---
+
+    def _ler_parametros(self, parametros, exigir_pares=False):
+        try:
+            ticker = parametros['ticker'].strip().upper()
+            ano = int(parametros['ano'])
+        except KeyError as e:
+            raise ErroPedido(400, f"Parâmetro obrigatório em falta: {e}.")
+        except ValueError:
+            raise ErroPedido(400, f"Ano '{parametros['ano']}' é inválido.")
+        if not ticker:
+            raise ErroPedido(400, "O parâmetro 'ticker' não pode ser vazio.")
+
+        pares = [p.strip().upper() for p in parametros.get('pares', '').split(',') if p.strip()]
+        if exigir_pares and not pares:
+            raise ErroPedido(400, "O parâmetro 'pares' deve conter pelo menos um concorrente.")
+        return ticker, ano, pares
+
+    def _calcular_indicadores(self, ticker, ano):
+        cnpj = self.gestor.encontrar_cnpj_por_ticker(ticker)
+        if not cnpj:
+            raise ErroPedido(404, f"Ticker {ticker} não encontrado no 'mapa_ticker_cnpj.csv'.")
+        contas, indicadores = self.calculadora.calcular_contas_e_indicadores(cnpj, ano)
+        if indicadores is None:
+            raise ErroPedido(404, f"Sem dados CVM utilizáveis para {ticker} no ano {ano}.")
+        return {'ticker': ticker, 'cnpj': cnpj, 'ano': ano, 'contas': contas, 'indicadores': indicadores}
+
+    def _calcular_rating(self, ticker, ano):
+        resultado = self._calcular_indicadores(ticker, ano)
+        resultado_rating = self.modelo.calcular_rating_empresa(resultado['indicadores'])
+        if resultado_rating is None:
+            raise ErroPedido(500, f"Falha no cálculo do rating de {ticker}.")
+        return {'ticker': ticker, 'ano': ano, **resultado_rating}
+
+    def _calcular_pares(self, ticker, ano, pares):
+        resultado = self.analisador.analisar_pares(ticker, pares, ano)
+        if resultado is None:
+            raise ErroPedido(404, f"Análise de pares falhou para {ticker} ({ano}).")
+        return {
+            'ticker': ticker,
+            'ano': ano,
+            'indicadores_pares': {empresa: resultado.linha(empresa).para_dict() for empresa in resultado.empresas},
+            'media_setor': resultado.media_setor().para_dict(),
+            'ratings_pares': self.modelo.calcular_ratings_resultado(resultado),
+            'pares_excluidos': {empresa: registo.para_dict() for empresa, registo in resultado.diagnosticos.empresas_excluidas().items()}
+        }
+
+    def _calcular_alertas(self, ticker, ano, pares):
+        resultado = self.analisador.analisar_pares(ticker, pares, ano)
+        if resultado is None:
+            raise ErroPedido(404, f"Análise de pares falhou para {ticker} ({ano}).")
+        lista_alertas = self.alertas.gerar_alertas_setor(ticker, resultado)
+        return {'ticker': ticker, 'ano': ano, 'alertas': lista_alertas}
+
+    def _calcular_triagem(self, ano, filtros, ordenar_por, decrescente, limite):
+        try:
+            df_resultado = self.triagem.consultar(
+                ano, self.triagem.interpretar_filtros(filtros), ordenar_por, decrescente, limite
+            )
+        except ValueError as e:
+            raise ErroPedido(400, str(e))
+        if df_resultado is None:
+            raise ErroPedido(404, f"Painel de {ano} não exportado (python exportar_painel.py {ano} {ano}).")
+        return {'ano': ano, 'total': df_resultado.attrs['total'], 'empresas': df_resultado.to_dict(orient='records')}
+
+    # --- ROTAS (no event loop) ---
+
+    async def _coalescer(self, chave, funcao, *args):
+        """
+        Se um pedido idêntico já está a correr, espera pelo mesmo
+        resultado em vez de recalcular.
+        """
+        futuro = self._em_andamento.get(chave)
+        if futuro is None:
+            futuro = asyncio.get_running_loop().run_in_executor(self.executor, funcao, *args)
+            self._em_andamento[chave] = futuro
+            futuro.add_done_callback(lambda _: self._em_andamento.pop(chave, None))
+        # (shield: se um cliente desistir, o cálculo partilhado continua)
+        return await asyncio.shield(futuro)
+
+    async def _rota_saude(self, parametros):
+        return {
+            'status': 'ok',
+            'pedidos_em_andamento': len(self._em_andamento),
+            'cache_disco': self.cache_disco.estatisticas()
+        }
+
+    async def _rota_indicadores(self, parametros):
+        ticker, ano, _ = self._ler_parametros(parametros)
+        return await self._coalescer(('indicadores', ticker, ano), self._calcular_indicadores, ticker, ano)
+
+    async def _rota_rating(self, parametros):
+        ticker, ano, _ = self._ler_parametros(parametros)
+        return await self._coalescer(('rating', ticker, ano), self._calcular_rating, ticker, ano)
+
+    async def _rota_pares(self, parametros):
+        ticker, ano, pares = self._ler_parametros(parametros, exigir_pares=True)
+        chave = ('pares', ticker, ano, tuple(sorted(pares)))
+        return await self._coalescer(chave, self._calcular_pares, ticker, ano, pares)
+
+    async def _rota_alertas(self, parametros):
+        ticker, ano, pares = self._ler_parametros(parametros, exigir_pares=True)
+        chave = ('alertas', ticker, ano, tuple(sorted(pares)))
+        return await self._coalescer(chave, self._calcular_alertas, ticker, ano, pares)
+
+    async def _rota_triagem(self, parametros):
+        try:
+            ano = int(parametros['ano'])
+            limite = int(parametros['limite']) if 'limite' in parametros else None
+        except KeyError as e:
+            raise ErroPedido(400, f"Parâmetro obrigatório em falta: {e}.")
+        except ValueError:
+            raise ErroPedido(400, "Os parâmetros 'ano' e 'limite' devem ser números inteiros.")
+        filtros = parametros.get('filtros', '')
+        ordenar_por = parametros.get('ordenar') or None
+        decrescente = parametros.get('decrescente', '').lower() in ('1', 'true', 'sim')
+        chave = ('triagem', ano, filtros, ordenar_por, decrescente, limite)
+        return await self._coalescer(chave, self._calcular_triagem, ano, filtros, ordenar_por, decrescente, limite)
+
+    # --- HTTP (mínimo, HTTP/1.1 com keep-alive) ---
+
+    async def _despachar(self, metodo, alvo):
+        if metodo != 'GET':
+            return 405, {'erro': f"Método {metodo} não suportado (use GET)."}
+        partes = urlsplit(alvo)
+        rota = self._rotas.get(partes.path.rstrip('/') or '/')
+        if rota is None:
+            return 404, {'erro': f"Rota '{partes.path}' não existe.", 'rotas': sorted(self._rotas)}
+        parametros = {chave: valores[-1] for chave, valores in parse_qs(partes.query).items()}
+        try:
+            return 200, await rota(parametros)
+        except ErroPedido as e:
+            return e.status, {'erro': e.mensagem}
+        except Exception as e:
+            print(f"ERRO inesperado na rota {partes.path}: {e}")
+            return 500, {'erro': f"Erro interno: {e}"}
+
+    async def _tratar_conexao(self, reader, writer):
+        textos_status = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+        try:
+            while True:
+                linha_pedido = await reader.readline()
+                if not linha_pedido:
+                    break
+                metodo, alvo, versao = linha_pedido.decode('latin1').split()
+
+                cabecalhos = {}
+                while True:
+                    linha = await reader.readline()
+                    if linha in (b'\r\n', b'\n', b''):
+                        break
+                    nome, _, valor = linha.decode('latin1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                if int(cabecalhos.get('content-length', 0)) > 0: # (corpo ignorado)
+                    await reader.readexactly(int(cabecalhos['content-length']))
+
+                inicio = time.perf_counter()
+                status, resultado = await self._despachar(metodo, alvo)
+                corpo = json.dumps(_para_json(resultado), ensure_ascii=False).encode('utf-8')
+                duracao_ms = (time.perf_counter() - inicio) * 1000
+
+                manter_conexao = versao == 'HTTP/1.1' and cabecalhos.get('connection', '').lower() != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status} {textos_status.get(status, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(corpo)}\r\n"
+                    f"Server-Timing: total;dur={duracao_ms:.1f}\r\n"
+                    f"Connection: {'keep-alive' if manter_conexao else 'close'}\r\n\r\n".encode('latin1') + corpo
+                )
+                await writer.drain()
+                if not manter_conexao:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass # (Cliente desligou ou pedido mal formado)
+        finally:
+            writer.close()
+
+    # --- CICLO DE VIDA ---
+
+    async def aquecer(self):
+        """
+        Carrega o mapa Ticker <-> CNPJ e o cadastro CVM antes do
+        primeiro pedido (no pool, sem bloquear o event loop).
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.gestor._carregar_mapa_ticker)
+        await loop.run_in_executor(self.executor, self.gestor._carregar_cadastro_cvm)
+
+    async def executar(self):
+        await self.aquecer()
+        servidor = await asyncio.start_server(self._tratar_conexao, self.host, self.porta)
+        print(f"ServidorAPI a escutar em http://{self.host}:{self.porta}")
+        async with servidor:
+            await servidor.serve_forever()
+
+    def iniciar(self):
+        try:
+            asyncio.run(self.executar())
+        except KeyboardInterrupt:
+            print("ServidorAPI encerrado.")
+        finally:
+            self.executor.shutdown(wait=False)
@@ -0,0 +1,182 @@
+from ._dependencias import pd
+from ._dependencias import np
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+
+from .calculo_indicadores import CalculadoraIndicadores
+from .gestor_cadastro import GestorCadastro
+from .modelo_rating import ModeloRating
+
+
+class SimuladorEstresse:
+    """
+    Teste de Estresse (Monte Carlo) sobre as contas brutas.
+
+    Gera milhares de cenários por empresa como arrays NumPy
+    (empresas x cenários), recalcula os 4 indicadores e o score
+    do ModeloRating de forma 100% vetorizada (sem loops em Python)
+    e devolve a distribuição de probabilidade dos ratings.
+    """
+
+    # Colunas que a simulação precisa (as mesmas chaves de extrair_contas_empresa)
+    CONTAS_NECESSARIAS = [
+        'ativo_circulante', 'ativo_total', 'passivo_circulante',
+        'passivo_nao_circulante', 'patrimonio_liquido', 'lucro_liquido'
+    ]
+
+    def __init__(self, calculadora: CalculadoraIndicadores, gestor: GestorCadastro, modelo: ModeloRating):
+        """
+        Construtor. Recebe as instâncias das "fábricas"
+        de que precisa (injeção de dependência).
+        """
+        self.calculadora = calculadora
+        self.gestor = gestor
+        self.modelo = modelo
+        self.CENARIO_PADRAO = config.CENARIO_ESTRESSE_PADRAO
+        self.NUM_CENARIOS = config.NUM_CENARIOS_ESTRESSE
+        self.SEMENTE = config.SEMENTE_ESTRESSE
+        print("SimuladorEstresse iniciado.")
+
+    def carregar_contas(self, lista_tickers, ano):
+        """
+        Extrai as contas brutas de cada ticker (via CalculadoraIndicadores)
+        e devolve um DataFrame (linhas = empresas, colunas = contas).
+        Empresas sem dados são ignoradas.
+        """
+        linhas = {}
+        for ticker in lista_tickers:
+            ticker_upper = ticker.upper()
+            cnpj = self.gestor.encontrar_cnpj_por_ticker(ticker_upper)
+            if not cnpj:
+                print(f"AVISO: Ticker {ticker_upper} não encontrado no 'mapa_ticker_cnpj.csv'. Será ignorado.")
+                continue
+            contas = self.calculadora.extrair_contas_empresa(cnpj, ano)
+            if contas is not None:
+                linhas[ticker_upper] = contas
+
+        df_contas = pd.DataFrame.from_dict(linhas, orient='index').reindex(columns=self.CONTAS_NECESSARIAS)
+        df_contas.index.name = 'empresa'
+        return df_contas
+
+    def _calcular_indicadores_vetorizado(self, ac, at, pc, pnc, pl, ll):
+        """
+        Mesmas fórmulas de calcular_indicadores_empresa, mas sobre arrays.
+        Divisões por (quase) zero viram 'nan', como no cálculo original.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            divida_total = pc + pnc
+            liq_corrente = np.where(np.abs(pc) > 1e-9, ac / pc, np.nan)
+            endividamento_geral = np.where(np.abs(at) > 1e-9, divida_total / at, np.nan)
+            divida_pl = np.where(np.abs(pl) > 1e-9, divida_total / pl, np.nan)
+            roe = np.where(np.abs(pl) > 1e-9, ll / pl, np.nan)
+        return liq_corrente, endividamento_geral, divida_pl, roe
+
+    def _gerar_fatores(self, rng, formato, choque):
+        """
+        Gera a matriz de choques percentuais ~ N(média, desvio) para uma conta.
+        """
+        media, desvio = choque
+        return media + desvio * rng.standard_normal(formato)
+
+    def simular(self, df_contas, cenario=None, num_cenarios=None, semente=None):
+        """
+        Método PRINCIPAL. Aplica os choques do 'cenario' às contas de
+        todas as empresas de uma só vez.
+
+        Regras contábeis (o balanço continua a fechar):
+        - Lucro: varia em |lucro| * choque (um prejuízo também piora);
+          a variação passa pelo caixa (ativo circulante) e pelo PL.
+        - Passivo circulante: o aumento é uma nova obrigação que reduz o PL.
+        - Ativo circulante: perdas no ativo reduzem o ativo total e o PL.
+
+        Args:
+            df_contas (pd.DataFrame): Saída de carregar_contas (ou equivalente).
+            cenario (dict): {conta: (choque médio, desvio)}. Padrão: config.
+            num_cenarios (int): Número de cenários por empresa.
+            semente (int): Semente do gerador aleatório (reprodutível).
+
+        Returns:
+            dict com 'distribuicao_rating' (empresas x ratings, probabilidades),
+            'resumo' (rating/score base e estatísticas do score estressado)
+            e 'scores' (array empresas x cenários).
+        """
+        cenario = self.CENARIO_PADRAO if cenario is None else cenario
+        num_cenarios = self.NUM_CENARIOS if num_cenarios is None else num_cenarios
+        semente = self.SEMENTE if semente is None else semente
+
+        if df_contas is None or df_contas.empty:
+            print("ERRO: Nenhuma empresa com contas válidas para simular.")
+            return None
+
+        print(f"\n--- Teste de Estresse: {len(df_contas)} empresas x {num_cenarios} cenários ---")
+
+        # 1. Contas base como colunas (empresas x 1), para o broadcast
+        base = {
+            conta: df_contas[conta].to_numpy(dtype=np.float64)[:, np.newaxis]
+            for conta in self.CONTAS_NECESSARIAS
+        }
+        formato = (len(df_contas), num_cenarios)
+        rng = np.random.default_rng(semente)
+        sem_choque = (0.0, 0.0)
+
+        # 2. Gerar os choques
+        delta_ll = np.abs(base['lucro_liquido']) * self._gerar_fatores(rng, formato, cenario.get('lucro_liquido', sem_choque))
+        delta_pc = base['passivo_circulante'] * self._gerar_fatores(rng, formato, cenario.get('passivo_circulante', sem_choque))
+        delta_ac = base['ativo_circulante'] * self._gerar_fatores(rng, formato, cenario.get('ativo_circulante', sem_choque))
+
+        # 3. Contas estressadas (o balanço continua a fechar)
+        ll = base['lucro_liquido'] + delta_ll
+        ac = base['ativo_circulante'] + delta_ll + delta_ac
+        at = base['ativo_total'] + delta_ll + delta_ac
+        pc = base['passivo_circulante'] + delta_pc
+        pnc = np.broadcast_to(base['passivo_nao_circulante'], formato)
+        pl = base['patrimonio_liquido'] + delta_ll + delta_ac - delta_pc
+
+        # 4. Indicadores, scores e ratings (tudo vetorizado)
+        scores = self.modelo.calcular_scores_vetorizado(*self._calcular_indicadores_vetorizado(ac, at, pc, pnc, pl, ll))
+        indices_rating = self.modelo.converter_scores_para_indices_rating(scores)
+
+        scores_base = self.modelo.calcular_scores_vetorizado(*self._calcular_indicadores_vetorizado(
+            base['ativo_circulante'], base['ativo_total'], base['passivo_circulante'],
+            base['passivo_nao_circulante'], base['patrimonio_liquido'], base['lucro_liquido']
+        ))[:, 0]
+        indices_base = self.modelo.converter_scores_para_indices_rating(scores_base)
+
+        # 5. Distribuição: contagem de cada rating por empresa (um único bincount)
+        num_ratings = len(self.modelo.ROTULOS_RATING)
+        deslocamento = np.arange(len(df_contas))[:, np.newaxis] * num_ratings
+        contagens = np.bincount(
+            (indices_rating + deslocamento).ravel(),
+            minlength=len(df_contas) * num_ratings
+        ).reshape(len(df_contas), num_ratings)
+
+        df_distribuicao = pd.DataFrame(
+            contagens / num_cenarios,
+            index=df_contas.index,
+            columns=self.modelo.ROTULOS_RATING
+        )
+
+        rotulos = np.array(self.modelo.ROTULOS_RATING)
+        df_resumo = pd.DataFrame({
+            'rating_base': rotulos[indices_base],
+            'score_base': np.round(scores_base, 2),
+            'score_medio': np.round(scores.mean(axis=1), 2),
+            'score_p05': np.round(np.percentile(scores, 5, axis=1), 2),
+            'score_p50': np.round(np.percentile(scores, 50, axis=1), 2),
+            'rating_mais_provavel': rotulos[contagens.argmax(axis=1)],
+            'prob_rebaixamento': (indices_rating > indices_base[:, np.newaxis]).mean(axis=1)
+        }, index=df_contas.index)
+
+        print("Teste de Estresse concluído.")
+
+        return {
+            'distribuicao_rating': df_distribuicao,
+            'resumo': df_resumo,
+            'scores': scores
+        }
+
+    def simular_pares(self, lista_tickers, ano, cenario=None, num_cenarios=None, semente=None):
+        """
+        Atalho: carrega as contas dos tickers e executa a simulação.
+        """
+        df_contas = self.carregar_contas(lista_tickers, ano)
+        return self.simular(df_contas, cenario, num_cenarios, semente)
@@ -0,0 +1,326 @@
+import os
+import re
+import time
+import threading
+from ._dependencias import np
+from ._dependencias import pd
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+
+# (Só a leitura do painel precisa do pyarrow)
+from ._dependencias import disponivel
+
+
+class IndiceOrdenado:
+    """
+    Índice de UMA coluna numérica do painel: as linhas ordenadas pelo
+    valor (os 'nan' ficam fora) e o posto de cada linha nessa ordem.
+
+    - Um filtro ('<', '>=', 'entre', ...) é um intervalo de postos,
+      encontrado por busca binária (np.searchsorted), sem varrer a coluna.
+    - Testar se uma linha passa no filtro é comparar o seu posto com o
+      intervalo (mesma semântica do índice, sem reler os valores).
+    - Ordenar um conjunto de linhas é ordenar os seus postos (e o top-k
+      do mercado inteiro é só o início da ordem).
+    """
+
+    def __init__(self, valores):
+        self.ordem = np.argsort(valores, kind='stable') # (os 'nan' ficam no fim)
+        self.num_validos = int(np.count_nonzero(~np.isnan(valores)))
+        self.valores_ordenados = valores[self.ordem[:self.num_validos]]
+        self.posto = np.empty(len(valores), dtype=np.int64)
+        self.posto[self.ordem] = np.arange(len(valores))
+
+    def intervalos(self, operador, valor):
+        """
+        Intervalos [inicio, fim) de postos que satisfazem 'coluna operador valor'.
+        """
+        procurar = lambda v, lado: int(np.searchsorted(self.valores_ordenados, v, side=lado))
+        if operador == 'entre':
+            minimo, maximo = valor
+            return [(procurar(minimo, 'left'), procurar(maximo, 'right'))]
+        if operador == '<':
+            return [(0, procurar(valor, 'left'))]
+        if operador == '<=':
+            return [(0, procurar(valor, 'right'))]
+        if operador == '>':
+            return [(procurar(valor, 'right'), self.num_validos)]
+        if operador == '>=':
+            return [(procurar(valor, 'left'), self.num_validos)]
+        inicio, fim = procurar(valor, 'left'), procurar(valor, 'right')
+        if operador == '==':
+            return [(inicio, fim)]
+        return [(0, inicio), (fim, self.num_validos)] # '!='
+
+    def linhas(self, intervalos):
+        return np.concatenate([self.ordem[inicio:fim] for inicio, fim in intervalos])
+
+    def testar(self, linhas, intervalos):
+        postos = self.posto[linhas]
+        aceites = np.zeros(len(linhas), dtype=bool)
+        for inicio, fim in intervalos:
+            aceites |= (postos >= inicio) & (postos < fim)
+        return aceites
+
+    def ordenar(self, linhas, decrescente=False, limite=None):
+        """
+        As linhas pela ordem da coluna ('nan' no fim), só as 'limite' primeiras.
+        """
+        if len(linhas) == len(self.posto): # (Sem filtros: a ordem já está pronta)
+            ordem = self.ordem
+            if decrescente:
+                ordem = np.concatenate([ordem[:self.num_validos][::-1], ordem[self.num_validos:]])
+            return ordem[:limite]
+
+        chaves = self.posto[linhas]
+        if decrescente:
+            chaves = np.where(chaves < self.num_validos, self.num_validos - 1 - chaves, chaves)
+        if limite is not None and limite < len(linhas):
+            # Top-k: só as k primeiras são ordenadas
+            primeiras = np.argpartition(chaves, limite - 1)[:limite] if limite > 0 else np.array([], dtype=np.int64)
+            return linhas[primeiras[np.argsort(chaves[primeiras])]]
+        return linhas[np.argsort(chaves)]
+
+
+class IndiceCategorico:
+    """
+    Índice de UMA coluna de texto (setor, rating, ...): código por linha
+    e as linhas de cada valor (-1 = valor em falta).
+    """
+
+    def __init__(self, valores):
+        codigos, categorias = pd.factorize(pd.Series(valores, dtype=object))
+        self.codigos = codigos
+        self.categorias = {valor: codigo for codigo, valor in enumerate(categorias)}
+        ordem = np.argsort(codigos, kind='stable')
+        limites = np.searchsorted(codigos[ordem], np.arange(len(categorias) + 1))
+        self.linhas_por_codigo = [ordem[limites[c]:limites[c + 1]] for c in range(len(categorias))]
+
+    def codigos_aceites(self, operador, valor):
+        if operador == 'em':
+            return [self.categorias[v] for v in valor if v in self.categorias]
+        codigo = self.categorias.get(valor)
+        if operador == '==':
+            return [] if codigo is None else [codigo]
+        return [c for c in self.categorias.values() if c != codigo] # '!='
+
+    def linhas(self, codigos):
+        if not codigos:
+            return np.array([], dtype=np.int64)
+        return np.concatenate([self.linhas_por_codigo[c] for c in codigos])
+
+    def testar(self, linhas, codigos):
+        return np.isin(self.codigos[linhas], codigos)
+
+
+class _Condicao:
+    """
+    Um filtro já resolvido no índice: quantas linhas passa (sem as
+    extrair), as linhas (pelo índice) e o teste de um conjunto de linhas.
+    """
+
+    def __init__(self, indice, aceites, tamanho):
+        self.indice = indice
+        self.aceites = aceites # (intervalos de postos ou códigos aceites)
+        self.tamanho = tamanho
+
+    def linhas(self):
+        return self.indice.linhas(self.aceites)
+
+    def testar(self, linhas):
+        return self.indice.testar(linhas, self.aceites)
+
+
+class TabelaTriagem:
+    """
+    O painel de UM ano em memória, com um índice por coluna: ordenado
+    para as numéricas e categórico para as de texto (e 'ativa').
+    Os índices são construídos UMA vez, ao carregar o ano.
+    """
+
+    def __init__(self, df_painel, mtime):
+        self.df = df_painel.reset_index(drop=True)
+        self.mtime = mtime
+        self.num_linhas = len(self.df)
+        self.indices = {}
+        self.booleanas = set()
+        for coluna in self.df.columns:
+            serie = self.df[coluna]
+            if pd.api.types.is_bool_dtype(serie) or coluna == 'ativa':
+                self.booleanas.add(coluna)
+                self.indices[coluna] = IndiceCategorico(serie.to_numpy(dtype=object))
+            elif pd.api.types.is_numeric_dtype(serie):
+                self.indices[coluna] = IndiceOrdenado(serie.to_numpy(dtype=np.float64))
+            else:
+                self.indices[coluna] = IndiceCategorico(serie.astype(object).to_numpy())
+
+    @property
+    def colunas_numericas(self):
+        return [coluna for coluna, indice in self.indices.items() if isinstance(indice, IndiceOrdenado)]
+
+    def _converter_valor(self, coluna, operador, valor):
+        """
+        Valores vindos de texto (ex: do dashboard ou da API) para o tipo da coluna.
+        """
+        if coluna in self.booleanas:
+            converter = lambda v: v if isinstance(v, bool) else str(v).strip().lower() in ('sim', 'true', '1', 's')
+        elif isinstance(self.indices[coluna], IndiceOrdenado):
+            converter = lambda v: float(v.replace(',', '.')) if isinstance(v, str) else float(v)
+        else:
+            converter = lambda v: v.strip() if isinstance(v, str) else v
+        try:
+            if operador in ('entre', 'em'):
+                return tuple(converter(v) for v in valor)
+            return converter(valor)
+        except (TypeError, ValueError):
+            raise ValueError(f"Valor '{valor}' inválido para '{coluna}'.")
+
+    def condicao(self, coluna, operador, valor):
+        if coluna not in self.indices:
+            raise ValueError(f"Coluna '{coluna}' não existe no painel.")
+        indice = self.indices[coluna]
+        numerica = isinstance(indice, IndiceOrdenado)
+        if operador not in (TriagemPainel.OPERADORES_NUMERICOS if numerica else TriagemPainel.OPERADORES_TEXTO):
+            raise ValueError(f"Operador '{operador}' não se aplica à coluna '{coluna}'.")
+        if operador == 'entre' and len(valor) != 2:
+            raise ValueError(f"'entre' precisa de (mínimo, máximo) para '{coluna}'.")
+
+        valor = self._converter_valor(coluna, operador, valor)
+        if numerica:
+            intervalos = indice.intervalos(operador, valor)
+            return _Condicao(indice, intervalos, sum(max(fim - inicio, 0) for inicio, fim in intervalos))
+        codigos = indice.codigos_aceites(operador, valor)
+        return _Condicao(indice, codigos, sum(len(indice.linhas_por_codigo[c]) for c in codigos))
+
+
+class TriagemPainel:
+    """
+    Triagem do MERCADO INTEIRO sobre o painel já exportado
+    (exportar_painel.py ou distribuir.py): filtros, ordenação e top-k
+    sem recalcular nenhum demonstrativo.
+
+        triagem.consultar(2023, [('ativa', '==', True), ('liq_corrente', '<', 1), ('roe', '<', 0)],
+                          ordenar_por='divida_pl', decrescente=True, limite=20)
+
+    Cada consulta começa pelo filtro mais seletivo (o tamanho de cada
+    filtro sai do índice por busca binária) e testa os outros só nas
+    linhas que restam. Valores em falta nunca passam num filtro.
+
+    O painel de cada ano é lido uma vez e fica em memória; se a
+    partição for regravada (nova exportação), é relida.
+    """
+
+    OPERADORES_NUMERICOS = ('<', '<=', '>', '>=', '==', '!=', 'entre')
+    OPERADORES_TEXTO = ('==', '!=', 'em')
+
+    def __init__(self, diretorio_painel=None):
+        self.diretorio_painel = diretorio_painel or config.CAMINHO_PAINEL_INDICADORES
+        self.COLUNAS_RESULTADO = config.COLUNAS_RESULTADO_TRIAGEM
+        self.LIMITE_PADRAO = config.LIMITE_TRIAGEM_PADRAO
+        self._tabelas = {} # ano -> TabelaTriagem
+        self._lock = threading.Lock()
+
+    def _caminho_ano(self, ano):
+        return os.path.join(self.diretorio_painel, f"ano={ano}", "painel.parquet")
+
+    def anos_disponiveis(self):
+        """
+        Anos com partição exportada, do mais recente para o mais antigo.
+        """
+        if not os.path.isdir(self.diretorio_painel):
+            return []
+        anos = [int(nome[4:]) for nome in os.listdir(self.diretorio_painel)
+                if re.fullmatch(r'ano=\d{4}', nome) and os.path.exists(self._caminho_ano(nome[4:]))]
+        return sorted(anos, reverse=True)
+
+    def obter_tabela(self, ano):
+        """
+        TabelaTriagem do ano (memória -> Parquet), ou None se o ano não
+        foi exportado.
+        """
+        caminho = self._caminho_ano(ano)
+        try:
+            mtime = os.path.getmtime(caminho)
+        except OSError:
+            print(f"AVISO: Painel de {ano} não exportado ({caminho}). Corra: python exportar_painel.py {ano} {ano}")
+            return None
+        tabela = self._tabelas.get(ano)
+        if tabela is not None and tabela.mtime == mtime:
+            return tabela
+
+        with self._lock: # (Uma leitura por ano, mesmo com pedidos em paralelo)
+            tabela = self._tabelas.get(ano)
+            if tabela is None or tabela.mtime != mtime:
+                if not disponivel('pyarrow'):
+                    print("ERRO: Biblioteca 'pyarrow' não encontrada (necessária para o Parquet).")
+                    return None
+                inicio = time.perf_counter()
+                tabela = TabelaTriagem(pd.read_parquet(caminho), mtime)
+                self._tabelas[ano] = tabela
+                print(f"Triagem: painel de {ano} carregado ({tabela.num_linhas} empresas, "
+                      f"{len(tabela.indices)} índices) em {time.perf_counter() - inicio:.2f}s.")
+        return tabela
+
+    @classmethod
+    def interpretar_filtros(cls, texto):
+        """
+        Filtros em texto, um por linha ou separados por ';':
+
+            liq_corrente < 1; roe < 0; ativa == sim; rating em BB|B|CCC
+
+        Retorna [(coluna, operador, valor)] ('em' separa os valores por '|').
+        """
+        filtros = []
+        for parte in re.split(r'[;\n]', texto or ''):
+            if not parte.strip():
+                continue
+            correspondencia = re.fullmatch(r'\s*(\w+)\s*(<=|>=|==|!=|<|>|=|\s+em\s+)\s*(.+?)\s*', parte)
+            if correspondencia is None:
+                raise ValueError(f"Filtro '{parte.strip()}' inválido (ex: 'liq_corrente < 1').")
+            coluna, operador, valor = correspondencia.groups()
+            operador = {'=': '=='}.get(operador.strip(), operador.strip())
+            if operador == 'em':
+                valor = [v.strip() for v in valor.split('|') if v.strip()]
+            filtros.append((coluna, operador, valor))
+        return filtros
+
+    def consultar(self, ano, filtros=(), ordenar_por=None, decrescente=False, limite=None, colunas=None):
+        """
+        Empresas do ano que passam em TODOS os filtros [(coluna, operador,
+        valor)], ordenadas por 'ordenar_por' (numérica), até 'limite'
+        (padrão: config.LIMITE_TRIAGEM_PADRAO; 0 = sem limite).
+
+        Retorna um DataFrame (df.attrs['total'] = empresas que passam nos
+        filtros, antes do limite) ou None se o ano não foi exportado.
+        Filtros ou colunas inválidos levantam ValueError.
+        """
+        tabela = self.obter_tabela(ano)
+        if tabela is None:
+            return None
+        limite = self.LIMITE_PADRAO if limite is None else (limite or None)
+        if ordenar_por is not None and ordenar_por not in tabela.colunas_numericas:
+            raise ValueError(f"Só é possível ordenar por uma coluna numérica ('{ordenar_por}' não é).")
+
+        # 1. Plano: o filtro mais seletivo dá as linhas candidatas, os outros testam-nas
+        condicoes = sorted((tabela.condicao(*filtro) for filtro in filtros), key=lambda c: c.tamanho)
+        if not condicoes:
+            linhas = np.arange(tabela.num_linhas)
+        else:
+            linhas = condicoes[0].linhas()
+            for condicao in condicoes[1:]:
+                if not len(linhas):
+                    break
+                linhas = linhas[condicao.testar(linhas)]
+
+        # 2. Ordenação e top-k (sem ordenação: pela ordem do painel, por CNPJ)
+        total = len(linhas)
+        if ordenar_por is not None:
+            linhas = tabela.indices[ordenar_por].ordenar(linhas, decrescente, limite)
+        else:
+            linhas = np.sort(linhas)[:limite]
+
+        if colunas is None:
+            usadas = [filtro[0] for filtro in filtros] + ([ordenar_por] if ordenar_por else [])
+            colunas = [c for c in dict.fromkeys(self.COLUNAS_RESULTADO + usadas) if c in tabela.indices]
+        df_resultado = tabela.df.iloc[linhas][list(colunas)].reset_index(drop=True)
+        df_resultado.attrs['total'] = total
+        return df_resultado
\ No newline at end of file
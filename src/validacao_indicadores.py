@@ -0,0 +1,89 @@
+from ._dependencias import np
+from ._dependencias import pd
+from . import config # <-- IMPORTA A NOSSA CONFIGURAÇÃO
+
+
+class ValidadorIndicadores:
+    """
+    Validação VETORIZADA dos indicadores: todas as regras são avaliadas
+    como máscaras booleanas sobre a matriz (empresas x indicadores)
+    inteira, e o resultado é um CÓDIGO DE MOTIVO por linha ('OK' = válida).
+
+    Regras, por ordem (a primeira que falha dá o código):
+    1. 'INDICADOR_NAN': algum indicador essencial do registro é 'nan'
+       (os complementares podem ser 'nan').
+    2. As regras de outlier de config.REGRAS_VALIDACAO_INDICADORES.
+
+    Nenhuma exceção no caminho "quente": quem chama filtra pela máscara
+    (codigos == OK) e relata as exclusões de uma vez (tabela_exclusoes).
+    """
+
+    OK = 'OK'
+    NAN = 'INDICADOR_NAN'
+    CONDICOES = {
+        '<': (lambda valores, limite: valores < limite, "abaixo do limite"),
+        '>': (lambda valores, limite: valores > limite, "acima do limite"),
+        '|>|': (lambda valores, limite: np.abs(valores) > limite, "extremo, em valor absoluto acima do limite"),
+    }
+
+    def __init__(self, registro):
+        self.registro = registro
+        self.REGRAS = config.REGRAS_VALIDACAO_INDICADORES
+        self.PERCENTUAIS = config.INDICADORES_PERCENTUAIS
+
+    def validar_matriz(self, matriz, indicadores):
+        """
+        Retorna um array (um código por linha da matriz).
+        'indicadores' são os nomes das colunas da matriz.
+        """
+        matriz = np.asarray(matriz, dtype=np.float64).reshape(-1, len(indicadores))
+        posicoes = {nome: i for i, nome in enumerate(indicadores)}
+        codigos = np.full(matriz.shape[0], self.OK, dtype=object)
+
+        essenciais = [posicoes[nome] for nome in self.registro.indicadores_essenciais() if nome in posicoes]
+        if essenciais:
+            codigos[np.isnan(matriz[:, essenciais]).any(axis=1)] = self.NAN
+
+        with np.errstate(invalid='ignore'):
+            for codigo, (nome, condicao, limite) in self.REGRAS.items():
+                if nome not in posicoes:
+                    continue # (Indicador não registado: regra não se aplica)
+                falha = self.CONDICOES[condicao][0](matriz[:, posicoes[nome]], limite)
+                codigos[falha & (codigos == self.OK)] = codigo
+        return codigos
+
+    def validar(self, indicadores):
+        """
+        Código de motivo de UMA empresa (dict {indicador: valor}).
+        """
+        nomes = self.registro.nomes()
+        linha = [indicadores.get(nome, np.nan) for nome in nomes]
+        return self.validar_matriz([linha], nomes)[0]
+
+    def _formatar(self, nome, valor):
+        return f"{valor:.2%}" if nome in self.PERCENTUAIS else f"{valor:.2f}"
+
+    def descrever(self, codigo, linha, indicadores):
+        """
+        Texto do motivo (para os avisos), a partir da linha de valores.
+        """
+        if codigo == self.OK:
+            return ""
+        posicoes = {nome: i for i, nome in enumerate(indicadores)}
+        if codigo == self.NAN:
+            nome = next(nome for nome in self.registro.indicadores_essenciais() if np.isnan(linha[posicoes[nome]]))
+            return f"Indicador '{nome}' é 'nan' (divisão por zero?)."
+        nome, condicao, limite = self.REGRAS[codigo]
+        valor = linha[posicoes[nome]]
+        return f"Indicador '{nome}' {self.CONDICOES[condicao][1]} ({self._formatar(nome, valor)}; limite {self._formatar(nome, limite)})."
+
+    def tabela_exclusoes(self, empresas, matriz, indicadores, codigos):
+        """
+        DataFrame (empresa, motivo, detalhe) só das linhas excluídas.
+        """
+        excluidas = np.flatnonzero(codigos != self.OK)
+        return pd.DataFrame({
+            'empresa': [empresas[i] for i in excluidas],
+            'motivo': codigos[excluidas],
+            'detalhe': [self.descrever(codigos[i], matriz[i], indicadores) for i in excluidas],
+        }, columns=['empresa', 'motivo', 'detalhe'])
\ No newline at end of file